@@ -0,0 +1,81 @@
+"""
+Бенчмарк біквадратичної інтерполяції: сепарабельний рушій проти RectBivariateSpline.
+
+Запуск (з каталогу backend):
+    python -m benchmarks.bench_biquadratic
+    python -m benchmarks.bench_biquadratic --sizes 512x512 2000x3000 --scales 2 3 --repeats 5
+
+Для кожного розміру та коефіцієнта виводить медіанний час обох реалізацій, прискорення,
+максимальне відхилення (у рівнях яскравості) та частку пікселів, що відрізняються.
+Перший виклик сепарабельного рушія (з побудовою плану) вимірюється окремо.
+"""
+import argparse
+import time
+import numpy as np
+import cv2
+from core.biquadratic import resample_biquadratic, resample_biquadratic_spline, _resample_plan
+
+# Допустиме відхилення від сплайнового варіанту (рівні яскравості)
+TOLERANCE = 1
+
+
+def synthetic_image(height: int, width: int, seed: int = 0) -> np.ndarray:
+    """Синтетичне 'фотографічне' зображення: згладжений шум плюс градієнти та різкі краї."""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(noise, (0, 0), 2.0)
+    gradient = (np.arange(width) / max(width - 1, 1) * 127).astype(np.uint8)
+    image = cv2.add(image, np.ascontiguousarray(np.broadcast_to(gradient[None, :, None], image.shape)))
+    cv2.rectangle(image, (width // 4, height // 4), (width // 2, height // 2), (255, 255, 255), -1)
+    return image
+
+
+def measure(func, repeats: int) -> tuple[float, np.ndarray]:
+    """Медіанний час виконання func() та результат останнього виклику."""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    height, width = value.lower().split("x")
+    return int(height), int(width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк біквадратичної інтерполяції")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[(256, 256), (512, 768), (1000, 1500)],
+                        help="Розміри зменшеного зображення у форматі ВИСОТАxШИРИНА")
+    parser.add_argument("--scales", nargs="+", type=float, default=[2.0, 3.0])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Розмір':>12} {'x':>4} {'сплайн, с':>10} {'перший, с':>10} {'кеш, с':>10} {'приск.':>7} {'макс.':>6} {'різн., %':>9}")
+    failed = False
+    for height, width in args.sizes:
+        image = synthetic_image(height, width)
+        for scale in args.scales:
+            target_height, target_width = int(height * scale), int(width * scale)
+
+            spline_time, expected = measure(lambda: resample_biquadratic_spline(image, target_height, target_width), args.repeats)
+
+            _resample_plan.cache_clear()
+            first_time, _ = measure(lambda: resample_biquadratic(image, target_height, target_width), 1)
+            cached_time, actual = measure(lambda: resample_biquadratic(image, target_height, target_width), args.repeats)
+
+            diff = np.abs(expected.astype(np.int16) - actual.astype(np.int16))
+            max_diff = int(diff.max())
+            failed |= max_diff > TOLERANCE
+            print(f"{height:>5}x{width:<6} {scale:>4g} {spline_time:>10.3f} {first_time:>10.3f} {cached_time:>10.3f} "
+                  f"{spline_time / cached_time:>6.1f}x {max_diff:>6} {100 * np.count_nonzero(diff) / diff.size:>9.4f}")
+
+    if failed:
+        raise SystemExit(f"Відхилення перевищує допуск {TOLERANCE}")
+
+
+if __name__ == "__main__":
+    main()
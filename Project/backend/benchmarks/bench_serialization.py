@@ -0,0 +1,164 @@
+"""
+Бенчмарк серіалізації завдань і результатів Celery: json проти msgpack зі стисненням.
+
+Запуск (з каталогу backend, Redis — UPSCALER_REDIS_URL):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 512x512 2000x3000 --batch 8 --repeats 20
+
+Типові повідомлення:
+
+- task — аргументи process_all_methods із зображенням (image_base64) кожного розміру;
+- batch — аргументи process_batch з --batch зображеннями першого розміру;
+- result, sweep — відповіді process_all_methods для першого розміру з одним коефіцієнтом і
+  з розгорткою (конвеєр виконується синхронно, артефакти — у тимчасовому каталозі).
+
+Для кожного формату (core/serialization.py) виводяться розмір тіла, байти в Redis і медіанний
+час кодування й декодування тіла (як у kombu, без конверта транспорту). Завдання ставляться
+в окрему чергу, яку ніхто не читає, результати записуються під окремим ключем — як це
+роблять транспорт (тіло в base64 всередині JSON-конверта із заголовками) і бекенд
+результатів; після виміру обидва ключі видаляються. Байти в Redis — MEMORY USAGE, а якщо
+сервер його не підтримує, — довжина збереженого значення.
+"""
+import os
+import time
+import shutil
+import base64
+import logging
+import argparse
+import tempfile
+from uuid import uuid4
+import cv2
+from benchmarks.bench_biquadratic import synthetic_image, measure, parse_size
+
+BENCH_QUEUE = "upscaler:bench:serialization"
+BENCH_RESULT_KEY = "upscaler:bench:serialization:result"
+# (назва, формат, кодек стиснення великих полів)
+VARIANTS = [("json", "json", None), ("msgpack", "msgpack", "none"), ("msgpack+lz4", "msgpack", "lz4"),
+            ("msgpack+zstd", "msgpack", "zstd")]
+SWEEP_FACTORS = [2.0, 3.0, 4.0]
+# Довжина повідомлення в черзі без передачі його клієнту
+_QUEUED_BYTES = "return string.len(redis.call('LINDEX', KEYS[1], 0))"
+
+
+def encode_image(height: int, width: int) -> str:
+    return base64.b64encode(cv2.imencode(".png", synthetic_image(height, width))[1]).decode("utf-8")
+
+
+def run_pipeline(image_base64: str, scale_factor) -> dict:
+    """Відповідь process_all_methods (синхронно, без воркера)."""
+    from celery_app import process_all_methods
+    response = process_all_methods.apply(args=(image_base64, scale_factor), kwargs={"parallel": False}).get()
+    if response.get("status") != "success":
+        raise RuntimeError(response.get("error"))
+    return response
+
+
+def supports_memory_usage(client) -> bool:
+    try:
+        client.memory_usage(BENCH_RESULT_KEY)
+        return True
+    except Exception:
+        return False
+
+
+def redis_bytes(client, key: str, memory_usage: bool) -> int:
+    """Пам'ять ключа в Redis (MEMORY USAGE) або довжина збереженого значення."""
+    if memory_usage:
+        return client.memory_usage(key)
+    if client.type(key) == b"list":
+        return client.eval(_QUEUED_BYTES, 1, key)
+    return client.strlen(key)
+
+
+def serializer_for(serializer: str, compression: str) -> str:
+    """Ім'я серіалізатора kombu для варіанта (msgpack перереєструється з кодеком варіанта)."""
+    from core.serialization import MSGPACK_SERIALIZER, MsgpackCodec, register_serializer
+    if serializer == "json":
+        return "json"
+    register_serializer(MsgpackCodec(compression))
+    return MSGPACK_SERIALIZER
+
+
+def measure_payload(client, memory_usage: bool, serializer: str, body, repeats: int, task: tuple = None) -> dict:
+    """
+    Розмір і час кодування тіла; task=(ім'я, args, kwargs) — повідомлення ставиться в чергу,
+    інакше тіло записується як результат.
+    """
+    from kombu.serialization import dumps, loads
+    from core.task_queue import celery_app
+    encode_time, (content_type, content_encoding, data) = measure(lambda: dumps(body, serializer=serializer),
+                                                                  repeats)
+    decode_time, _ = measure(lambda: loads(data, content_type, content_encoding, accept={content_type}), repeats)
+    if task:
+        name, args, kwargs = task
+        celery_app.send_task(name, args, kwargs, queue=BENCH_QUEUE, serializer=serializer)
+        stored = redis_bytes(client, BENCH_QUEUE, memory_usage)
+        client.delete(BENCH_QUEUE)
+    else:
+        client.set(BENCH_RESULT_KEY, data)
+        stored = redis_bytes(client, BENCH_RESULT_KEY, memory_usage)
+        client.delete(BENCH_RESULT_KEY)
+    return {"bytes": len(data), "redis_bytes": stored, "encode_ms": encode_time * 1000, "decode_ms": decode_time * 1000}
+
+
+def result_meta(response: dict) -> dict:
+    """Запис результату в бекенді, як його зберігає Celery."""
+    return {"status": "SUCCESS", "result": response, "traceback": None, "children": [],
+            "date_done": time.strftime("%Y-%m-%dT%H:%M:%S"), "task_id": str(uuid4())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк серіалізації завдань і результатів Celery")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[(512, 512), (1080, 1920)],
+                        help="Розміри зображень у форматі ВИСОТАxШИРИНА")
+    parser.add_argument("--batch", type=int, default=8, help="Зображень у пакеті")
+    parser.add_argument("--scale", type=float, default=2.0)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    # config читається під час імпорту, тож каталоги задаються до нього
+    workdir = tempfile.mkdtemp(prefix="upscaler-bench-")
+    os.environ["UPSCALER_ARTIFACT_ROOT"] = os.path.join(workdir, "results")
+    os.environ["UPSCALER_METRICS_DB"] = os.path.join(workdir, "metrics.sqlite3")
+    logging.disable(logging.WARNING)
+    from core.task_queue import celery_app, PROCESS_ALL_METHODS, PROCESS_BATCH
+    client = celery_app.backend.client
+    memory_usage = supports_memory_usage(client)
+
+    images = {size: encode_image(*size) for size in args.sizes}
+    first = images[args.sizes[0]]
+    payloads = []
+    for (height, width), image_base64 in images.items():
+        kwargs = {"encoding": None, "image_path": None, "cache_key": uuid4().hex * 2, "methods": None}
+        payloads.append((f"task {height}x{width}", (PROCESS_ALL_METHODS, (image_base64, args.scale), kwargs)))
+    items = [{"image_base64": first, "scale_factor": args.scale}] * args.batch
+    height, width = args.sizes[0]
+    payloads.append((f"batch {args.batch}x{height}x{width}", (PROCESS_BATCH, (items,), {"encoding": None})))
+    try:
+        payloads.append((f"result {height}x{width}", result_meta(run_pipeline(first, args.scale))))
+        payloads.append((f"sweep {height}x{width} x{len(SWEEP_FACTORS)}",
+                         result_meta(run_pipeline(first, SWEEP_FACTORS))))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Байти в Redis: {'MEMORY USAGE' if memory_usage else 'довжина значення'}")
+    print(f"{'Повідомлення':<24} {'Формат':<14} {'тіло, байт':>12} {'Redis, байт':>12} {'від json':>9} "
+          f"{'кодування, мс':>14} {'декодування, мс':>16}")
+    for label, payload in payloads:
+        baseline = None
+        for name, serializer, compression in VARIANTS:
+            serializer = serializer_for(serializer, compression)
+            if isinstance(payload, tuple):
+                # Тіло повідомлення протоколу 2: (args, kwargs, embed)
+                task_name, task_args, task_kwargs = payload
+                body = (task_args, task_kwargs, {"callbacks": None, "errbacks": None, "chain": None, "chord": None})
+                report = measure_payload(client, memory_usage, serializer, body, args.repeats, payload)
+            else:
+                report = measure_payload(client, memory_usage, serializer, payload, args.repeats)
+            baseline = baseline or report["redis_bytes"]
+            print(f"{label:<24} {name:<14} {report['bytes']:>12} {report['redis_bytes']:>12} "
+                  f"{report['redis_bytes'] / baseline:>9.2f} {report['encode_ms']:>14.2f} {report['decode_ms']:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Бенчмарк холодного старту API і воркера.
+
+Запуск (з каталогу backend):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeats 10 --size 1024x1024
+
+Кожен вимір — у новому процесі інтерпретатора (холодний старт, файли вже в кеші ОС):
+
+- python — запуск порожнього інтерпретатора (нижня межа);
+- api — імпорт main (FastAPI-застосунок), а також які важкі бібліотеки при цьому завантажено;
+- worker — імпорт celery_app (завдання, NumPy, OpenCV, SciPy);
+- перше і друге завдання process_all_methods (синхронно, без Redis) у щойно запущеному
+  процесі воркера без прогріву і після прогріву (warm_up).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+from benchmarks.bench_biquadratic import parse_size
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("numpy", "cv2", "scipy", "skimage", "matplotlib", "PIL")
+
+_IMPORT_CODE = """
+import sys, json, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_FIRST_TASK_CODE = """
+import os, json, time, base64, shutil, logging, tempfile
+workdir = tempfile.mkdtemp(prefix="upscaler-startup-")
+os.environ["UPSCALER_ARTIFACT_ROOT"] = os.path.join(workdir, "results")
+os.environ["UPSCALER_METRICS_DB"] = os.path.join(workdir, "metrics.sqlite3")
+logging.disable(logging.WARNING)
+import cv2
+from benchmarks.bench_biquadratic import synthetic_image
+image_base64 = base64.b64encode(cv2.imencode(".png", synthetic_image({height}, {width}))[1]).decode("utf-8")
+import celery_app
+celery_app.celery_app.conf.update(task_always_eager=True, result_backend="cache+memory://")
+report = {{}}
+if {warm}:
+    report["warmup"] = celery_app.warm_up()["seconds"]
+start = time.perf_counter()
+response = celery_app.process_all_methods.apply(args=(image_base64, 2.0), kwargs={{"parallel": False}}).get()
+report["first_task"] = time.perf_counter() - start
+start = time.perf_counter()
+celery_app.process_all_methods.apply(args=(image_base64, 2.0), kwargs={{"parallel": False}}).get()
+report["second_task"] = time.perf_counter() - start
+shutil.rmtree(workdir, ignore_errors=True)
+assert response["status"] == "success", response
+print(json.dumps(report))
+"""
+
+
+def run_child(code: str) -> tuple[float, dict]:
+    """Виконує code у новому інтерпретаторі; повертає (загальний час процесу, JSON з останнього рядка)."""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr[-2000:])
+    lines = completed.stdout.strip().splitlines()
+    return elapsed, (json.loads(lines[-1]) if lines else {})
+
+
+def median(values: list) -> float:
+    return float(np.median(values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк холодного старту API і воркера")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--size", type=parse_size, default=(512, 512),
+                        help="Розмір зображення першого завдання у форматі ВИСОТАxШИРИНА")
+    args = parser.parse_args()
+
+    print(f"{'Випадок':<34} {'процес, с':>10} {'імпорт, с':>10}  важкі модулі")
+    python_times = [run_child("pass")[0] for _ in range(args.repeats)]
+    print(f"{'python':<34} {median(python_times):>10.3f}")
+    for label, module in (("api (import main)", "main"), ("worker (import celery_app)", "celery_app")):
+        runs = [run_child(_IMPORT_CODE.format(module=module, heavy=HEAVY_MODULES)) for _ in range(args.repeats)]
+        heavy = ", ".join(runs[-1][1]["heavy"]) or "—"
+        print(f"{label:<34} {median([r[0] for r in runs]):>10.3f} {median([r[1]['seconds'] for r in runs]):>10.3f}"
+              f"  {heavy}")
+
+    height, width = args.size
+    print(f"\nПерше завдання {height}x{width} у новому процесі воркера:")
+    print(f"{'':<34} {'прогрів, с':>10} {'перше, с':>10} {'друге, с':>10}")
+    for warm in (False, True):
+        reports = [run_child(_FIRST_TASK_CODE.format(height=height, width=width, warm=warm))[1]
+                   for _ in range(args.repeats)]
+        warmup = f"{median([r['warmup'] for r in reports]):>10.3f}" if warm else f"{'—':>10}"
+        print(f"{'з прогрівом' if warm else 'без прогріву':<34} {warmup} "
+              f"{median([r['first_task'] for r in reports]):>10.3f} {median([r['second_task'] for r in reports]):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Офлайн-бенчмарк методів інтерполяції та всього конвеєра обробки.
+
+Запуск (з каталогу backend):
+    python -m benchmarks.bench_suite
+    python -m benchmarks.bench_suite --sizes 256x256 1080x1920 --scales 2 --save-baseline baseline.json
+    python -m benchmarks.bench_suite --baseline baseline.json --threshold 0.15
+
+Синтетичні зображення генеруються локально (без мережі) для сітки розмірів (від 256x256
+до 8K) і коефіцієнтів масштабування. Розмір — це розмір оригіналу, як у сервісі: функції
+з core/interpolation.py отримують зменшене зображення і відновлюють його до оригіналу,
+а конвеєр (тіло process_all_methods) виконується синхронно, без Redis і воркера, з
+артефактами та метриками у тимчасовому каталозі.
+
+Кожен випадок виконується в окремому процесі, тож пікова RSS (ru_maxrss) належить лише
+йому. Записуються медіанний час, мегапікселі за секунду (пікселі результату) і пікова RSS.
+Із --baseline час порівнюється зі збереженим JSON; уповільнення понад --threshold
+(частка) вважається регресією, і бенчмарк завершується з кодом 1.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import shutil
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import cv2
+from benchmarks.bench_biquadratic import synthetic_image, measure, parse_size
+
+DEFAULT_SIZES = [(256, 256), (1024, 1024), (1080, 1920), (2160, 3840), (4320, 7680)]
+DEFAULT_SCALES = [2.0, 4.0]
+# Допустиме уповільнення відносно базових вимірів (0.15 = на 15%)
+DEFAULT_THRESHOLD = 0.15
+
+INTERPOLATION_FUNCTIONS = ("bilinear_interpolation", "bicubic_interpolation", "biquadratic_interpolation")
+PIPELINE = "process_all_methods"
+
+
+def case_key(target: str, height: int, width: int, scale: float) -> str:
+    return f"{target}/{height}x{width}/x{scale:g}"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss у Linux — кілобайти, у macOS — байти
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _run_interpolation(name: str, image: np.ndarray, scale: float, repeats: int) -> float:
+    from core import interpolation
+    func = getattr(interpolation, name)
+    # Перший виклик (побудова плану біквадратичного рушія, ініціалізація OpenCV) не враховується
+    func(image, scale)
+    wall_time, _ = measure(lambda: func(image, scale), repeats)
+    return wall_time
+
+
+def _run_pipeline(image: np.ndarray, scale: float, repeats: int) -> float:
+    # config читається під час імпорту, тож каталоги задаються до нього
+    workdir = tempfile.mkdtemp(prefix="upscaler-bench-")
+    os.environ["UPSCALER_ARTIFACT_ROOT"] = os.path.join(workdir, "results")
+    os.environ["UPSCALER_UPLOAD_ROOT"] = os.path.join(workdir, "uploads")
+    os.environ["UPSCALER_METRICS_DB"] = os.path.join(workdir, "metrics.sqlite3")
+    from celery_app import celery_app, process_all_methods
+    celery_app.conf.update(task_always_eager=True, result_backend="cache+memory://")
+
+    image_base64 = base64.b64encode(cv2.imencode(".png", image)[1]).decode("utf-8")
+
+    def run():
+        response = process_all_methods.apply(args=(image_base64, scale), kwargs={"parallel": False}).get()
+        if response.get("status") != "success":
+            raise RuntimeError(response.get("error"))
+
+    try:
+        return measure(run, repeats)[0]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_case(target: str, height: int, width: int, scale: float, repeats: int) -> dict:
+    """Вимірює один випадок (виконується в окремому процесі)."""
+    logging.disable(logging.WARNING)
+    image = synthetic_image(height, width)
+    if target == PIPELINE:
+        wall_time = _run_pipeline(image, scale, repeats)
+        pixels = height * width
+    else:
+        reduced = cv2.resize(image, (max(1, int(width / scale)), max(1, int(height / scale))),
+                             interpolation=cv2.INTER_AREA)
+        wall_time = _run_interpolation(target, reduced, scale, repeats)
+        pixels = int(reduced.shape[0] * scale) * int(reduced.shape[1] * scale)
+    return {
+        "wall_time": wall_time,
+        "megapixels_per_second": pixels / 1e6 / wall_time,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def environment() -> dict:
+    """Версії бібліотек і платформа — для порівняння результатів між оновленнями."""
+    import scipy
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "scipy": scipy.__version__,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Випадки, час яких перевищує базовий більш ніж на threshold: [(ключ, базовий, поточний)]."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous and current["wall_time"] > previous["wall_time"] * (1 + threshold):
+            regressions.append((key, previous["wall_time"], current["wall_time"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк методів інтерполяції та конвеєра")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=DEFAULT_SIZES,
+                        help="Розміри оригіналу у форматі ВИСОТАxШИРИНА")
+    parser.add_argument("--scales", nargs="+", type=float, default=DEFAULT_SCALES)
+    parser.add_argument("--targets", nargs="+", choices=[*INTERPOLATION_FUNCTIONS, PIPELINE],
+                        default=[*INTERPOLATION_FUNCTIONS, PIPELINE])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--pipeline-repeats", type=int, default=1,
+                        help="Повторів для конвеєра (на 8K один прогін триває десятки секунд)")
+    parser.add_argument("--baseline", help="JSON з базовими вимірами для порівняння")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Допустиме уповільнення відносно базових вимірів (частка)")
+    parser.add_argument("--save-baseline", help="Зберегти виміри як базові у JSON")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print(f"{'Випадок':<42} {'час, с':>9} {'МП/с':>8} {'RSS, МБ':>8} {'база, с':>9} {'зміна':>7}")
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for height, width in args.sizes:
+        for scale in args.scales:
+            for target in args.targets:
+                key = case_key(target, height, width, scale)
+                repeats = args.pipeline_repeats if target == PIPELINE else args.repeats
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(run_case, target, height, width, scale, repeats).result()
+                results[key] = result
+                previous = baseline.get(key)
+                change = (f"{(result['wall_time'] / previous['wall_time'] - 1) * 100:>+6.1f}%"
+                          if previous else f"{'—':>7}")
+                base_time = f"{previous['wall_time']:>9.4f}" if previous else f"{'—':>9}"
+                print(f"{key:<42} {result['wall_time']:>9.4f} {result['megapixels_per_second']:>8.1f} "
+                      f"{result['peak_rss_mb']:>8.0f} {base_time} {change}", flush=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"Базові виміри збережено у {args.save_baseline}")
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        for key, previous, current in regressions:
+            print(f"Регресія {key}: {previous:.4f} с -> {current:.4f} с")
+        raise SystemExit(f"Уповільнення понад {args.threshold:.0%} у {len(regressions)} випадках")
+
+
+if __name__ == "__main__":
+    main()
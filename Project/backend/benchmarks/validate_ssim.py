@@ -0,0 +1,111 @@
+"""
+Перевірка і бенчмарк рушія SSIM (core/ssim.py) проти skimage.
+
+Запуск (з каталогу backend):
+    python -m benchmarks.validate_ssim
+    python -m benchmarks.validate_ssim --sizes 512x512 2160x3840 --repeats 5
+
+Для кожного розміру і вікна (uniform, gaussian) SSIM рушія порівнюється з
+skimage.metrics.structural_similarity (float64, по каналах), MS-SSIM — з незалежною
+реалізацією у float64 на scipy.ndimage (кожен масштаб фільтрується з нуля). Виводяться
+абсолютні відхилення та медіанний час: skimage, рушій без статистик еталону (як у
+потайловому режимі) і з готовими статистиками (як для другого і наступних методів).
+Відхилення понад --tolerance завершує перевірку з кодом 1.
+"""
+import argparse
+import numpy as np
+import cv2
+from scipy import ndimage
+from skimage.metrics import structural_similarity
+from core.ssim import (SSIMReference, MS_SSIM_WEIGHTS, MS_SSIM_SCALES, GAUSSIAN_SIGMA, SSIM_K1, SSIM_K2,
+                       DATA_RANGE, window_radius, pyramid_scales)
+from benchmarks.bench_biquadratic import synthetic_image, measure, parse_size
+
+# Допустиме абсолютне відхилення SSIM і MS-SSIM
+TOLERANCE = 1e-5
+
+
+def degraded(image: np.ndarray) -> np.ndarray:
+    """Зображення, схоже на результат методу: зменшене і збільшене назад, з шумом."""
+    height, width = image.shape[:2]
+    reduced = cv2.resize(image, (width // 2, height // 2), interpolation=cv2.INTER_AREA)
+    restored = cv2.resize(reduced, (width, height), interpolation=cv2.INTER_LINEAR).astype(np.int16)
+    noise = np.random.default_rng(1).integers(-3, 4, image.shape, dtype=np.int16)
+    return np.clip(restored + noise, 0, 255).astype(np.uint8)
+
+
+def skimage_ssim(reference: np.ndarray, upscaled: np.ndarray, window: str) -> float:
+    gaussian = window == "gaussian"
+    return structural_similarity(reference, upscaled, data_range=DATA_RANGE, channel_axis=2,
+                                 gaussian_weights=gaussian, use_sample_covariance=not gaussian)
+
+
+def reference_ms_ssim(reference: np.ndarray, upscaled: np.ndarray) -> float:
+    """MS-SSIM у float64 з гаусовим вікном, кожен масштаб і канал — окремо (еталон для перевірки)."""
+    c1, c2 = (SSIM_K1 * DATA_RANGE) ** 2, (SSIM_K2 * DATA_RANGE) ** 2
+    pad = window_radius("gaussian")
+    scales = pyramid_scales(reference.shape[0], reference.shape[1], "gaussian", MS_SSIM_SCALES)
+    weights = np.asarray(MS_SSIM_WEIGHTS[:scales]) / sum(MS_SSIM_WEIGHTS[:scales])
+
+    def blur(image):
+        return ndimage.gaussian_filter(image, GAUSSIAN_SIGMA, truncate=3.5, mode="reflect")
+
+    def half(image):
+        height, width = image.shape[0] // 2 * 2, image.shape[1] // 2 * 2
+        return image[:height, :width].reshape(height // 2, 2, width // 2, 2).mean(axis=(1, 3))
+
+    x = [reference[..., channel].astype(np.float64) for channel in range(reference.shape[2])]
+    y = [upscaled[..., channel].astype(np.float64) for channel in range(upscaled.shape[2])]
+    result = 1.0
+    for scale in range(scales):
+        if scale:
+            x, y = [half(channel) for channel in x], [half(channel) for channel in y]
+        # Середнє по каналах у кожному масштабі (як channel_axis у skimage)
+        means = []
+        for xc, yc in zip(x, y):
+            ux, uy = blur(xc), blur(yc)
+            vx, vy, vxy = blur(xc * xc) - ux * ux, blur(yc * yc) - uy * uy, blur(xc * yc) - ux * uy
+            value = (2 * vxy + c2) / (vx + vy + c2)
+            if scale == scales - 1:
+                value = value * (2 * ux * uy + c1) / (ux * ux + uy * uy + c1)
+            means.append(value[pad:value.shape[0] - pad, pad:value.shape[1] - pad].mean())
+        result *= max(float(np.mean(means)), 0.0) ** weights[scale]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перевірка і бенчмарк рушія SSIM")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[(64, 80), (512, 768), (1080, 1920)],
+                        help="Розміри зображення у форматі ВИСОТАxШИРИНА")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    print(f"{'Розмір':>12} {'вікно':>9} {'відх. SSIM':>11} {'skimage, с':>11} {'рушій, с':>9} "
+          f"{'з кешем, с':>11} {'приск.':>7}")
+    failed = False
+    for height, width in args.sizes:
+        reference = synthetic_image(height, width)
+        upscaled = degraded(reference)
+        for window in ("uniform", "gaussian"):
+            skimage_time, expected = measure(lambda: skimage_ssim(reference, upscaled, window), args.repeats)
+            full_time, actual = measure(lambda: SSIMReference(reference, window).ssim(upscaled), args.repeats)
+            cached = SSIMReference(reference, window)
+            cached_time, _ = measure(lambda: cached.ssim(upscaled), args.repeats)
+            deviation = abs(actual - expected)
+            failed |= deviation > args.tolerance
+            print(f"{height:>5}x{width:<6} {window:>9} {deviation:>11.2e} {skimage_time:>11.4f} {full_time:>9.4f} "
+                  f"{cached_time:>11.4f} {skimage_time / cached_time:>6.1f}x")
+
+        ms_time, (_, actual) = measure(
+            lambda: SSIMReference(reference, "gaussian", MS_SSIM_SCALES).evaluate(upscaled), args.repeats)
+        deviation = abs(actual - reference_ms_ssim(reference, upscaled))
+        failed |= deviation > args.tolerance
+        print(f"{height:>5}x{width:<6} {'MS-SSIM':>9} {deviation:>11.2e} {'':>11} {ms_time:>9.4f}")
+
+    if failed:
+        raise SystemExit(f"Відхилення перевищує допуск {args.tolerance:g}")
+
+
+if __name__ == "__main__":
+    main()
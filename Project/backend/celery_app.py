@@ -1,237 +1,634 @@
 import os
-import time
-import base64
 import logging
-from io import BytesIO
 import numpy as np
-import cv2
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from skimage.metrics import structural_similarity as ssim
-from skimage.metrics import peak_signal_noise_ratio as psnr
-from celery import Celery
-from scipy.interpolate import RectBivariateSpline
+from celery import chord, group
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import task_postrun, task_revoked, worker_process_init, worker_ready
+from config import PARALLEL_METHODS, TILED_MIN_PIXELS, TILE_ROWS, WORKER_WARMUP
+from core.task_queue import (celery_app, sweep_key, PROCESS_ALL_METHODS, PROCESS_METHOD, MERGE_METHOD_RESULTS,
+                             MERGE_FAILED, PROCESS_BATCH, WARMUP)
+from core.methods import INTERPOLATION_METHODS, get_method, resolve_methods
+from core.interpolation import check_opencv_build
+from core.metrics import ReferenceAnalysis, compute_metrics
+from core.artifacts import save_artifact
+from core.encoding import submit_artifact, collect_artifacts, encoding_stats, encode_image
+from core.profiles import ENCODING_PROFILES, resolve_profiles
+from core.progress import publish_event, TERMINAL_STATES
+from core.result_cache import store_result, release_inflight
+from core.admission import release_work
+from core.cancellation import CancelToken, TaskCancelled, cleanup_options, revoked_resources
+from core.uploads import read_upload, discard_upload, check_png_header, PNG_HEADER_SIZE
+from core.memory import MemoryReservation, reserve_memory
+from core.timing import StageTimer
+from core.metrics_store import record_many_metrics
+from core.pipeline import (image_bytes, decode_image_bytes, reduce_image, process_method,
+                           persist_method_result, metrics_record)
 
 logger = logging.getLogger(__name__)
 
-celery_app = Celery(
-    'tasks',
-    broker='redis://localhost:6379/0',
-    backend='redis://localhost:6379/0'
-)
-
-celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
-    timezone='UTC',
-    enable_utc=True,
-)
-
-# Визначення методів інтерполяції
-def bilinear_interpolation(image: np.ndarray, scale_factor: float) -> np.ndarray:
-    new_height = int(image.shape[0] * scale_factor)
-    new_width = int(image.shape[1] * scale_factor)
-    return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-
-def bicubic_interpolation(image: np.ndarray, scale_factor: float) -> np.ndarray:
-    new_height = int(image.shape[0] * scale_factor)
-    new_width = int(image.shape[1] * scale_factor)
-    return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-
-def biquadratic_interpolation(image: np.ndarray, scale_factor: float) -> np.ndarray:
+def _select_tile_rows(width: int, height: int, tiled: bool = None):
+    """Висота смуги для потайлового режиму або None (обробка цілим зображенням)."""
+    if tiled is None:
+        tiled = width * height >= TILED_MIN_PIXELS
+    return TILE_ROWS if tiled else None
+
+def _reserve_memory(task_id: str, original_bytes: bytes, methods: int, tiled: bool = None,
+                    overlap: int = 1) -> MemoryReservation:
+    """
+    Резервує бюджет пам'яті воркера за розмірами з заголовка PNG (до декодування).
+
+    Якщо режим не задано явно (tiled=None), під час нестачі бюджету завдання переходить
+    на потайловий режим — вибраний режим у reservation.tile_rows.
+    """
+    width, height = check_png_header(original_bytes[:PNG_HEADER_SIZE])
+    return reserve_memory(celery_app.backend.client, task_id, width, height, methods,
+                          _select_tile_rows(width, height, tiled), allow_tiled=tiled is None, overlap=overlap)
+
+def _with_encoding_stats(response: dict) -> dict:
+    """Додає до відповіді сумарні розмір і час кодування артефактів за профілями."""
+    # Розгортка за коефіцієнтами містить свої зменшене зображення і результати для кожного
+    sections = response["sweep"].values() if "sweep" in response else [response]
+    artifacts = []
+    for section in sections:
+        artifacts.append(section["reduced_image"])
+        for result in section["results"].values():
+            artifacts += [result["upscaled_image"], result["diff_image"]]
+    stats = encoding_stats(artifacts)
+    for profile, profile_stats in stats.items():
+        logger.info(f"Профіль {profile}: {profile_stats['artifacts']} файлів, {profile_stats['bytes']} байт, "
+                    f"{profile_stats['encode_time']:.3f} сек")
+    return {**response, "encoding": stats}
+
+def _update_progress(task, meta: dict, task_id: str = None) -> None:
+    """Зберігає прогрес у бекенді (для опитування) і публікує його підписникам (core/progress.py)."""
+    # Синхронне виконання (apply, core/inline.py): результат повертається одразу, прогрес нікому не потрібен
+    if task.request.is_eager:
+        return
+    task_id = task_id or task.request.id
+    task.update_state(task_id=task_id, state='PROGRESS', meta=meta)
+    publish_event(celery_app.backend.client, task_id, {"status": "PROGRESS", **meta})
+
+@task_postrun.connect
+def _publish_task_done(sender=None, task_id=None, state=None, **kwargs):
+    """
+    Сповіщає підписників про завершення завдання, коли результат уже збережено, і видаляє
+    його з реєстру незавершеної роботи (core/admission.py).
+
+    У паралельному режимі завдання замінюється chord-ом, тож завершує його
+    merge_method_results з тим самим task_id.
+    """
+    if sender in (process_all_methods, merge_method_results, process_batch) and state in TERMINAL_STATES:
+        release_work(celery_app.backend.client, task_id)
+        publish_event(celery_app.backend.client, task_id, {"status": state})
+
+def _release_task(task_id: str, cache_key: str, uploads: list, state: str) -> None:
+    """
+    Звільняє ресурси завдання, код якого не завершився сам (відкликане або з аварійною
+    підзадачею): ключ кешу, завантажені файли і запис у реєстрі незавершеної роботи;
+    підписники отримують state.
+    """
+    client = celery_app.backend.client
+    if cache_key:
+        release_inflight(client, cache_key, task_id)
+    for path in uploads:
+        discard_upload(path)
+    release_work(client, task_id)
+    publish_event(client, task_id, {"status": state})
+
+@task_revoked.connect
+def _release_revoked(sender=None, request=None, **kwargs):
+    """
+    Звільняє ресурси завдання, відкликаного до початку (DELETE /task/{task_id}).
+    У паралельному режимі task_id після заміни chord-ом належить merge_method_results.
+    """
+    if sender not in (process_all_methods, merge_method_results, process_batch) or request is None:
+        return
+    cache_key, uploads = revoked_resources(request)
+    _release_task(request.id, cache_key, uploads, "REVOKED")
+
+def _finish(task_id: str, response: dict, cache_key: str = None) -> dict:
+    """Кешує успішну відповідь і звільняє ключ кешу, зайнятий завданням (core/result_cache.py)."""
+    if cache_key:
+        client = celery_app.backend.client
+        if response.get("status") == "success":
+            store_result(client, cache_key, response)
+        release_inflight(client, cache_key, task_id)
+    return response
+
+def _report_method_done(task, parent_task_id: str, method_name: str, total_methods: int) -> None:
+    """Оновлює прогрес батьківського завдання після завершення одного методу (паралельний режим)."""
+    key = f"upscaler:progress:{parent_task_id}"
     try:
-        height, width, channels = image.shape
-        if channels != 3:
-            raise ValueError("Зображення має містити 3 канали (RGB/BGR)")
-        if image.dtype != np.uint8:
-            raise ValueError("Тип даних зображення має бути uint8")
-
-        target_height = int(height * scale_factor)
-        target_width = int(width * scale_factor)
-        
-        x = np.arange(width)
-        y = np.arange(height)
-        x_new = np.linspace(0, width - 1, target_width)
-        y_new = np.linspace(0, height - 1, target_height)
-        
-        upscaled = np.zeros((target_height, target_width, channels), dtype=np.float32)
-        for channel in range(channels):
-            spline = RectBivariateSpline(y, x, image[:, :, channel], kx=2, ky=2)
-            upscaled[:, :, channel] = spline(y_new, x_new)
-        
-        upscaled = np.clip(upscaled, 0, 255).astype(np.uint8)
-        logger.info(f"Біквадратна інтерполяція: {width}x{height} -> {target_width}x{target_height}")
-        return upscaled
+        client = celery_app.backend.client
+        completed = client.incr(key)
+        client.expire(key, 3600)
     except Exception as e:
-        logger.error(f"Помилка в інтерполяції: {str(e)}")
-        raise
-
-# Словник методів інтерполяції
-INTERPOLATION_METHODS = {
-    "Білінійна": bilinear_interpolation,
-    "Бікубічна": bicubic_interpolation,
-    "Біквадратична": biquadratic_interpolation,
-}
-
-@celery_app.task(bind=True)
-def process_all_methods(self, image_base64: str, scale_factor: float):
+        logger.warning(f"Не вдалося оновити лічильник прогресу {key}: {str(e)}")
+        return
+    progress = min(completed / total_methods, 1.0) * 100
+    _update_progress(task, {'progress': progress, 'method': method_name}, parent_task_id)
+    logger.info(f"Завершено {method_name}, прогрес: {progress:.1f}%")
+
+def _load_original(task_id: str, original_bytes: bytes, timer: StageTimer):
+    """Декодує оригінал і зберігає його як є (PNG уже перевірено API)."""
+    with timer.span("decode"):
+        original_image = decode_image_bytes(original_bytes)
+    with timer.span("store.original"):
+        original_artifact = save_artifact(task_id, "original.png", original_bytes, original_image)
+
+    # Логування діапазону значень оригінального зображення
+    logger.info(f"Діапазон значень original_image: {original_image.min()} - {original_image.max()}")
+    return original_image, original_artifact
+
+def _reduce(task_id: str, original_image: np.ndarray, scale_factor: float, profiles: dict, timer: StageTimer):
+    """Зменшує оригінал і ставить кодування зменшеного зображення у фон, поки працюють методи."""
+    # Зменшення зображення методом найближчого сусіда
+    with timer.span("downscale"):
+        reduced_image, reduced_width, reduced_height = reduce_image(original_image, scale_factor)
+    logger.info(f"Зменшене зображення: {reduced_width}x{reduced_height}")
+    logger.info(f"Діапазон значень reduced_image: {reduced_image.min()} - {reduced_image.max()}")
+    return reduced_image, submit_artifact(task_id, "reduced", reduced_image, profiles["reduced"])
+
+def _prepare_image(task_id: str, original_bytes: bytes, scale_factor: float, profiles: dict, timer: StageTimer):
+    """
+    Спільна підготовка зображення: декодування, збереження оригіналу, зменшення і
+    фонове кодування зменшеного зображення.
+
+    Returns:
+        tuple: (оригінал, опис артефакту оригіналу, зменшене зображення, Future артефакту зменшеного).
+    """
+    original_image, original_artifact = _load_original(task_id, original_bytes, timer)
+    reduced_image, reduced_artifact = _reduce(task_id, original_image, scale_factor, profiles, timer)
+    return original_image, original_artifact, reduced_image, reduced_artifact
+
+def _run_methods(task_id: str, methods: list, reference_image: np.ndarray, reduced_image: np.ndarray,
+                 scale_factor: float, tile_rows, profiles: dict, timer: StageTimer, on_method,
+                 reference_analysis: ReferenceAnalysis = None, cancel: CancelToken = None) -> dict:
+    """
+    Послідовно обробляє зображення методами methods (InterpolationMethod) в поточному процесі.
+
+    on_method(idx, method_name) викликається перед кожним методом (для прогресу).
+    reference_analysis можна передати готовим (розгортка за коефіцієнтами), інакше він
+    будується тут. Артефакти в результатах — ще Future (див. collect_artifacts). cancel
+    перевіряється й усередині методу, між інтерполяцією і метриками.
+    """
+    # Аналіз еталону (градієнти, статистики SSIM) — один раз для всіх методів
+    if reference_analysis is None and not tile_rows:
+        with timer.span("metrics.reference"):
+            reference_analysis = ReferenceAnalysis(reference_image)
+    results = {}
+    for idx, method in enumerate(methods):
+        on_method(idx, method.name)
+        results[method.name] = process_method(method.name, method.select_func(reduced_image, scale_factor, tile_rows),
+                                              reduced_image, reference_image, scale_factor, task_id,
+                                              tile_rows, reference_analysis, profiles,
+                                              check_cancelled=cancel.check if cancel else None)
+    return results
+
+def _image_summary(original_artifact: dict, reduced_artifact, reduced_image: np.ndarray, timer: StageTimer) -> dict:
+    """Відповідь без результатів методів: лише URL і розміри артефактів (зображення — у сховищі)."""
+    reduced_entry = reduced_artifact.result()
+    if reduced_entry:
+        timer.record("encode.reduced", reduced_entry["encode_time"])
+    return {
+        "status": "success",
+        "original_image": original_artifact,
+        "reduced_image": reduced_entry,
+        "reduced_dimensions": [reduced_image.shape[1], reduced_image.shape[0]],
+        "stages": timer.as_dict()
+    }
+
+def _process_sweep(task, task_id: str, methods: list, original_image: np.ndarray, scale_factors: list,
+                   profiles: dict, tile_rows, timer: StageTimer, cancel: CancelToken) -> dict:
+    """
+    Розгортка за коефіцієнтами масштабування: усі методи для кожного коефіцієнта.
+
+    Оригінал уже декодовано і збережено, аналіз еталону (градієнти, статистики SSIM)
+    будується один раз — еталон для всіх коефіцієнтів той самий. Для кожного коефіцієнта
+    окремі лише зменшення, методи і кодування; артефакти і метрики — під task_id-x<коефіцієнт>.
+
+    Returns:
+        dict: {"scale_factors", "sweep": {коефіцієнт: {"scale_factor", "reduced_image",
+        "reduced_dimensions", "stages", "results": {метод: ...}}}}.
+    """
+    with timer.span("metrics.reference"):
+        reference_analysis = None if tile_rows else ReferenceAnalysis(original_image)
+    total_steps = len(scale_factors) * len(methods)
+    sweep = {}
+
+    def collect(pending: dict) -> None:
+        results = {method_name: persist_method_result(pending["id"], method_name, collect_artifacts(result),
+                                                      original_image.shape[1], original_image.shape[0],
+                                                      pending["scale_factor"])
+                   for method_name, result in pending["results"].items()}
+        summary = _image_summary(None, pending["reduced_artifact"], pending["reduced_image"], pending["timer"])
+        sweep[pending["key"]] = {"scale_factor": pending["scale_factor"], "reduced_image": summary["reduced_image"],
+                                 "reduced_dimensions": summary["reduced_dimensions"], "stages": summary["stages"],
+                                 "results": results}
+
+    pending = None
+    for factor_idx, scale_factor in enumerate(scale_factors):
+        key = sweep_key(scale_factor)
+        factor_id = f"{task_id}-x{key}"
+        factor_timer = StageTimer()
+        reduced_image, reduced_artifact = _reduce(factor_id, original_image, scale_factor, profiles, factor_timer)
+
+        def on_method(idx, method_name):
+            cancel.check()
+            progress = (factor_idx * len(methods) + idx) / total_steps * 100
+            _update_progress(task, {'progress': progress, 'method': method_name, 'scale_factor': scale_factor})
+            logger.info(f"Обробка {method_name} (x{key}), прогрес: {progress:.1f}%")
+
+        results = _run_methods(factor_id, methods, original_image, reduced_image, scale_factor, tile_rows, profiles,
+                               factor_timer, on_method, reference_analysis, cancel)
+        # Кодування попереднього коефіцієнта перекривалися з обробкою поточного;
+        # у пам'яті одночасно зображення не більше ніж двох коефіцієнтів
+        if pending:
+            collect(pending)
+        pending = {"key": key, "id": factor_id, "scale_factor": scale_factor, "results": results,
+                   "reduced_image": reduced_image, "reduced_artifact": reduced_artifact, "timer": factor_timer}
+    collect(pending)
+    return {"scale_factors": list(scale_factors), "sweep": sweep}
+
+def _delivery_options(task) -> dict:
+    """Черга, пріоритет і ліміти часу, з якими отримано завдання (порожньо в синхронному режимі)."""
+    delivery_info = task.request.delivery_info or {}
+    options = {}
+    if delivery_info.get("routing_key"):
+        options["queue"] = delivery_info["routing_key"]
+    if delivery_info.get("priority") is not None:
+        options["priority"] = delivery_info["priority"]
+    time_limit, soft_time_limit = task.request.timelimit or (None, None)
+    if time_limit:
+        options["time_limit"] = time_limit
+    if soft_time_limit:
+        options["soft_time_limit"] = soft_time_limit
+    return options
+
+
+def _cancel_token(task, task_id: str = None) -> CancelToken:
+    """Перевірка скасування завдання task_id (за замовчуванням — поточного) з м'яким лімітом часу task."""
+    _, soft_time_limit = task.request.timelimit or (None, None)
+    return CancelToken(celery_app.backend.client, task_id or task.request.id, soft_time_limit)
+
+
+def _cancelled(task_id: str, error: Exception) -> dict:
+    """Відповідь скасованого завдання (TaskCancelled або SoftTimeLimitExceeded prefork-пулу)."""
+    reason = str(error) or "Перевищено ліміт часу завдання"
+    logger.info(f"Завдання {task_id} зупинено: {reason}")
+    return {"status": "cancelled", "error": reason}
+
+
+@celery_app.task(bind=True, name=PROCESS_ALL_METHODS)
+def process_all_methods(self, image_base64: str, scale_factor, parallel: bool = None, tiled: bool = None,
+                        encoding: dict = None, image_path: str = None, cache_key: str = None, methods=None):
+    """
+    Обробляє зображення методами інтерполяції: усіма або вибраними methods (ключі реєстру
+    core/interpolation.py, див. resolve_methods).
+
+    Зображення передається або як base64 (image_base64, POST /upscale_all_methods/), або як
+    шлях до файлу, завантаженого через POST /upload/ (image_path); такий файл видаляється
+    після обробки. cache_key — ключ кешу результатів, зайнятий цим завданням в API.
+
+    Якщо scale_factor — список, виконується розгортка за коефіцієнтами (_process_sweep)
+    в одному процесі, незалежно від parallel: декодування оригіналу та аналіз еталону
+    спільні для всіх коефіцієнтів.
+
+    Скасування (DELETE /task/{task_id}) і м'який ліміт часу перевіряються між етапами і
+    методами (core/cancellation.py); тоді відповідь — {"status": "cancelled", "error"}.
+    """
+    if parallel is None:
+        parallel = PARALLEL_METHODS
     try:
         task_id = self.request.id
-        results_dir = os.path.join("static", "results", task_id)
-        os.makedirs(results_dir, exist_ok=True)
-        logger.info(f"Створено директорію: {results_dir}")
-
-        # Декодування зображення
-        if ',' in image_base64:
-            image_base64 = image_base64.split(',')[1]
-        image_bytes = base64.b64decode(image_base64)
-        np_arr = np.frombuffer(image_bytes, np.uint8)
-        original_image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-        if original_image is None:
-            raise ValueError("Не вдалося декодувати зображення")
-
-        # Логування діапазону значень оригінального зображення
-        logger.info(f"Діапазон значень original_image: {original_image.min()} - {original_image.max()}")
-
-        # Зменшення зображення методом найближчого сусіда
-        reduction_factor = 1 / scale_factor
-        reduced_height = int(original_image.shape[0] * reduction_factor)
-        reduced_width = int(original_image.shape[1] * reduction_factor)
-
-        # Перевірка мінімального розміру для зменшеного зображення
-        min_size = 8
-        if reduced_height < min_size or reduced_width < min_size:
-            reduced_height = max(min_size, reduced_height)
-            reduced_width = max(min_size, reduced_width)
-            logger.warning(f"Розмір зменшеного зображення скориговано до {reduced_width}x{reduced_height}, щоб уникнути помилок у інтерполяції.")
-
-        reduced_image = cv2.resize(original_image, (reduced_width, reduced_height), interpolation=cv2.INTER_NEAREST)
-        logger.info(f"Зменшене зображення: {reduced_width}x{reduced_height}")
-        logger.info(f"Діапазон значень reduced_image: {reduced_image.min()} - {reduced_image.max()}")
-
-        # Кодування зменшеного зображення у base64 (PNG)
-        _, buffer = cv2.imencode('.png', reduced_image, [cv2.IMWRITE_PNG_COMPRESSION, 9])
-        reduced_base64 = f"data:image/png;base64,{base64.b64encode(buffer).decode('utf-8')}"
-
-        # Еталонне зображення — оригінал
-        reference_image = original_image
-
-        results = {}
-        total_methods = len(INTERPOLATION_METHODS)
-        for idx, (method_name, interpolation_func) in enumerate(INTERPOLATION_METHODS.items()):
-            progress = (idx / total_methods) * 100
-            self.update_state(state='PROGRESS', meta={'progress': progress})
-            logger.info(f"Обробка {method_name}, прогрес: {progress:.1f}%")
-
-            start_time = time.time()
-
-            # Збільшення зменшеного зображення назад до оригінального розміру
-            upscaled_image = interpolation_func(reduced_image, scale_factor)
-            if upscaled_image.shape[:2] != reference_image.shape[:2]:
-                upscaled_image = cv2.resize(upscaled_image, (reference_image.shape[1], reference_image.shape[0]), interpolation=cv2.INTER_CUBIC)
-            
-            logger.info(f"Діапазон значень upscaled_image ({method_name}): {upscaled_image.min()} - {upscaled_image.max()}")
-
-            # Обчислення різниці
-            diff_image = cv2.absdiff(reference_image, upscaled_image)
-            diff_image = cv2.convertScaleAbs(diff_image, alpha=5, beta=0)
-
-            # Обчислення гістограми помилок
-            error = np.abs(reference_image.astype(np.float32) - upscaled_image.astype(np.float32)).ravel()
-            plt.figure()
-            plt.hist(error, bins=50, color='red', alpha=0.7)
-            plt.title(f'Гістограма помилок - {method_name}')
-            plt.xlabel('Помилка')
-            plt.ylabel('Частота')
-            buf = BytesIO()
-            plt.savefig(buf, format='png')
-            buf.seek(0)
-            hist_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-            plt.close()
-
-            # Обчислення градієнтів
-            grad_x_ref = cv2.Sobel(reference_image, cv2.CV_64F, 1, 0, ksize=3)
-            grad_y_ref = cv2.Sobel(reference_image, cv2.CV_64F, 0, 1, ksize=3)
-            grad_magnitude_ref = np.sqrt(grad_x_ref**2 + grad_y_ref**2)
-
-            grad_x = cv2.Sobel(upscaled_image, cv2.CV_64F, 1, 0, ksize=3)
-            grad_y = cv2.Sobel(upscaled_image, cv2.CV_64F, 0, 1, ksize=3)
-            grad_magnitude = np.sqrt(grad_x**2 + grad_y**2)
-            grad_diff = float(np.mean(np.abs(grad_magnitude_ref - grad_magnitude)))
-
-            # Обчислення метрик
-            psnr_value = psnr(reference_image, upscaled_image, data_range=255)
-            ssim_value = ssim(reference_image, upscaled_image, data_range=255, channel_axis=2)
-            mse_value = np.mean((reference_image.astype(np.float32) - upscaled_image.astype(np.float32)) ** 2)
-
-            logger.info(f"{method_name}: PSNR = {psnr_value:.2f}, SSIM = {ssim_value:.4f}, MSE = {mse_value:.2f}")
-
-            # Кодування зображень у base64 (PNG)
-            _, buffer = cv2.imencode('.png', upscaled_image, [cv2.IMWRITE_PNG_COMPRESSION, 9])
-            upscaled_base64 = f"data:image/png;base64,{base64.b64encode(buffer).decode('utf-8')}"
-
-            _, buffer = cv2.imencode('.png', diff_image, [cv2.IMWRITE_PNG_COMPRESSION, 9])
-            diff_base64 = f"data:image/png;base64,{base64.b64encode(buffer).decode('utf-8')}"
-
-            end_time = time.time()
-            processing_time = end_time - start_time
-            logger.info(f"{method_name} час обробки: {processing_time:.2f} сек")
-
-            # Збереження часу обробки, MSE, SSIM і PSNR у файли
-            times_file = os.path.join(results_dir, "times.txt")
-            mse_file = os.path.join(results_dir, "mse.txt")
-            ssim_file = os.path.join(results_dir, "ssim.txt")
-            psnr_file = os.path.join(results_dir, "psnr.txt")
-
-            try:
-                with open(times_file, "a") as f:
-                    f.write(f"{method_name}: {processing_time:.2f}\n")
-                logger.info(f"Збережено час для {method_name} у {times_file}")
-
-                with open(mse_file, "a") as f:
-                    f.write(f"{method_name}: {mse_value:.2f}\n")
-                logger.info(f"Збережено MSE для {method_name} у {mse_file}")
-
-                with open(ssim_file, "a") as f:
-                    f.write(f"{method_name}: {ssim_value:.4f}\n")
-                logger.info(f"Збережено SSIM для {method_name} у {ssim_file}")
-
-                with open(psnr_file, "a") as f:
-                    f.write(f"{method_name}: {psnr_value:.2f}\n")
-                logger.info(f"Збережено PSNR для {method_name} у {psnr_file}")
-            except Exception as e:
-                logger.error(f"Помилка при збереженні файлів для {method_name}: {str(e)}")
-                raise
-
-            results[method_name] = {
-                "upscaled_image_base64": upscaled_base64,
-                "diff_image_base64": diff_base64,
-                "hist_base64": f"data:image/png;base64,{hist_base64}",
-                "upscaled_shape": [upscaled_image.shape[1], upscaled_image.shape[0]],
-                "psnr": float(psnr_value) if not np.isinf(psnr_value) else "infinity",
-                "ssim": float(ssim_value),
-                "mse": float(mse_value),
-                "gradient_diff": grad_diff,
-                "processing_time": processing_time
-            }
-
-        self.update_state(state='PROGRESS', meta={'progress': 100})
-        logger.info("Обробка завершена, прогрес: 100%")
-
-        # Зберігаємо оригінал як PNG
-        _, buffer = cv2.imencode('.png', original_image, [cv2.IMWRITE_PNG_COMPRESSION, 9])
-        original_base64 = f"data:image/png;base64,{base64.b64encode(buffer).decode('utf-8')}"
-
-        return {
-            "status": "success",
-            "results": results,
-            "original_image_url": f"/static/results/{task_id}/original.png",
-            "original_image_base64": original_base64,
-            "reduced_image_base64": reduced_base64,
-            "reduced_dimensions": [reduced_width, reduced_height]
-        }
+        cancel = _cancel_token(self)
+        cancel.check()
+        profiles = resolve_profiles(encoding)
+        methods = resolve_methods(methods)
+        timer = StageTimer()
+
+        # Декодування зображення; оригінал зберігається як є (PNG уже перевірено API)
+        with timer.span("decode"):
+            original_bytes = read_upload(image_path) if image_path else image_bytes(image_base64)
+
+        if isinstance(scale_factor, (list, tuple)):
+            # Кодування попереднього коефіцієнта перекривається з обробкою наступного
+            with _reserve_memory(task_id, original_bytes, len(methods), tiled,
+                                 overlap=min(len(scale_factor), 2)) as memory:
+                original_image, original_artifact = _load_original(task_id, original_bytes, timer)
+                response = _process_sweep(self, task_id, methods, original_image, scale_factor, profiles,
+                                          memory.tile_rows, timer, cancel)
+            response["memory"] = memory.report()
+            _update_progress(self, {'progress': 100})
+            logger.info("Розгортка завершена, прогрес: 100%")
+            discard_upload(image_path)
+            return _finish(task_id, _with_encoding_stats({"status": "success", "original_image": original_artifact,
+                                                          **response, "stages": timer.as_dict()}), cache_key)
+
+        if parallel:
+            # Пам'ять резервує кожна підзадача методу
+            original_image, original_artifact, reduced_image, reduced_artifact = _prepare_image(
+                task_id, original_bytes, scale_factor, profiles, timer)
+            tile_rows = _select_tile_rows(original_image.shape[1], original_image.shape[0], tiled)
+            cancel.check()
+        else:
+            total_methods = len(methods)
+
+            def on_method(idx, method_name):
+                cancel.check()
+                progress = (idx / total_methods) * 100
+                _update_progress(self, {'progress': progress, 'method': method_name})
+                logger.info(f"Обробка {method_name}, прогрес: {progress:.1f}%")
+
+            with _reserve_memory(task_id, original_bytes, total_methods, tiled) as memory:
+                original_image, original_artifact, reduced_image, reduced_artifact = _prepare_image(
+                    task_id, original_bytes, scale_factor, profiles, timer)
+                # Еталонне зображення — оригінал
+                reference_image = original_image
+                tile_rows = memory.tile_rows
+                if tile_rows:
+                    logger.info(f"Потайловий режим: смуги по {tile_rows} рядків")
+
+                results = _run_methods(task_id, methods, reference_image, reduced_image, scale_factor, tile_rows,
+                                       profiles, timer, on_method, cancel=cancel)
+
+                # Очікування фонових кодувань і збереження метрик
+                results = {method_name: persist_method_result(task_id, method_name, collect_artifacts(result),
+                                                              reference_image.shape[1], reference_image.shape[0],
+                                                              scale_factor)
+                           for method_name, result in results.items()}
+            _update_progress(self, {'progress': 100})
+            logger.info("Обробка завершена, прогрес: 100%")
+
+        summary = _image_summary(original_artifact, reduced_artifact, reduced_image, timer)
+        if not parallel:
+            discard_upload(image_path)
+            return _finish(task_id, _with_encoding_stats({**summary, "results": results, "memory": memory.report()}),
+                           cache_key)
+    except (TaskCancelled, SoftTimeLimitExceeded) as e:
+        discard_upload(image_path)
+        return _finish(self.request.id, _cancelled(self.request.id, e), cache_key)
     except Exception as e:
         logger.error(f"Помилка обробки всіх методів: {str(e)}")
-        return {"status": "error", "error": str(e)}
\ No newline at end of file
+        discard_upload(image_path)
+        return _finish(self.request.id, {"status": "error", "error": str(e)}, cache_key)
+
+    # Паралельний режим: кожен метод — окрема підзадача, результати збирає merge_method_results.
+    # Завдання замінюється chord-ом, тож підсумковий результат зберігається під тим самим task_id.
+    _update_progress(self, {'progress': 0})
+    logger.info(f"Запуск {len(methods)} методів паралельно для {task_id}")
+    # Підзадачі — у тій самій черзі й з тим самим пріоритетом (клас навантаження, core/routing.py)
+    options = _delivery_options(self)
+    header = group(
+        process_method_task.s(image_base64, scale_factor, method.key, task_id, tile_rows, profiles, image_path,
+                              len(methods)).set(**options)
+        for method in methods
+    )
+    # Якщо підзадача завершиться аварійно, merge не виконається — ресурси звільняє merge_failed
+    merge = merge_method_results.s(summary, image_path=image_path, cache_key=cache_key).set(
+        **options, **cleanup_options(cache_key, [image_path]), link_error=[merge_failed.s()])
+    return self.replace(chord(header, merge))
+
+@celery_app.task(bind=True, name=PROCESS_METHOD)
+def process_method_task(self, image_base64: str, scale_factor: float, method_key: str, parent_task_id: str,
+                        tile_rows: int = None, profiles: dict = None, image_path: str = None, total_methods: int = None):
+    """Підзадача паралельного режиму: обробляє один метод інтерполяції (ключ реєстру)."""
+    method_name = method_key
+    total_methods = total_methods or len(INTERPOLATION_METHODS)
+    try:
+        method = get_method(method_key)
+        method_name = method.name
+        # Скасування батьківського завдання пропускає ще не розпочаті методи
+        cancel = _cancel_token(self, parent_task_id)
+        cancel.check()
+        # Декодування і зменшення повторюються в кожній підзадачі — їх час входить у етапи методу
+        timer = StageTimer()
+        with timer.span("decode"):
+            original_bytes = read_upload(image_path) if image_path else image_bytes(image_base64)
+        # Підзадачі одного завдання резервують пам'ять окремо (ключ — завдання і метод)
+        width, height = check_png_header(original_bytes[:PNG_HEADER_SIZE])
+        with reserve_memory(celery_app.backend.client, f"{parent_task_id}:{method.key}", width, height, 1,
+                            tile_rows) as memory:
+            with timer.span("decode"):
+                reference_image = decode_image_bytes(original_bytes)
+            with timer.span("downscale"):
+                reduced_image, _, _ = reduce_image(reference_image, scale_factor)
+            tile_rows = memory.tile_rows
+            result = collect_artifacts(process_method(method_name, method.select_func(reduced_image, scale_factor,
+                                                                                      tile_rows),
+                                                      reduced_image, reference_image, scale_factor, parent_task_id,
+                                                      tile_rows, profiles=profiles, timer=timer,
+                                                      check_cancelled=cancel.check))
+        result = persist_method_result(parent_task_id, method_name, {**result, "memory": memory.report()},
+                                       reference_image.shape[1], reference_image.shape[0], scale_factor)
+    except (TaskCancelled, SoftTimeLimitExceeded) as e:
+        # Скасований метод не просуває прогрес: клієнт не побачить 100% перед скасуванням
+        return {"method": method_name, "result": {**_cancelled(parent_task_id, e), "cancelled": True}}
+    except Exception as e:
+        logger.error(f"Помилка обробки методу {method_name}: {str(e)}")
+        result = {"error": str(e)}
+    _report_method_done(self, parent_task_id, method_name, total_methods)
+    return {"method": method_name, "result": result}
+
+@celery_app.task(bind=True, name=MERGE_METHOD_RESULTS)
+def merge_method_results(self, method_results: list, summary: dict, image_path: str = None, cache_key: str = None):
+    """Зводить результати підзадач у формат відповіді process_all_methods (task_id — батьківського завдання)."""
+    discard_upload(image_path)
+    results = {}
+    for item in method_results:
+        if item["result"].get("cancelled"):
+            return _finish(self.request.id, {"status": "cancelled", "error": item["result"]["error"]}, cache_key)
+        if "error" in item["result"]:
+            return _finish(self.request.id, {"status": "error", "error": f"{item['method']}: {item['result']['error']}"},
+                           cache_key)
+        results[item["method"]] = item["result"]
+    logger.info("Обробка завершена, прогрес: 100%")
+    return _finish(self.request.id, _with_encoding_stats({**summary, "results": results}), cache_key)
+
+@celery_app.task(name=MERGE_FAILED)
+def merge_failed(request, exc, traceback):
+    """
+    Обробник помилки chord-а паралельного режиму: підзадача методу завершилась аварійно
+    (жорсткий ліміт часу, втрата процесу воркера), тож merge_method_results не виконується.
+    request — контекст merge_method_results (task_id і kwargs батьківського завдання).
+    """
+    task_kwargs = request.kwargs or {}
+    logger.error(f"Паралельна обробка {request.id} завершилась аварійно: {str(exc)}")
+    # Стан — до події: підписник після події звіряється з бекендом результатів
+    celery_app.backend.mark_as_failure(request.id, exc)
+    _release_task(request.id, task_kwargs.get("cache_key"), [task_kwargs.get("image_path")], "FAILURE")
+
+def _collect_batch_item(item_id: str, pending: dict, records: list) -> dict:
+    """Чекає кодувань елемента пакета, додає його метрики до records і повертає відповідь елемента."""
+    results = {method_name: collect_artifacts(result) for method_name, result in pending["results"].items()}
+    height, width = pending["shape"]
+    records.extend(metrics_record(item_id, method_name, result, width, height, pending["scale_factor"])
+                   for method_name, result in results.items())
+    return _with_encoding_stats({**pending["summary"], "results": results})
+
+@celery_app.task(bind=True, name=PROCESS_BATCH)
+def process_batch(self, items: list, encoding: dict = None, tiled: bool = None, methods=None):
+    """
+    Обробляє пакет зображень в одному завданні (POST /upscale_batch/).
+
+    Витрати на підготовку розподіляються на весь пакет: один воркер із уже прогрітими
+    OpenCV і планами біквадратичного рушія, спільний пул кодування (кодування елемента
+    перекривається з обробкою наступного), метрики всього пакета записуються однією
+    транзакцією. Прогрес і результат кожного елемента публікуються в канал завдання пакета.
+
+    Args:
+        items (list): [{"scale_factor", "image_base64" або "image_path"}]; файли image_path
+            видаляються після обробки.
+        encoding (dict): Профілі кодування для всіх елементів.
+        methods: Ключі методів інтерполяції (None — усі).
+
+    Returns:
+        dict: {"status", "items", "stages"}; items — відповіді у форматі process_all_methods
+        (помилка одного елемента не зупиняє пакет). Скасований пакет (core/cancellation.py)
+        має status "cancelled", а його необроблені елементи — {"status": "cancelled"}.
+    """
+    batch_id = self.request.id
+    cancel = _cancel_token(self)
+    cancelled = None
+    total_items = len(items)
+    timer = StageTimer()
+    responses = [None] * total_items
+    records = []
+    pending = None
+    # Елемент завершується після того, як почався наступний, тож прогрес не зменшується
+    reported = {'progress': 0.0}
+
+    def report(progress: float, meta: dict) -> None:
+        reported['progress'] = max(reported['progress'], progress)
+        _update_progress(self, {'progress': reported['progress'], **meta})
+
+    def item_done(index: int, response: dict) -> None:
+        responses[index] = response
+        progress = sum(r is not None for r in responses) / total_items * 100
+        report(progress, {'item': index, 'item_status': response["status"], 'item_result': response})
+        logger.info(f"Пакет {batch_id}: елемент {index + 1}/{total_items} ({response['status']})")
+
+    def collect(pending: dict) -> None:
+        index = pending["index"]
+        try:
+            response = _collect_batch_item(f"{batch_id}-{index}", pending, records)
+        except Exception as e:
+            logger.error(f"Помилка кодування елемента {index} пакета {batch_id}: {str(e)}")
+            response = {"status": "error", "error": str(e)}
+        item_done(index, response)
+
+    try:
+        profiles = resolve_profiles(encoding)
+        methods = resolve_methods(methods)
+    except Exception as e:
+        logger.error(f"Помилка обробки пакета: {str(e)}")
+        for item in items:
+            discard_upload(item.get("image_path"))
+        return {"status": "error", "error": str(e)}
+
+    for index, item in enumerate(items):
+        item_id = f"{batch_id}-{index}"
+        scale_factor = item["scale_factor"]
+        current = None
+        try:
+            cancel.check()
+            item_timer = StageTimer()
+            with item_timer.span("decode"):
+                original_bytes = read_upload(item["image_path"]) if item.get("image_path") else image_bytes(item["image_base64"])
+
+            def on_method(idx, method_name, index=index):
+                cancel.check()
+                progress = (index + idx / len(methods)) / total_items * 100
+                report(progress, {'item': index, 'method': method_name})
+
+            # Кодування попереднього елемента ще триває, поки обробляється поточний
+            with _reserve_memory(item_id, original_bytes, len(methods), tiled, overlap=2) as memory:
+                original_image, original_artifact, reduced_image, reduced_artifact = _prepare_image(
+                    item_id, original_bytes, scale_factor, profiles, item_timer)
+                results = _run_methods(item_id, methods, original_image, reduced_image, scale_factor,
+                                       memory.tile_rows, profiles, item_timer, on_method, cancel=cancel)
+            summary = _image_summary(original_artifact, reduced_artifact, reduced_image, item_timer)
+            current = {"index": index, "results": results, "shape": original_image.shape[:2],
+                       "scale_factor": scale_factor, "summary": {**summary, "memory": memory.report()}}
+        except (TaskCancelled, SoftTimeLimitExceeded) as e:
+            cancelled = _cancelled(batch_id, e)
+        except Exception as e:
+            logger.error(f"Помилка обробки елемента {index} пакета {batch_id}: {str(e)}")
+            item_done(index, {"status": "error", "error": str(e)})
+        finally:
+            discard_upload(item.get("image_path"))
+        if cancelled:
+            for remaining in items[index + 1:]:
+                discard_upload(remaining.get("image_path"))
+            break
+
+        # Кодування попереднього елемента завершувались, поки оброблявся поточний
+        if pending:
+            collect(pending)
+        pending = current
+    if pending:
+        collect(pending)
+
+    with timer.span("persist"):
+        try:
+            record_many_metrics(records)
+        except Exception as e:
+            logger.error(f"Помилка при збереженні метрик пакета {batch_id}: {str(e)}")
+    if cancelled:
+        responses = [response or cancelled for response in responses]
+        return {**cancelled, "items": responses, "stages": timer.as_dict()}
+    logger.info(f"Пакет {batch_id} оброблено: {total_items} зображень")
+    return {"status": "success", "items": responses, "stages": timer.as_dict()}
+
+# Результат першого прогріву процесу (повторні прогріви в тому ж процесі не виконуються)
+_warmup_report = None
+
+def warm_up() -> dict:
+    """
+    Прогріває процес воркера один раз: імпортує реалізації методів і виконує кожен метод,
+    метрики та кодування всіма профілями на маленькому зображенні (ініціалізація OpenCV,
+    кодеків і функцій SciPy), щоб перше справжнє завдання не платило за це.
+
+    Returns:
+        dict: {"pid", "seconds", "stages"} першого прогріву процесу.
+    """
+    global _warmup_report
+    if _warmup_report is None:
+        timer = StageTimer()
+        with timer.span("diagnostics"):
+            check_opencv_build()
+        image = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+        reduced_image, _, _ = reduce_image(image, 2.0)
+        with timer.span("metrics.reference"):
+            analysis = ReferenceAnalysis(image)
+        for method in INTERPOLATION_METHODS.values():
+            with timer.span(f"interpolate.{method.key}"):
+                upscaled = method.select_func(reduced_image, 2.0)(reduced_image, 2.0)
+            with timer.span("metrics"):
+                compute_metrics(analysis, upscaled)
+        with timer.span("encode"):
+            for profile, params in ENCODING_PROFILES.items():
+                if params:
+                    encode_image(image, profile)
+        stages = timer.as_dict()
+        _warmup_report = {"pid": os.getpid(), "seconds": sum(stages.values()), "stages": stages}
+        logger.info(f"Процес воркера {os.getpid()} прогрітий за {_warmup_report['seconds']:.3f} сек")
+    return _warmup_report
+
+@worker_process_init.connect
+def _warm_up_child(**kwargs):
+    """Кожен дочірній процес prefork-пулу прогрівається до отримання першого завдання."""
+    if WORKER_WARMUP:
+        warm_up()
+
+@worker_ready.connect
+def _warm_up_worker(sender=None, **kwargs):
+    """Пули threads і solo виконують завдання в основному процесі — прогрівається він."""
+    if WORKER_WARMUP and not isinstance(getattr(sender, "pool", None), PreforkPool):
+        warm_up()
+
+@celery_app.task(name=WARMUP)
+def warmup():
+    """Прогрів процесу воркера на вимогу (напр. після розгортання); повертає звіт прогріву."""
+    return warm_up()
@@ -0,0 +1,133 @@
+import os
+import json
+
+# Налаштування сервісу (можна перевизначити змінними оточення)
+
+# Redis: брокер і бекенд результатів Celery, а також канали подій про прогрес (core/progress.py)
+REDIS_URL = os.getenv("UPSCALER_REDIS_URL", "redis://localhost:6379/0")
+
+# Серіалізація завдань і результатів Celery (core/serialization.py): json або msgpack
+# (двійковий формат; рядки й байти від PAYLOAD_COMPRESS_MIN_BYTES стискаються кодеком
+# PAYLOAD_COMPRESSION: zstd, lz4 або none). Результати завдань зберігаються в бекенді
+# RESULT_EXPIRES секунд, 0 — без обмеження.
+TASK_SERIALIZER = os.getenv("UPSCALER_TASK_SERIALIZER", "json")
+PAYLOAD_COMPRESSION = os.getenv("UPSCALER_PAYLOAD_COMPRESSION", "zstd")
+PAYLOAD_COMPRESS_MIN_BYTES = int(os.getenv("UPSCALER_PAYLOAD_COMPRESS_MIN_BYTES", 16 * 1024))
+RESULT_EXPIRES = int(os.getenv("UPSCALER_RESULT_EXPIRES", 24 * 3600))
+
+# Прогрів процесів воркера (celery_app.warm_up): кожен процес один раз виконує всі методи,
+# метрики і кодування на маленькому зображенні до першого завдання. OPENCV_DIAGNOSTICS —
+# вивести в журнал повну інформацію про збірку OpenCV під час прогріву.
+WORKER_WARMUP = os.getenv("UPSCALER_WORKER_WARMUP", "1") == "1"
+OPENCV_DIAGNOSTICS = os.getenv("UPSCALER_OPENCV_DIAGNOSTICS", "0") == "1"
+
+# Паралельний режим: кожен метод інтерполяції виконується окремою підзадачею Celery (chord),
+# тож час обробки дорівнює часу найповільнішого методу, а не сумі всіх методів.
+PARALLEL_METHODS = os.getenv("UPSCALER_PARALLEL_METHODS", "1") == "1"
+
+# Потайловий режим: для зображень від TILED_MIN_PIXELS пікселів інтерполяція та метрики
+# рахуються смугами по TILE_ROWS рядків, тож пікова пам'ять залежить від розміру смуги.
+TILED_MIN_PIXELS = int(os.getenv("UPSCALER_TILED_MIN_PIXELS", 12_000_000))
+TILE_ROWS = int(os.getenv("UPSCALER_TILE_ROWS", 256))
+
+# Сховище артефактів (core/artifacts.py): файли результатів пишуться один раз у
+# ARTIFACT_ROOT/<task_id>/ і віддаються за ARTIFACT_URL_PREFIX/<task_id>/<файл>.
+ARTIFACT_STORE = os.getenv("UPSCALER_ARTIFACT_STORE", "local")
+ARTIFACT_ROOT = os.getenv("UPSCALER_ARTIFACT_ROOT", os.path.join("static", "results"))
+ARTIFACT_URL_PREFIX = os.getenv("UPSCALER_ARTIFACT_URL_PREFIX", "/static/results")
+# Артефакти незмінні (task_id унікальний), тож клієнт може кешувати їх довго
+ARTIFACT_CACHE_MAX_AGE = int(os.getenv("UPSCALER_ARTIFACT_CACHE_MAX_AGE", 7 * 24 * 3600))
+
+# Профілі кодування артефактів (core/encoding.py): png_fast, png_balanced, png_max,
+# webp_lossless або skip. Кодування виконуються паралельно в пулі з ENCODE_WORKERS потоків.
+ENCODING_PROFILES = {
+    "reduced": os.getenv("UPSCALER_ENCODE_REDUCED", "png_balanced"),
+    "upscaled": os.getenv("UPSCALER_ENCODE_UPSCALED", "png_fast"),
+    "diff": os.getenv("UPSCALER_ENCODE_DIFF", "png_fast"),
+}
+ENCODE_WORKERS = int(os.getenv("UPSCALER_ENCODE_WORKERS", 4))
+
+# Завантаження файлів (POST /upload/, core/uploads.py): тіло пишеться у UPLOAD_ROOT,
+# воркер отримує шлях до файлу. Каталог не має бути доступним як статичний.
+UPLOAD_ROOT = os.getenv("UPSCALER_UPLOAD_ROOT", "uploads")
+MAX_UPLOAD_BYTES = int(os.getenv("UPSCALER_MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+MAX_UPLOAD_PIXELS = int(os.getenv("UPSCALER_MAX_UPLOAD_PIXELS", 100_000_000))
+# Пакетна обробка (POST /upscale_batch/): максимум зображень в одному пакеті
+MAX_BATCH_ITEMS = int(os.getenv("UPSCALER_MAX_BATCH_ITEMS", 100))
+# Розгортка за коефіцієнтами (список scale_factor): максимум коефіцієнтів в одному завданні
+MAX_SWEEP_FACTORS = int(os.getenv("UPSCALER_MAX_SWEEP_FACTORS", 8))
+
+# Веб-сокет отримує події через pub/sub; якщо подій немає довше за цей час (напр. під час
+# перепідключення до Redis), стан завдання звіряється з бекендом результатів.
+PROGRESS_RESYNC_SECONDS = float(os.getenv("UPSCALER_PROGRESS_RESYNC_SECONDS", 5))
+
+# Кеш результатів (core/result_cache.py). PIPELINE_VERSION входить у ключ кешу: його слід
+# змінювати, коли змінюються алгоритми або формат результату, щоб не віддавати старі записи.
+PIPELINE_VERSION = os.getenv("UPSCALER_PIPELINE_VERSION", "1")
+RESULT_CACHE_ENABLED = os.getenv("UPSCALER_RESULT_CACHE", "1") == "1"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("UPSCALER_RESULT_CACHE_MAX_ENTRIES", 1000))
+# Скільки ключ лишається зайнятим, якщо воркер не звільнив його (напр. аварійно завершився)
+INFLIGHT_TTL_SECONDS = int(os.getenv("UPSCALER_INFLIGHT_TTL_SECONDS", 3600))
+
+# Сховище метрик (core/metrics_store.py): SQLite у режимі WAL, спільне для воркерів і API
+METRICS_DB_PATH = os.getenv("UPSCALER_METRICS_DB", os.path.join("data", "metrics.sqlite3"))
+
+# SSIM (core/ssim.py): вікно uniform (7x7, за замовчуванням skimage) або gaussian (11x11,
+# sigma 1.5, як у Wang et al.). MS_SSIM — додатково багатомасштабний SSIM (лише для обробки
+# цілим зображенням); із вікном gaussian це стандартний MS-SSIM.
+SSIM_WINDOW = os.getenv("UPSCALER_SSIM_WINDOW", "uniform")
+MS_SSIM = os.getenv("UPSCALER_MS_SSIM", "0") == "1"
+
+# Маршрутизація завдань за оцінкою вартості (core/routing.py): off, priority (одна черга,
+# важкі завдання з нижчим пріоритетом брокера) або queues (черги fast і heavy, кожну
+# обслуговують окремі воркери). Завдання з оцінкою від HEAVY_JOB_SECONDS секунд — важкі.
+ROUTING_MODE = os.getenv("UPSCALER_ROUTING", "priority")
+HEAVY_JOB_SECONDS = float(os.getenv("UPSCALER_HEAVY_JOB_SECONDS", 5))
+# Модель вартості калібрується за метриками методів за останні COST_MODEL_WINDOW_SECONDS
+# (щонайменше COST_MODEL_MIN_SAMPLES записів на метод) і перечитується раз на COST_MODEL_TTL секунд
+COST_MODEL_WINDOW_SECONDS = float(os.getenv("UPSCALER_COST_MODEL_WINDOW_SECONDS", 7 * 24 * 3600))
+COST_MODEL_MIN_SAMPLES = int(os.getenv("UPSCALER_COST_MODEL_MIN_SAMPLES", 5))
+COST_MODEL_TTL = float(os.getenv("UPSCALER_COST_MODEL_TTL", 300))
+
+# Синхронна обробка в процесі API (core/inline.py): завдання з оцінкою до INLINE_MAX_SECONDS
+# виконуються в пулі з INLINE_WORKERS процесів, результат — у відповіді HTTP; 0 — вимкнено
+INLINE_WORKERS = int(os.getenv("UPSCALER_INLINE_WORKERS", 2))
+INLINE_MAX_SECONDS = float(os.getenv("UPSCALER_INLINE_MAX_SECONDS", 0.5))
+
+# Контроль допуску (core/admission.py). WORKER_SLOTS — кількість завдань, що воркери
+# виконують одночасно (сума -c усіх воркерів); з нею незавершена робота перераховується
+# в час очікування. Завдання, що чекало б довше за ADMISSION_MAX_WAIT_SECONDS, або понад
+# ADMISSION_MAX_QUEUED незавершених завдань — спрощення до найдешевшого методу
+# (ADMISSION_DOWNGRADE) або 503. Записи незавершених завдань діють ADMISSION_ENTRY_TTL секунд.
+ADMISSION_ENABLED = os.getenv("UPSCALER_ADMISSION", "1") == "1"
+WORKER_SLOTS = int(os.getenv("UPSCALER_WORKER_SLOTS", 4))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("UPSCALER_ADMISSION_MAX_WAIT_SECONDS", 600))
+ADMISSION_MAX_QUEUED = int(os.getenv("UPSCALER_ADMISSION_MAX_QUEUED", 1000))
+ADMISSION_DOWNGRADE = os.getenv("UPSCALER_ADMISSION_DOWNGRADE", "1") == "1"
+ADMISSION_ENTRY_TTL = int(os.getenv("UPSCALER_ADMISSION_ENTRY_TTL", 6 * 3600))
+# Ліміти клієнта (заголовок X-Client-Id або IP): незавершені завдання і їх сумарна оцінка
+# в секундах, 0 — без ліміту; понад ліміт — 429. UPSCALER_CLIENT_LIMITS — JSON з лімітами
+# окремих клієнтів, напр. {"reports": {"max_tasks": 100, "max_seconds": 0}}
+CLIENT_MAX_TASKS = int(os.getenv("UPSCALER_CLIENT_MAX_TASKS", 20))
+CLIENT_MAX_SECONDS = float(os.getenv("UPSCALER_CLIENT_MAX_SECONDS", 0))
+CLIENT_LIMITS = json.loads(os.getenv("UPSCALER_CLIENT_LIMITS", "{}"))
+
+# Скасування і ліміти часу завдань (core/cancellation.py). Позначка скасування діє
+# CANCEL_TTL_SECONDS; CANCEL_ON_DISCONNECT — скасовувати завдання, якщо його останній
+# веб-сокет відключився і не підключився знову за CANCEL_DISCONNECT_GRACE_SECONDS.
+# М'який ліміт — оцінка вартості x TASK_TIME_LIMIT_FACTOR, не менше TASK_TIME_LIMIT_MIN_SECONDS;
+# жорсткий — на TASK_TIME_LIMIT_GRACE_SECONDS більше.
+CANCEL_TTL_SECONDS = int(os.getenv("UPSCALER_CANCEL_TTL_SECONDS", 24 * 3600))
+CANCEL_ON_DISCONNECT = os.getenv("UPSCALER_CANCEL_ON_DISCONNECT", "0") == "1"
+CANCEL_DISCONNECT_GRACE_SECONDS = float(os.getenv("UPSCALER_CANCEL_DISCONNECT_GRACE_SECONDS", 10))
+TASK_TIME_LIMIT_FACTOR = float(os.getenv("UPSCALER_TASK_TIME_LIMIT_FACTOR", 10))
+TASK_TIME_LIMIT_MIN_SECONDS = int(os.getenv("UPSCALER_TASK_TIME_LIMIT_MIN_SECONDS", 60))
+TASK_TIME_LIMIT_GRACE_SECONDS = int(os.getenv("UPSCALER_TASK_TIME_LIMIT_GRACE_SECONDS", 30))
+
+# Бюджет пам'яті воркерів (core/memory.py): спільний для процесів воркерів на хості;
+# 0 — 75% фізичної пам'яті. Завдання, якому не вистачає бюджету, переходить на потайловий
+# режим або чекає до MEMORY_WAIT_SECONDS, інакше завершується помилкою.
+MEMORY_BUDGET_MB = int(os.getenv("UPSCALER_MEMORY_BUDGET_MB", 0))
+MEMORY_WAIT_SECONDS = float(os.getenv("UPSCALER_MEMORY_WAIT_SECONDS", 60))
+# Резерв аварійно завершеного процесу звільняється після цього часу
+MEMORY_RESERVATION_TTL = int(os.getenv("UPSCALER_MEMORY_RESERVATION_TTL", 3600))
@@ -0,0 +1,171 @@
+"""
+Контроль допуску завдань (backpressure) і оцінка часу до результату.
+
+API записує кожне поставлене в чергу завдання в реєстр незавершеної роботи в Redis (хеш
+task_id -> оцінка вартості, клас навантаження і клієнт, core/routing.py), воркер видаляє
+запис, коли завдання завершується (release_work). Перед постановкою нового завдання
+(admit):
+
+- сума оцінок незавершених завдань, що виконуватимуться раніше, поділена на WORKER_SLOTS,
+  — час очікування, а разом з оцінкою самого завдання — ETA. У режимі priority швидкі
+  завдання чекають лише на швидкі, у режимі queues кожен клас — на свою чергу (WORKER_SLOTS
+  тоді — слоти воркерів однієї черги);
+- якщо ETA перевищує ADMISSION_MAX_WAIT_SECONDS, пробуються дешевші варіанти завдання
+  (спрощення до найдешевшого методу); якщо жоден не вміщується, або незавершених завдань
+  уже ADMISSION_MAX_QUEUED, — 503 з Retry-After. Якщо попереду немає роботи, завдання
+  приймається за будь-якої оцінки: очікування нічого б не змінило;
+- ліміти клієнта на кількість незавершених завдань і їх сумарну оцінку — 429 з Retry-After.
+
+Записи мають термін дії (ADMISSION_ENTRY_TTL), тож завдання аварійно зупиненого воркера не
+займають чергу назавжди. Незавершені завдання рахуються разом з тими, що вже виконуються,
+з повною оцінкою — ETA консервативна.
+"""
+import json
+import math
+import time
+import logging
+from config import (ROUTING_MODE, WORKER_SLOTS, ADMISSION_MAX_WAIT_SECONDS, ADMISSION_MAX_QUEUED,
+                    ADMISSION_ENTRY_TTL, CLIENT_MAX_TASKS, CLIENT_MAX_SECONDS, CLIENT_LIMITS)
+from core.routing import FAST_QUEUE, HEAVY_QUEUE
+
+logger = logging.getLogger(__name__)
+
+_WORK_KEY = "upscaler:admission:work"
+
+
+class AdmissionRejected(Exception):
+    """
+    Завдання не прийнято.
+
+    Attributes:
+        status_code (int): 429 — ліміт клієнта, 503 — перевантаження сервісу.
+        retry_after (int): Через скільки секунд варто повторити запит.
+    """
+
+    def __init__(self, status_code: int, retry_after: float, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def client_limits(client_id: str) -> tuple[int, float]:
+    """(max_tasks, max_seconds) клієнта: CLIENT_LIMITS або ліміти за замовчуванням; 0 — без ліміту."""
+    limits = CLIENT_LIMITS.get(client_id, {})
+    return limits.get("max_tasks", CLIENT_MAX_TASKS), limits.get("max_seconds", CLIENT_MAX_SECONDS)
+
+
+class Backlog:
+    """Незавершені завдання: кількість і сумарні оцінки за класами навантаження й клієнтами."""
+
+    def __init__(self, entries: list):
+        self.tasks = len(entries)
+        self.seconds = {FAST_QUEUE: 0.0, HEAVY_QUEUE: 0.0}
+        self.client_tasks = {}
+        self.client_seconds = {}
+        for entry in entries:
+            self.seconds[entry["workload"]] = self.seconds.get(entry["workload"], 0.0) + entry["seconds"]
+            client = entry["client"]
+            self.client_tasks[client] = self.client_tasks.get(client, 0) + 1
+            self.client_seconds[client] = self.client_seconds.get(client, 0.0) + entry["seconds"]
+
+    def wait_seconds(self, workload: str) -> float:
+        """Очікування до початку завдання класу workload."""
+        if ROUTING_MODE == "queues" or (ROUTING_MODE == "priority" and workload == FAST_QUEUE):
+            ahead = self.seconds.get(workload, 0.0)
+        else:
+            ahead = sum(self.seconds.values())
+        return ahead / WORKER_SLOTS
+
+    def as_dict(self) -> dict:
+        return {"tasks": self.tasks,
+                "outstanding_seconds": {workload: round(seconds, 2) for workload, seconds in self.seconds.items()},
+                "wait_seconds": {workload: round(self.wait_seconds(workload), 2) for workload in self.seconds}}
+
+
+def admit(backlog: Backlog, plans: list, client_id: str) -> tuple[int, float]:
+    """
+    Вибирає перший варіант завдання, що вміщується в ліміти.
+
+    Args:
+        backlog (Backlog): Незавершені завдання.
+        plans (list): Варіанти [(оцінка в секундах, клас навантаження)] від повного до найдешевшого.
+        client_id (str): Клієнт (для лімітів).
+
+    Returns:
+        tuple[int, float]: Індекс прийнятого варіанта і ETA в секундах.
+
+    Raises:
+        AdmissionRejected: Жоден варіант не вміщується.
+    """
+    max_tasks, max_seconds = client_limits(client_id)
+    client_tasks = backlog.client_tasks.get(client_id, 0)
+    client_seconds = backlog.client_seconds.get(client_id, 0.0)
+    if max_tasks and client_tasks >= max_tasks:
+        raise AdmissionRejected(429, client_seconds / client_tasks,
+                                f"Клієнт {client_id} має {client_tasks} незавершених завдань (ліміт {max_tasks})")
+    if backlog.tasks >= ADMISSION_MAX_QUEUED:
+        raise AdmissionRejected(503, sum(backlog.seconds.values()) / WORKER_SLOTS / backlog.tasks,
+                                f"Черга переповнена: {backlog.tasks} незавершених завдань")
+
+    rejection = None
+    for index, (seconds, workload) in enumerate(plans):
+        if max_seconds and client_seconds + seconds > max_seconds:
+            rejection = AdmissionRejected(
+                429, (client_seconds + seconds - max_seconds) / WORKER_SLOTS,
+                f"Клієнт {client_id}: незавершені завдання на {client_seconds + seconds:.0f} с "
+                f"(ліміт {max_seconds:g} с)")
+            continue
+        wait = backlog.wait_seconds(workload)
+        eta = wait + seconds
+        if wait > 0 and eta > ADMISSION_MAX_WAIT_SECONDS:
+            rejection = AdmissionRejected(
+                503, min(eta - ADMISSION_MAX_WAIT_SECONDS, wait),
+                f"Сервіс перевантажено: очікуваний час до результату {eta:.1f} с "
+                f"(ліміт {ADMISSION_MAX_WAIT_SECONDS:g} с)")
+            continue
+        return index, eta
+    raise rejection
+
+
+def release_work(client, task_id: str) -> None:
+    """Видаляє завершене завдання з реєстру незавершеної роботи (у воркері)."""
+    try:
+        client.hdel(_WORK_KEY, task_id)
+    except Exception as e:
+        logger.warning(f"Не вдалося звільнити запис завдання {task_id}: {str(e)}")
+
+
+class AsyncAdmission:
+    """Реєстр незавершеної роботи на боці API (redis.asyncio)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def backlog(self) -> Backlog:
+        """Незавершені завдання; прострочені записи видаляються."""
+        now = time.time()
+        entries, expired = [], []
+        for task_id, data in (await self.client.hgetall(_WORK_KEY)).items():
+            entry = json.loads(data)
+            if entry["expires"] <= now:
+                expired.append(task_id)
+            else:
+                entries.append(entry)
+        if expired:
+            await self.client.hdel(_WORK_KEY, *expired)
+        return Backlog(entries)
+
+    async def register(self, task_id: str, seconds: float, workload: str, client_id: str) -> None:
+        """Записує поставлене в чергу завдання."""
+        entry = {"seconds": seconds, "workload": workload, "client": client_id,
+                 "expires": time.time() + ADMISSION_ENTRY_TTL}
+        await self.client.hset(_WORK_KEY, task_id, json.dumps(entry))
+
+    async def registered(self, task_id: str) -> bool:
+        """Чи є в реєстрі непрострочений запис завдання."""
+        data = await self.client.hget(_WORK_KEY, task_id)
+        return data is not None and json.loads(data)["expires"] > time.time()
+
+    async def release(self, task_id: str) -> None:
+        """Видаляє скасоване завдання з реєстру."""
+        await self.client.hdel(_WORK_KEY, task_id)
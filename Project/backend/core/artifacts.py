@@ -0,0 +1,75 @@
+"""
+Сховище артефактів завдання (оригінал, зменшене, збільшені та різницеві зображення).
+
+Воркер записує кожен файл один раз, а в результат завдання (Redis, веб-сокет) потрапляють
+лише URL та розміри — без base64. За замовчуванням файли лежать у static/results/<task_id>/
+і віддаються FastAPI (main.py) з заголовками кешування. Інше сховище (S3, мережевий диск)
+підключається підкласом ArtifactStore, зареєстрованим в ARTIFACT_STORES.
+"""
+import os
+import logging
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from urllib.parse import quote
+import numpy as np
+from config import ARTIFACT_STORE, ARTIFACT_ROOT, ARTIFACT_URL_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore(ABC):
+    """Інтерфейс сховища: зберігає байти артефакту і повертає URL, за яким його віддають."""
+
+    @abstractmethod
+    def put(self, task_id: str, name: str, data: bytes) -> str:
+        """Зберігає артефакт name завдання task_id і повертає його URL."""
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Файли у root/<task_id>/<name>, URL — url_prefix/<task_id>/<name>."""
+
+    def __init__(self, root: str, url_prefix: str):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip('/')
+
+    def task_dir(self, task_id: str) -> str:
+        path = os.path.join(self.root, task_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put(self, task_id: str, name: str, data: bytes) -> str:
+        path = os.path.join(self.task_dir(task_id), name)
+        # Запис через тимчасовий файл: клієнт ніколи не отримає недописаний файл
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        logger.info(f"Збережено артефакт {path} ({len(data)} байт)")
+        return f"{self.url_prefix}/{quote(task_id)}/{quote(name)}"
+
+
+# Доступні сховища (ключ — значення UPSCALER_ARTIFACT_STORE)
+ARTIFACT_STORES = {
+    "local": lambda: LocalArtifactStore(ARTIFACT_ROOT, ARTIFACT_URL_PREFIX),
+}
+
+
+@lru_cache(maxsize=None)
+def get_artifact_store() -> ArtifactStore:
+    """Сховище, вибране у config.ARTIFACT_STORE (один екземпляр на процес)."""
+    if ARTIFACT_STORE not in ARTIFACT_STORES:
+        raise ValueError(f"Невідоме сховище артефактів: {ARTIFACT_STORE}")
+    return ARTIFACT_STORES[ARTIFACT_STORE]()
+
+
+def save_artifact(task_id: str, name: str, data: bytes, image: np.ndarray = None) -> dict:
+    """
+    Зберігає артефакт і повертає його опис для результату завдання.
+
+    Returns:
+        dict: {"url", "bytes"} і, якщо передано image, "dimensions": [ширина, висота].
+    """
+    entry = {"url": get_artifact_store().put(task_id, name, data), "bytes": len(data)}
+    if image is not None:
+        entry["dimensions"] = [image.shape[1], image.shape[0]]
+    return entry
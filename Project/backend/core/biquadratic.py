@@ -0,0 +1,198 @@
+"""
+Сепарабельна біквадратична інтерполяція.
+
+Результат збігається з інтерполяційним сплайном RectBivariateSpline(kx=2, ky=2, s=0):
+використовуються ті самі вузли FITPACK (кратні вузли на краях, внутрішні — посередині між
+відліками), але сплайн будується як два одновимірні проходи одразу для всіх каналів:
+
+1. префільтр — розв'язок тридіагональної системи колокації (коефіцієнти B-сплайна);
+2. обчислення — 3-точкове ядро квадратичного B-сплайна у нових координатах.
+
+Таблиці ваг/індексів і LU-розклад системи для кожної осі кешуються (LRU) за парою
+(розмір входу, розмір виходу), тож повторні виклики з тими самими розмірами не
+перебудовують їх.
+
+Точність: обчислення ведеться у float64, далі — як і у сплайновому варіанті — значення
+переводяться у float32, обрізаються до [0, 255] і відкидається дробова частина. Відхилення
+від RectBivariateSpline не перевищує 1 рівня яскравості (і можливе лише тоді, коли похибка
+округлення потрапляє точно на межу цілого числа); на тестових зображеннях результати
+побітово однакові. Перевірка та порівняння швидкості: python -m benchmarks.bench_biquadratic
+"""
+import logging
+from functools import lru_cache
+import numpy as np
+import cv2
+from scipy.interpolate import BSpline, RectBivariateSpline
+from core.tiling import with_halo
+
+logger = logging.getLogger(__name__)
+
+# Порядок сплайна
+SPLINE_DEGREE = 2
+
+# Кількість закешованих планів (пар розмірів вхід/вихід)
+PLAN_CACHE_SIZE = 16
+
+# Ореол (у рядках входу) для потайлового режиму. Вплив відліку на коефіцієнти згасає
+# як 0.1716^d, тож при 16 рядках відхилення від повного розв'язку < 1e-9 рівня яскравості
+# і смуги стикуються без швів.
+TILE_HALO = 16
+
+
+def _knots(n: int) -> np.ndarray:
+    """Вузли FITPACK для інтерполяційного квадратичного сплайна на сітці 0..n-1."""
+    return np.concatenate([
+        np.zeros(SPLINE_DEGREE + 1),
+        np.arange(1, n - SPLINE_DEGREE, dtype=np.float64) + 0.5,
+        np.full(SPLINE_DEGREE + 1, n - 1, dtype=np.float64),
+    ])
+
+
+def _factorize(lower: np.ndarray, diag: np.ndarray, upper: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """LU-розклад тридіагональної матриці без перестановок (матриця з діагональною перевагою)."""
+    n = diag.shape[0]
+    factors = np.zeros(n)
+    inv_pivots = np.empty(n)
+    pivot = diag[0]
+    inv_pivots[0] = 1.0 / pivot
+    for i in range(1, n):
+        factors[i] = lower[i - 1] / pivot
+        pivot = diag[i] - factors[i] * upper[i - 1]
+        inv_pivots[i] = 1.0 / pivot
+    return factors, inv_pivots
+
+
+class _AxisPlan:
+    """Передобчислені дані для однієї осі: LU-розклад системи колокації та матриця обчислення."""
+
+    def __init__(self, n_in: int, n_out: int):
+        if n_in <= SPLINE_DEGREE:
+            raise ValueError(f"Для біквадратичної інтерполяції потрібно щонайменше {SPLINE_DEGREE + 1} пікселі по кожній осі")
+        knots = _knots(n_in)
+
+        # Тридіагональна матриця колокації: значення базисних функцій у вузлах сітки
+        collocation = BSpline.design_matrix(np.arange(n_in, dtype=np.float64), knots, SPLINE_DEGREE)
+        self.lower, self.diag, self.upper = collocation.diagonal(-1), collocation.diagonal(), collocation.diagonal(1)
+        self.factors, self.inv_pivots = _factorize(self.lower, self.diag, self.upper)
+
+        # Розріджена матриця обчислення (3 ненульові ваги на рядок)
+        positions = np.linspace(0, n_in - 1, n_out)
+        self.evaluation = BSpline.design_matrix(positions, knots, SPLINE_DEGREE).tocsr()
+
+    def prefilter(self, rows: np.ndarray, start: int = 0, stop: int = None) -> np.ndarray:
+        """
+        Перетворює відліки на коефіцієнти B-сплайна вздовж осі 0 (на місці).
+
+        Якщо задано діапазон [start, stop) — rows містить лише ці відліки, і система
+        розв'язується для підматриці (зв'язки з відліками поза діапазоном відкидаються).
+        """
+        if stop is None:
+            stop = self.diag.shape[0]
+        if start == 0 and stop == self.diag.shape[0]:
+            factors, inv_pivots, upper = self.factors, self.inv_pivots, self.upper
+        else:
+            upper = self.upper[start:stop - 1]
+            factors, inv_pivots = _factorize(self.lower[start:stop - 1], self.diag[start:stop], upper)
+
+        n = rows.shape[0]
+        for i in range(1, n):
+            rows[i] -= factors[i] * rows[i - 1]
+        rows[n - 1] *= inv_pivots[n - 1]
+        for i in range(n - 2, -1, -1):
+            rows[i] -= upper[i] * rows[i + 1]
+            rows[i] *= inv_pivots[i]
+        return rows
+
+    def evaluate(self, coefficients: np.ndarray) -> np.ndarray:
+        """Обчислює сплайн у нових координатах вздовж осі 0."""
+        return self.evaluation @ coefficients
+
+    def source_range(self, out_start: int, out_stop: int) -> tuple[int, int]:
+        """Діапазон коефіцієнтів [start, stop), від яких залежать вихідні відліки [out_start, out_stop)."""
+        used = self.evaluation[out_start:out_stop].indices
+        return int(used.min()), int(used.max()) + 1
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _resample_plan(input_shape: tuple[int, int], output_shape: tuple[int, int]) -> tuple[_AxisPlan, _AxisPlan]:
+    """План (вісь Y, вісь X) для заданих розмірів входу та виходу."""
+    logger.info(f"Побудова плану біквадратичної інтерполяції: {input_shape} -> {output_shape}")
+    return _AxisPlan(input_shape[0], output_shape[0]), _AxisPlan(input_shape[1], output_shape[1])
+
+
+def resample_biquadratic(image: np.ndarray, target_height: int, target_width: int) -> np.ndarray:
+    """
+    Масштабує зображення біквадратичним сплайном двома сепарабельними проходами.
+
+    Args:
+        image (np.ndarray): Вхідне зображення uint8 (H, W, C).
+        target_height (int): Нова висота.
+        target_width (int): Нова ширина.
+
+    Returns:
+        np.ndarray: Масштабоване зображення uint8 (target_height, target_width, C).
+    """
+    height, width, channels = image.shape
+    y_plan, x_plan = _resample_plan((height, width), (target_height, target_width))
+
+    # Прохід по X: рядки масиву — стовпці зображення, усі канали обробляються разом
+    columns = cv2.transpose(image).astype(np.float64).reshape(width, height * channels)
+    x_plan.prefilter(columns)
+    columns = x_plan.evaluate(columns).reshape(target_width, height, channels)
+
+    # Прохід по Y
+    rows = cv2.transpose(columns).reshape(height, target_width * channels)
+    y_plan.prefilter(rows)
+    rows = y_plan.evaluate(rows)
+
+    return _to_uint8(rows, target_height, target_width, channels)
+
+
+def resample_biquadratic_rows(image: np.ndarray, target_height: int, target_width: int,
+                              out_start: int, out_stop: int) -> np.ndarray:
+    """
+    Обчислює лише рядки [out_start, out_stop) результату resample_biquadratic.
+
+    Використовує рядки входу, від яких залежать ці рядки, плюс ореол TILE_HALO, тож пам'ять
+    пропорційна висоті смуги, а не всього зображення.
+
+    Returns:
+        np.ndarray: Смуга uint8 (out_stop - out_start, target_width, C).
+    """
+    height, width, channels = image.shape
+    y_plan, x_plan = _resample_plan((height, width), (target_height, target_width))
+    start, stop = y_plan.source_range(out_start, out_stop)
+    start, stop = with_halo(start, stop, TILE_HALO, height)
+
+    columns = cv2.transpose(image[start:stop]).astype(np.float64).reshape(width, (stop - start) * channels)
+    x_plan.prefilter(columns)
+    columns = x_plan.evaluate(columns).reshape(target_width, stop - start, channels)
+
+    rows = cv2.transpose(columns).reshape(stop - start, target_width * channels)
+    y_plan.prefilter(rows, start, stop)
+    rows = y_plan.evaluation[out_start:out_stop, start:stop] @ rows
+
+    return _to_uint8(rows, out_stop - out_start, target_width, channels)
+
+
+def _to_uint8(values: np.ndarray, height: int, width: int, channels: int) -> np.ndarray:
+    """Те саме перетворення типів, що й у сплайновому варіанті (float32 -> обрізання -> uint8)."""
+    result = values.astype(np.float32).reshape(height, width, channels)
+    np.clip(result, 0, 255, out=result)
+    return result.astype(np.uint8)
+
+
+def resample_biquadratic_spline(image: np.ndarray, target_height: int, target_width: int) -> np.ndarray:
+    """Еталонна реалізація через RectBivariateSpline для кожного каналу (використовується у бенчмарку)."""
+    height, width, channels = image.shape
+    x = np.arange(width)
+    y = np.arange(height)
+    x_new = np.linspace(0, width - 1, target_width)
+    y_new = np.linspace(0, height - 1, target_height)
+
+    upscaled = np.zeros((target_height, target_width, channels), dtype=np.float32)
+    for channel in range(channels):
+        spline = RectBivariateSpline(y, x, image[:, :, channel], kx=2, ky=2)
+        upscaled[:, :, channel] = spline(y_new, x_new)
+
+    return np.clip(upscaled, 0, 255).astype(np.uint8)
@@ -0,0 +1,92 @@
+"""
+Скасування завдань і ліміти часу.
+
+Клієнт скасовує завдання через DELETE /task/{task_id} (або, якщо ввімкнено
+CANCEL_ON_DISCONNECT, коли відключається останній веб-сокет завдання): API ставить
+позначку в Redis і відкликає завдання в Celery, тож ще не розпочате завдання воркер
+відкидає. Розпочате завдання перевіряє позначку між етапами конвеєра і методами
+(CancelToken.check) і завершується з {"status": "cancelled"}, звільняючи воркер, пам'ять
+і ключ кешу. Підзадачі паралельного режиму перевіряють позначку батьківського завдання.
+
+Ліміти часу виводяться з оцінки вартості (core/routing.py, time_limits) і передаються з
+завданням: м'який перевіряється тим самим CancelToken (у будь-якому пулі воркерів), у
+prefork-пулі Celery додатково перериває завдання SoftTimeLimitExceeded, а жорсткий —
+завершує процес.
+
+Відкликане до початку завдання не виконується, тож ресурси, які воно мало б звільнити (ключ
+кешу, завантажені файли), передаються в заголовку повідомлення (cleanup_options): сигнал
+task_revoked отримує заголовки завдання, але не його аргументи.
+"""
+import math
+import time
+import logging
+from config import (CANCEL_TTL_SECONDS, TASK_TIME_LIMIT_FACTOR, TASK_TIME_LIMIT_MIN_SECONDS,
+                    TASK_TIME_LIMIT_GRACE_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "upscaler:cancel:"
+# Заголовок повідомлення з ресурсами завдання для звільнення після відкликання
+CLEANUP_HEADER = "upscaler_cleanup"
+
+
+class TaskCancelled(Exception):
+    """Завдання скасовано клієнтом або перевищено його м'який ліміт часу."""
+
+
+def time_limits(estimated_seconds: float) -> dict:
+    """Параметри send_task soft_time_limit і time_limit для завдання з оцінкою estimated_seconds."""
+    soft = max(TASK_TIME_LIMIT_MIN_SECONDS, math.ceil(estimated_seconds * TASK_TIME_LIMIT_FACTOR))
+    return {"soft_time_limit": soft, "time_limit": soft + TASK_TIME_LIMIT_GRACE_SECONDS}
+
+
+def cleanup_options(cache_key: str = None, uploads: list = ()) -> dict:
+    """Параметр send_task headers: ключ кешу і завантажені файли, які звільняє відкликане завдання."""
+    return {"headers": {CLEANUP_HEADER: {"cache_key": cache_key,
+                                         "uploads": [path for path in uploads if path]}}}
+
+
+def revoked_resources(request) -> tuple:
+    """(ключ кешу, завантажені файли) з заголовка відкликаного завдання (контекст сигналу task_revoked)."""
+    resources = getattr(request, CLEANUP_HEADER, None) or {}
+    return resources.get("cache_key"), resources.get("uploads", [])
+
+
+def is_cancelled(client, task_id: str) -> bool:
+    try:
+        return bool(client.exists(_KEY_PREFIX + task_id))
+    except Exception as e:
+        logger.warning(f"Не вдалося перевірити скасування {task_id}: {str(e)}")
+        return False
+
+
+class CancelToken:
+    """
+    Кооперативна перевірка скасування і м'якого ліміту часу завдання (у воркері).
+
+    Args:
+        client: Синхронний клієнт Redis.
+        task_id (str): Завдання, позначку якого перевіряти (батьківське для підзадач).
+        soft_time_limit (float): М'який ліміт часу в секундах від створення або None.
+    """
+
+    def __init__(self, client, task_id: str, soft_time_limit: float = None):
+        self.client = client
+        self.task_id = task_id
+        self.deadline = time.monotonic() + soft_time_limit if soft_time_limit else None
+        self.soft_time_limit = soft_time_limit
+
+    def check(self) -> None:
+        """
+        Raises:
+            TaskCancelled: Завдання скасовано або м'який ліміт часу вичерпано.
+        """
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise TaskCancelled(f"Перевищено ліміт часу завдання ({self.soft_time_limit:g} с)")
+        if is_cancelled(self.client, self.task_id):
+            raise TaskCancelled("Завдання скасовано клієнтом")
+
+
+async def request_cancel(client, task_id: str) -> None:
+    """Ставить позначку скасування (у API, redis.asyncio)."""
+    await client.set(_KEY_PREFIX + task_id, "1", ex=CANCEL_TTL_SECONDS)
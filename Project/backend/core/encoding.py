@@ -0,0 +1,86 @@
+"""
+Паралельне кодування артефактів за профілями (core/profiles.py).
+
+cv2.imencode відпускає GIL, тому кодування виконуються в пулі потоків: submit_artifact
+повертає Future одразу, і кодування перекриваються між собою та з обчисленнями наступного
+методу. Для кожного артефакту у результат потрапляють профіль, час кодування і розмір.
+"""
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import cv2
+from config import ENCODE_WORKERS
+from core.artifacts import save_artifact
+from core.profiles import ENCODING_PROFILES
+
+logger = logging.getLogger(__name__)
+
+# Параметр cv2.imencode для рівня профілю за розширенням
+_IMENCODE_FLAGS = {".png": cv2.IMWRITE_PNG_COMPRESSION, ".webp": cv2.IMWRITE_WEBP_QUALITY}
+
+_executor = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix="encode")
+
+
+def encode_image(image: np.ndarray, profile: str) -> tuple[bytes, str]:
+    """Кодує зображення профілем і повертає (байти, розширення файлу)."""
+    extension, level = ENCODING_PROFILES[profile]
+    success, buffer = cv2.imencode(extension, image, [_IMENCODE_FLAGS[extension], level])
+    if not success:
+        raise ValueError(f"Не вдалося закодувати зображення профілем {profile}")
+    return buffer.tobytes(), extension
+
+
+def _encode_and_save(task_id: str, name: str, image: np.ndarray, profile: str) -> dict:
+    start_time = time.time()
+    data, extension = encode_image(image, profile)
+    encode_time = time.time() - start_time
+    entry = save_artifact(task_id, f"{name}{extension}", data, image)
+    entry.update({"profile": profile, "encode_time": encode_time})
+    logger.info(f"Кодування {name} ({profile}): {len(data)} байт за {encode_time:.3f} сек")
+    return entry
+
+
+def submit_artifact(task_id: str, name: str, image: np.ndarray, profile: str) -> Future:
+    """
+    Ставить кодування і запис артефакту в пул потоків.
+
+    Returns:
+        Future: Результат — опис артефакту (save_artifact + profile, encode_time)
+        або None для профілю skip.
+    """
+    if ENCODING_PROFILES[profile] is None:
+        future = Future()
+        future.set_result(None)
+        return future
+    return _executor.submit(_encode_and_save, task_id, name, image, profile)
+
+
+def collect_artifacts(result: dict) -> dict:
+    """
+    Повертає копію result, у якій Future замінено на їх результати (чекає завершення кодувань).
+
+    Якщо result має stages, час кодування кожного артефакту додається як етап
+    encode.<вид> (upscaled_image -> encode.upscaled).
+    """
+    collected = {key: value.result() if isinstance(value, Future) else value for key, value in result.items()}
+    if "stages" in collected:
+        stages = dict(collected["stages"])
+        for key, value in result.items():
+            if isinstance(value, Future) and collected[key]:
+                stages[f"encode.{key.removesuffix('_image')}"] = collected[key]["encode_time"]
+        collected["stages"] = stages
+    return collected
+
+
+def encoding_stats(artifacts: list) -> dict:
+    """Сумарні розмір і час кодування за профілями (для налаштування профілів)."""
+    stats = {}
+    for entry in artifacts:
+        if not entry or "profile" not in entry:
+            continue
+        profile_stats = stats.setdefault(entry["profile"], {"artifacts": 0, "bytes": 0, "encode_time": 0.0})
+        profile_stats["artifacts"] += 1
+        profile_stats["bytes"] += entry["bytes"]
+        profile_stats["encode_time"] += entry["encode_time"]
+    return stats
@@ -0,0 +1,85 @@
+"""
+Синхронна обробка малих зображень у процесі API, без брокера і воркера.
+
+Для завдань з оцінкою до INLINE_MAX_SECONDS (core/routing.py) черга Celery, доставка
+воркеру і опитування веб-сокета коштують більше за саму обробку, тож API виконує
+process_all_methods у власному пулі з INLINE_WORKERS процесів і повертає результат у
+відповіді HTTP. Пул процесів, а не потоків: процеси пулу імпортують celery_app (NumPy,
+OpenCV, SciPy) і прогріваються під час запуску API, а сам процес API лишається легким
+і не блокується обчисленнями.
+
+Завдання виконується тим самим кодом, що у воркері (Task.apply), а результат зберігається
+в бекенді під task_id, тож веб-сокет, гістограми і кеш результатів працюють так само. Якщо
+всі процеси пулу зайняті, завдання йде звичайним шляхом через Celery.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from config import INLINE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Клас навантаження у відповіді для завдань, виконаних у процесі API
+INLINE_WORKLOAD = "inline"
+
+
+def _init_process() -> None:
+    """Ініціалізація процесу пулу: завдання, збереження результату apply() у бекенді, прогрів."""
+    import celery_app
+    celery_app.celery_app.conf.task_store_eager_result = True
+    celery_app.warm_up()
+
+
+def _ping() -> None:
+    """Порожнє завдання: змушує пул запустити (і прогріти) процес."""
+
+
+def _run(task_id: str, args: tuple, kwargs: dict) -> dict:
+    import celery_app
+    return celery_app.process_all_methods.apply(args, kwargs, task_id=task_id).get()
+
+
+class InlinePool:
+    """
+    Обмежений пул процесів для синхронних завдань.
+
+    Args:
+        workers (int): Кількість процесів; 0 — синхронний шлях вимкнено.
+    """
+
+    def __init__(self, workers: int = INLINE_WORKERS):
+        self.workers = workers
+        self.busy = 0
+        self._executor = None
+
+    def start(self) -> None:
+        if not self.workers:
+            return
+        # spawn, а не fork: процес API вже має потоки і цикл подій
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_process)
+        for _ in range(self.workers):
+            self._executor.submit(_ping)
+        logger.info(f"Пул синхронної обробки: {self.workers} процесів")
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def try_acquire(self) -> bool:
+        """Займає процес пулу; False — пул вимкнено або всі процеси зайняті."""
+        if self._executor is None or self.busy >= self.workers:
+            return False
+        self.busy += 1
+        return True
+
+    def release(self) -> None:
+        self.busy -= 1
+
+    async def run(self, task_id: str, args: tuple, kwargs: dict) -> dict:
+        """Виконує process_all_methods у зайнятому try_acquire процесі і звільняє його."""
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, _run, task_id, args, kwargs)
+        finally:
+            self.release()
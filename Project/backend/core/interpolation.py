@@ -1,19 +1,25 @@
+"""
+Методи інтерполяції. Реєстр методів і їх метадані — у core/methods.py.
+"""
 import cv2
 import numpy as np
-from scipy.interpolate import RectBivariateSpline
 import logging
+from config import OPENCV_DIAGNOSTICS
+from core.biquadratic import resample_biquadratic, resample_biquadratic_rows
+from core.tiling import iter_strips
 
 # Налаштування логування
 logger = logging.getLogger(__name__)
 
-def check_opencv_build():
-    """Виводить інформацію про версію та збірку OpenCV."""
-    logger.info(f"Версія OpenCV: {cv2.__version__}")
-    logger.info("Інформація про збірку OpenCV:")
-    logger.info(cv2.getBuildInformation())
-
-
-check_opencv_build()
+def check_opencv_build(build_information: bool = OPENCV_DIAGNOSTICS):
+    """
+    Виводить версію OpenCV і кількість потоків; повну інформацію про збірку (кілька сотень
+    рядків) — лише якщо build_information (UPSCALER_OPENCV_DIAGNOSTICS=1).
+    """
+    logger.info(f"Версія OpenCV: {cv2.__version__}, потоків: {cv2.getNumThreads()}")
+    if build_information:
+        logger.info("Інформація про збірку OpenCV:")
+        logger.info(cv2.getBuildInformation())
 
 def validate_image(image: np.ndarray, scale_factor: float, method_name: str) -> tuple[int, int]:
     """
@@ -105,32 +111,16 @@ def biquadratic_interpolation(image: np.ndarray, scale_factor: float) -> np.ndar
     """
     try:
         target_height, target_width = validate_image(image, scale_factor, f"Біквадратична інтерполяція {'(зменшення)' if scale_factor < 1 else '(збільшення)'}")
-        
-        height, width, channels = image.shape
-        x = np.arange(width)
-        y = np.arange(height)
-        x_new = np.linspace(0, width - 1, target_width)
-        y_new = np.linspace(0, height - 1, target_height)
-        
-        # Створюємо масив для масштабованого зображення
-        scaled = np.zeros((target_height, target_width, channels), dtype=np.float32)
-        
-        # Інтерполюємо кожен канал окремо
-        for channel in range(channels):
-            # Використовуємо біквадратичний сплайн (kx=2, ky=2)
-            spline = RectBivariateSpline(y, x, image[:, :, channel], kx=2, ky=2)
-            scaled[:, :, channel] = spline(y_new, x_new)
-        
-        # Обрізаємо значення до діапазону [0, 255] і конвертуємо в uint8
-        scaled = np.clip(scaled, 0, 255).astype(np.uint8)
-        return scaled
+        # Сепарабельний біквадратичний сплайн (еквівалент RectBivariateSpline з kx=2, ky=2)
+        return resample_biquadratic(image, target_height, target_width)
     except Exception as e:
         logger.error(f"Помилка в біквадратичній інтерполяції: {str(e)}")
         raise
 
-# Словник методів інтерполяції
-INTERPOLATION_METHODS = {
-    "bilinear": bilinear_interpolation,
-    "bicubic": bicubic_interpolation,
-    "biquadratic": biquadratic_interpolation
-}
\ No newline at end of file
+def biquadratic_interpolation_tiled(image: np.ndarray, scale_factor: float, tile_rows: int) -> np.ndarray:
+    """Біквадратична інтерполяція смугами: у пам'яті лише результат uint8 та одна смуга float64."""
+    target_height, target_width = validate_image(image, scale_factor, f"Біквадратична інтерполяція (смугами по {tile_rows})")
+    upscaled = np.empty((target_height, target_width, image.shape[2]), dtype=np.uint8)
+    for y0, y1 in iter_strips(target_height, tile_rows):
+        upscaled[y0:y1] = resample_biquadratic_rows(image, target_height, target_width, y0, y1)
+    return upscaled
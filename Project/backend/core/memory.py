@@ -0,0 +1,233 @@
+"""
+Бюджет пам'яті воркерів і вимірювання пікової пам'яті завдань.
+
+Перед обробкою завдання оцінює свій піковий обсяг пам'яті за розмірами зображення, набором
+методів і режимом (estimate_peak_bytes) і резервує його з бюджету хоста (MemoryBudget):
+спільного для всіх процесів воркерів на машині, тож кілька великих зображень у prefork-пулі
+не виснажують пам'ять. Якщо оцінка не вміщується, завдання переходить на потайловий режим
+(значно менша пам'ять), чекає звільнення бюджету або завершується помилкою
+MemoryBudgetExceeded з поясненням (reserve_memory).
+
+Резервування зберігаються в Redis (сортована множина на хост, оцінка — час закінчення
+оренди), тож резерв аварійно завершеного процесу звільняється сам. Фактичний пік
+(PeakMemory) повертається в результаті поряд з оцінкою для калібрування коефіцієнтів.
+"""
+import os
+import time
+import socket
+import logging
+from config import MEMORY_BUDGET_MB, MEMORY_WAIT_SECONDS, MEMORY_RESERVATION_TTL, TILE_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Коефіцієнти оцінки (виміряно VmHWM для 1000x1000 - 2000x3000, коефіцієнт 2):
+# цілим зображенням — повнорозмірні масиви аналізу еталону і метрик (градієнти float64, SSIM float32);
+BYTES_PER_PIXEL = 180
+# потайловий режим — лише повнорозмірні uint8 (оригінал, результат, різниця)
+TILED_BYTES_PER_PIXEL = 6
+# плюс масиви однієї смуги (TILE_ROWS рядків з ореолом) на піксель смуги
+TILED_BYTES_PER_STRIP_PIXEL = 280
+# кожен наступний метод: збільшене і різницеве зображення, що чекають кодування
+METHOD_BYTES_PER_PIXEL = 5
+
+_KEY_PREFIX = "upscaler:memory:"
+# Сума резервувань без прострочених; додає нове, якщо воно вміщується в бюджет.
+# Член множини — "<task_id>:<байти>", оцінка — час закінчення оренди.
+_RESERVE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local total = 0
+for _, member in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+    total = total + tonumber(string.match(member, ':(%d+)$'))
+end
+if total + tonumber(ARGV[4]) > tonumber(ARGV[2]) then
+    return -1
+end
+redis.call('ZADD', KEYS[1], ARGV[5], ARGV[3] .. ':' .. ARGV[4])
+return total + tonumber(ARGV[4])
+"""
+
+# Інтервал повторних спроб резервування під час очікування
+_POLL_SECONDS = 0.5
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """Оцінка пам'яті завдання не вміщується в бюджет воркера."""
+
+
+def estimate_peak_bytes(width: int, height: int, methods: int, tile_rows: int = None, overlap: int = 1) -> int:
+    """
+    Оцінка пікової пам'яті обробки зображення (байти понад пам'ять процесу до завдання).
+
+    Args:
+        width (int): Ширина оригіналу.
+        height (int): Висота оригіналу.
+        methods (int): Кількість методів інтерполяції.
+        tile_rows (int): Висота смуги для потайлового режиму або None.
+        overlap (int): Скільки наборів результатів одночасно чекають кодування
+            (2 — розгортка або пакет, де кодування перекривається з наступним кроком).
+    """
+    pixels = width * height
+    if tile_rows:
+        base = TILED_BYTES_PER_PIXEL * pixels + TILED_BYTES_PER_STRIP_PIXEL * tile_rows * width
+    else:
+        base = BYTES_PER_PIXEL * pixels
+    return int(base + METHOD_BYTES_PER_PIXEL * pixels * max(methods * overlap - 1, 0))
+
+
+def default_budget_bytes() -> int:
+    """Бюджет з config (МБ) або, якщо не задано, 75% фізичної пам'яті хоста."""
+    if MEMORY_BUDGET_MB > 0:
+        return MEMORY_BUDGET_MB * 1024 * 1024
+    return int(os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") * 0.75)
+
+
+class MemoryBudget:
+    """Бюджет пам'яті хоста в Redis, спільний для всіх процесів воркерів на ньому."""
+
+    def __init__(self, client, budget_bytes: int = None, host: str = None):
+        self.client = client
+        self.budget_bytes = budget_bytes or default_budget_bytes()
+        self.key = _KEY_PREFIX + (host or socket.gethostname())
+        self._script = client.register_script(_RESERVE_SCRIPT)
+
+    def try_reserve(self, task_id: str, nbytes: int) -> bool:
+        now = time.time()
+        reserved = self._script(keys=[self.key],
+                                args=[now, self.budget_bytes, task_id, nbytes, now + MEMORY_RESERVATION_TTL])
+        return reserved >= 0
+
+    def release(self, task_id: str, nbytes: int) -> None:
+        try:
+            self.client.zrem(self.key, f"{task_id}:{nbytes}")
+        except Exception as e:
+            logger.warning(f"Не вдалося звільнити резерв пам'яті {task_id}: {str(e)}")
+
+
+class MemoryReservation:
+    """
+    Результат reserve_memory. Як контекстний менеджер вимірює фактичний пік пам'яті
+    (PeakMemory) і на виході звільняє бюджет.
+    """
+
+    def __init__(self, budget: MemoryBudget, task_id: str, tile_rows, estimated_bytes: int, wait_seconds: float):
+        self.budget = budget
+        self.task_id = task_id
+        self.tile_rows = tile_rows
+        self.estimated_bytes = estimated_bytes
+        self.wait_seconds = wait_seconds
+        self.peak = PeakMemory()
+
+    def __enter__(self):
+        self.peak.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.peak.__exit__(*exc_info)
+        self.release()
+        return False
+
+    def release(self) -> None:
+        if self.budget is not None:
+            self.budget.release(self.task_id, self.estimated_bytes)
+            self.budget = None
+
+    def report(self) -> dict:
+        """Оцінка, фактичний пік і параметри резервування — для результату завдання."""
+        if self.peak.peak_bytes is not None:
+            logger.info(f"{self.task_id}: пам'ять {self.peak.peak_bytes // 2**20} МБ, "
+                        f"оцінка {self.estimated_bytes // 2**20} МБ")
+        return {
+            "estimated_bytes": self.estimated_bytes,
+            "peak_bytes": self.peak.peak_bytes,
+            "tiled": bool(self.tile_rows),
+            "wait_seconds": self.wait_seconds,
+        }
+
+
+def reserve_memory(client, task_id: str, width: int, height: int, methods: int, tile_rows=None,
+                   allow_tiled: bool = True, overlap: int = 1) -> MemoryReservation:
+    """
+    Резервує пам'ять для обробки: у заданому режимі або, якщо він не вміщується, потайловому;
+    якщо зараз не вміщується жоден — чекає до MEMORY_WAIT_SECONDS.
+
+    Якщо бюджет недоступний (немає Redis), обробка виконується без резервування.
+
+    Returns:
+        MemoryReservation: Вибраний режим (tile_rows) і зарезервований обсяг.
+
+    Raises:
+        MemoryBudgetExceeded: Оцінка більша за весь бюджет або бюджет не звільнився вчасно.
+    """
+    candidates = [tile_rows]
+    if allow_tiled and not tile_rows:
+        candidates.append(TILE_ROWS)
+    estimates = [(rows, estimate_peak_bytes(width, height, methods, rows, overlap)) for rows in candidates]
+
+    try:
+        budget = MemoryBudget(client)
+    except Exception as e:
+        logger.warning(f"Бюджет пам'яті недоступний: {str(e)}")
+        return MemoryReservation(None, task_id, tile_rows, estimates[0][1], 0.0)
+
+    fitting = [(rows, nbytes) for rows, nbytes in estimates if nbytes <= budget.budget_bytes]
+    if not fitting:
+        raise MemoryBudgetExceeded(
+            f"Зображення {width}x{height} потребує щонайменше {min(n for _, n in estimates) // 2**20} МБ, "
+            f"бюджет воркера — {budget.budget_bytes // 2**20} МБ"
+        )
+
+    start = time.monotonic()
+    while True:
+        for rows, nbytes in fitting:
+            try:
+                reserved = budget.try_reserve(task_id, nbytes)
+            except Exception as e:
+                logger.warning(f"Бюджет пам'яті недоступний: {str(e)}")
+                return MemoryReservation(None, task_id, rows, nbytes, 0.0)
+            if reserved:
+                waited = time.monotonic() - start
+                if rows != tile_rows:
+                    logger.info(f"{task_id}: потайловий режим через бюджет пам'яті ({nbytes // 2**20} МБ)")
+                return MemoryReservation(budget, task_id, rows, nbytes, waited)
+        if time.monotonic() - start >= MEMORY_WAIT_SECONDS:
+            raise MemoryBudgetExceeded(
+                f"Недостатньо вільного бюджету пам'яті для {width}x{height} "
+                f"({fitting[-1][1] // 2**20} МБ) протягом {MEMORY_WAIT_SECONDS:g} сек"
+            )
+        time.sleep(_POLL_SECONDS)
+
+
+def _read_status(field: str):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+class PeakMemory:
+    """
+    Пікова пам'ять процесу в межах блоку with (байти понад RSS на початку).
+
+    На Linux пік (VmHWM) скидається на вході через /proc/self/clear_refs; точний для
+    prefork-пулу, де процес виконує одне завдання. Деінде peak_bytes — None.
+    """
+
+    def __init__(self):
+        self.peak_bytes = None
+        self._baseline = None
+
+    def __enter__(self):
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+            self._baseline = _read_status("VmRSS")
+        except OSError:
+            self._baseline = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._baseline is not None:
+            peak = _read_status("VmHWM")
+            self.peak_bytes = max(peak - self._baseline, 0) if peak is not None else None
+        return False
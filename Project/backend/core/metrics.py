@@ -0,0 +1,197 @@
+"""
+Метрики якості відновленого зображення відносно еталону.
+
+compute_metrics рахує різницеве зображення, MSE/PSNR, гістограму помилок, різницю
+градієнтів та SSIM для всього зображення, compute_metrics_tiled — те саме смугами рядків
+(див. core/tiling.py), зводячи їх у ті самі підсумкові значення:
+
+- помилки — один прохід по uint8-різниці (accumulate_errors): 256 цілих лічильників
+  абсолютної помилки (0..255) і підсилене різницеве зображення; MSE (точна ціла сума
+  квадратів / кількість значень), PSNR і максимальна помилка виводяться з гістограми;
+- різниця градієнтів — Собель 3x3 (межі зображення обробляються так само, як у
+  cv2.Sobel для всього зображення);
+- SSIM — як skimage.metrics.structural_similarity(data_range=255, channel_axis=2) з вікном
+  SSIM_WINDOW (core/ssim.py, float32); для всього зображення за MS_SSIM — ще й MS-SSIM.
+
+Для градієнтів і SSIM кожна смуга береться з ореолом у піввікна SSIM; величини, що залежать
+лише від еталону, зберігає ReferenceAnalysis — один раз на завдання для повнорозмірного
+режиму або один раз на смугу для потайлового (MS-SSIM потребує піраміди всього зображення,
+тож у потайловому режимі не рахується).
+"""
+import numpy as np
+import cv2
+from config import SSIM_WINDOW, MS_SSIM
+from core.ssim import SSIMReference, MS_SSIM_SCALES, DATA_RANGE, window_radius
+from core.tiling import iter_strips, with_halo
+from core.timing import StageTimer
+
+# Підсилення різницевого зображення для візуалізації
+DIFF_AMPLIFICATION = 5
+
+# Кількість інтервалів гістограми помилок у результаті
+HIST_BINS = 50
+
+# Максимальна кількість значень на один виклик cv2.calcHist (лічильники float32 точні до 2^24)
+_HIST_CHUNK = 1 << 24
+
+
+def _gradient_magnitude(image: np.ndarray) -> np.ndarray:
+    grad_x = cv2.Sobel(image, cv2.CV_64F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(image, cv2.CV_64F, 0, 1, ksize=3)
+    return np.sqrt(grad_x**2 + grad_y**2)
+
+
+class ReferenceAnalysis:
+    """
+    Величини, що залежать лише від еталонного зображення.
+
+    Будується один раз на завдання (або на смугу у потайловому режимі) і використовується
+    метриками всіх методів: модуль градієнта Собеля (CV_64F), локальні середні та
+    дисперсії для SSIM (на всіх рівнях піраміди, якщо ms_ssim).
+    """
+
+    def __init__(self, reference: np.ndarray, ms_ssim: bool = MS_SSIM):
+        self.image = reference
+        self.gradient_magnitude = _gradient_magnitude(reference)
+        self.ssim_reference = SSIMReference(reference, SSIM_WINDOW, MS_SSIM_SCALES if ms_ssim else 1)
+
+    def gradient_error(self, upscaled: np.ndarray) -> np.ndarray:
+        """Модуль різниці градієнтів еталону та відновленого зображення."""
+        return np.abs(self.gradient_magnitude - _gradient_magnitude(upscaled))
+
+    def ssim_map(self, upscaled: np.ndarray) -> np.ndarray:
+        """Карта SSIM для всіх каналів; статистики еталону беруться з кешу."""
+        return self.ssim_reference.ssim_map(upscaled)
+
+    def ssim(self, upscaled: np.ndarray) -> float:
+        """Середній SSIM (без смуги шириною в піввікна біля країв, як у skimage)."""
+        return self.ssim_reference.ssim(upscaled)
+
+    def ssim_and_ms_ssim(self, upscaled: np.ndarray) -> tuple[float, float]:
+        """SSIM і MS-SSIM (None, якщо аналіз побудовано без піраміди або зображення замале)."""
+        return self.ssim_reference.evaluate(upscaled)
+
+
+def psnr_from_mse(mse_value: float) -> float:
+    """PSNR (дБ) для діапазону 0..255; для ідентичних зображень — нескінченність."""
+    if mse_value == 0:
+        return float("inf")
+    return float(10 * np.log10(DATA_RANGE ** 2 / mse_value))
+
+
+def accumulate_errors(reference: np.ndarray, upscaled: np.ndarray, diff_out: np.ndarray) -> np.ndarray:
+    """
+    Один прохід по різниці: записує підсилене різницеве зображення у diff_out
+    і повертає 256 лічильників абсолютної помилки (int64).
+    """
+    cv2.absdiff(reference, upscaled, dst=diff_out)
+    flat = diff_out.reshape(-1)
+    error_counts = np.zeros(256, dtype=np.int64)
+    for start in range(0, flat.size, _HIST_CHUNK):
+        chunk = flat[start:start + _HIST_CHUNK].reshape(1, -1)
+        error_counts += cv2.calcHist([chunk], [0], None, [256], [0, 256]).ravel().astype(np.int64)
+    cv2.convertScaleAbs(diff_out, dst=diff_out, alpha=DIFF_AMPLIFICATION, beta=0)
+    return error_counts
+
+
+def summarize_errors(error_counts: np.ndarray) -> dict:
+    """MSE, PSNR і максимальна помилка з гістограми абсолютних помилок."""
+    levels = np.arange(error_counts.shape[0], dtype=np.int64)
+    values = int(error_counts.sum())
+    mse_value = int(np.dot(error_counts, levels * levels)) / values
+    observed = np.flatnonzero(error_counts)
+    return {
+        "mse": mse_value,
+        "psnr": psnr_from_mse(mse_value),
+        "max_error": int(observed[-1]) if observed.size else 0,
+        "error_counts": error_counts,
+    }
+
+
+def histogram_bins(error_counts: np.ndarray, bins: int = HIST_BINS) -> dict:
+    """
+    Стискає 256 лічильників помилок до bins інтервалів між мінімальною та максимальною
+    спостереженою помилкою (ті самі інтервали, що й у plt.hist для сирих значень).
+
+    Returns:
+        dict: {"edges": межі інтервалів (bins + 1), "counts": цілі кількості (bins)}.
+    """
+    observed = np.flatnonzero(error_counts)
+    counts, edges = np.histogram(observed, bins=bins, range=(observed.min(), observed.max()),
+                                 weights=error_counts[observed])
+    return {
+        "edges": [round(float(edge), 4) for edge in edges],
+        "counts": [int(count) for count in counts],
+    }
+
+
+def compute_metrics(reference_analysis: ReferenceAnalysis, upscaled: np.ndarray,
+                    timer: StageTimer = None) -> tuple[np.ndarray, dict]:
+    """
+    Обчислює метрики для всього зображення за готовим аналізом еталону.
+
+    Тривалості етапів (metrics.errors, metrics.ssim, metrics.gradient) додаються у timer.
+
+    Returns:
+        tuple[np.ndarray, dict]: Підсилене різницеве зображення та словник з ключами
+        mse, psnr, max_error, error_counts, ssim, ms_ssim (None, якщо не рахувався) і gradient_diff.
+    """
+    timer = timer or StageTimer()
+    diff_image = np.empty_like(upscaled)
+    with timer.span("metrics.errors"):
+        metrics = summarize_errors(accumulate_errors(reference_analysis.image, upscaled, diff_image))
+    with timer.span("metrics.ssim"):
+        metrics["ssim"], metrics["ms_ssim"] = reference_analysis.ssim_and_ms_ssim(upscaled)
+    with timer.span("metrics.gradient"):
+        metrics["gradient_diff"] = float(np.mean(reference_analysis.gradient_error(upscaled)))
+    return diff_image, metrics
+
+
+def compute_metrics_tiled(reference: np.ndarray, upscaled: np.ndarray, tile_rows: int,
+                          timer: StageTimer = None) -> tuple[np.ndarray, dict]:
+    """
+    Обчислює метрики смугами по tile_rows рядків.
+
+    Args:
+        reference (np.ndarray): Еталонне зображення uint8 (H, W, C).
+        upscaled (np.ndarray): Відновлене зображення uint8 того ж розміру.
+        tile_rows (int): Висота смуги.
+        timer (StageTimer): Куди додавати тривалості етапів (сумарно по смугах).
+
+    Returns:
+        tuple[np.ndarray, dict]: Те саме, що й compute_metrics.
+    """
+    timer = timer or StageTimer()
+    height, width, channels = reference.shape
+    pad = window_radius(SSIM_WINDOW)
+
+    diff_image = np.empty_like(reference)
+    error_counts = np.zeros(256, dtype=np.int64)
+    gradient_error_sum = 0.0
+    ssim_sum = 0.0
+
+    for y0, y1 in iter_strips(height, tile_rows):
+        # Різниця та гістограма помилок
+        with timer.span("metrics.errors"):
+            error_counts += accumulate_errors(reference[y0:y1], upscaled[y0:y1], diff_image[y0:y1])
+
+        # Градієнти (ореол 1 рядок) і SSIM (ореол pad рядків) — за аналізом еталону для смуги
+        h0, h1 = with_halo(y0, y1, pad, height)
+        with timer.span("metrics.reference"):
+            analysis = ReferenceAnalysis(reference[h0:h1], ms_ssim=False)
+        with timer.span("metrics.gradient"):
+            gradient_error_sum += float(analysis.gradient_error(upscaled[h0:h1])[y0 - h0:y1 - h0].sum())
+
+        # SSIM: враховуються лише пікселі, віддалені від країв на pad
+        v0, v1 = max(y0, pad), min(y1, height - pad)
+        if v0 < v1:
+            with timer.span("metrics.ssim"):
+                ssim_map = analysis.ssim_map(upscaled[h0:h1])
+                ssim_sum += float(ssim_map[v0 - h0:v1 - h0, pad:width - pad].sum())
+
+    with timer.span("metrics.errors"):
+        metrics = summarize_errors(error_counts)
+    metrics["ssim"] = ssim_sum / ((height - 2 * pad) * (width - 2 * pad) * channels)
+    metrics["ms_ssim"] = None
+    metrics["gradient_diff"] = gradient_error_sum / (height * width * channels)
+    return diff_image, metrics
@@ -0,0 +1,262 @@
+"""
+Сховище метрик обробки (SQLite у режимі WAL).
+
+Один рядок на пару (завдання, метод) у таблиці method_metrics: час обробки, MSE, SSIM, PSNR,
+розміри зображення та коефіцієнт масштабування. У тій самій транзакції оновлюються
+накопичувальні суми в method_totals, тож середні значення без фільтрів читаються з
+кількох рядків незалежно від обсягу історії. Запити з фільтрами (проміжок часу, кількість
+пікселів, коефіцієнт масштабування) рахуються агрегатами SQL за індексами.
+
+Тривалості етапів методу (інтерполяція, окремі метрики, кодування, збереження) лежать у
+method_stage_timings (рядок на етап) із такими самими сумами в method_stage_totals.
+
+WAL дозволяє воркерам писати, поки API читає. З'єднання — одне на потік.
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from config import METRICS_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Скільки останніх значень метрик повертати для графіків
+RECENT_VALUES_LIMIT = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS method_metrics (
+    id INTEGER PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    method TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    pixels INTEGER,
+    scale_factor REAL,
+    processing_time REAL NOT NULL,
+    mse REAL NOT NULL,
+    ssim REAL NOT NULL,
+    psnr REAL,
+    UNIQUE (task_id, method)
+);
+CREATE INDEX IF NOT EXISTS idx_method_metrics_created ON method_metrics (method, created_at);
+CREATE INDEX IF NOT EXISTS idx_method_metrics_pixels ON method_metrics (method, pixels);
+CREATE INDEX IF NOT EXISTS idx_method_metrics_scale ON method_metrics (method, scale_factor);
+CREATE TABLE IF NOT EXISTS method_totals (
+    method TEXT PRIMARY KEY,
+    image_count INTEGER NOT NULL,
+    sum_time REAL NOT NULL,
+    sum_mse REAL NOT NULL,
+    sum_ssim REAL NOT NULL,
+    sum_psnr REAL NOT NULL,
+    psnr_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS method_stage_timings (
+    metrics_id INTEGER NOT NULL REFERENCES method_metrics (id),
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (metrics_id, stage)
+);
+CREATE TABLE IF NOT EXISTS method_stage_totals (
+    method TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    sum_seconds REAL NOT NULL,
+    PRIMARY KEY (method, stage)
+);
+"""
+
+_local = threading.local()
+
+
+def _connection() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        directory = os.path.dirname(METRICS_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(METRICS_DB_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _insert_method_metrics(conn: sqlite3.Connection, task_id: str, method_name: str, processing_time: float,
+                           mse_value: float, ssim_value: float, psnr_value: float, width: int = None,
+                           height: int = None, scale_factor: float = None, created_at: float = None,
+                           stages: dict = None) -> bool:
+    psnr_value = None if psnr_value is None or psnr_value == float("inf") else float(psnr_value)
+    pixels = width * height if width and height else None
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO method_metrics (task_id, method, created_at, width, height, pixels, scale_factor,"
+        " processing_time, mse, ssim, psnr) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (task_id, method_name, created_at or time.time(), width, height, pixels, scale_factor,
+         processing_time, mse_value, ssim_value, psnr_value),
+    )
+    if cursor.rowcount == 0:
+        return False
+    conn.execute(
+        "INSERT INTO method_totals (method, image_count, sum_time, sum_mse, sum_ssim, sum_psnr, psnr_count)"
+        " VALUES (?, 1, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (method) DO UPDATE SET image_count = image_count + 1,"
+        " sum_time = sum_time + excluded.sum_time, sum_mse = sum_mse + excluded.sum_mse,"
+        " sum_ssim = sum_ssim + excluded.sum_ssim, sum_psnr = sum_psnr + excluded.sum_psnr,"
+        " psnr_count = psnr_count + excluded.psnr_count",
+        (method_name, processing_time, mse_value, ssim_value, psnr_value or 0.0, int(psnr_value is not None)),
+    )
+    if stages:
+        conn.executemany(
+            "INSERT INTO method_stage_timings (metrics_id, stage, seconds) VALUES (?, ?, ?)",
+            [(cursor.lastrowid, stage, seconds) for stage, seconds in stages.items()],
+        )
+        conn.executemany(
+            "INSERT INTO method_stage_totals (method, stage, count, sum_seconds) VALUES (?, ?, 1, ?)"
+            " ON CONFLICT (method, stage) DO UPDATE SET count = count + 1,"
+            " sum_seconds = sum_seconds + excluded.sum_seconds",
+            [(method_name, stage, seconds) for stage, seconds in stages.items()],
+        )
+    return True
+
+
+def record_method_metrics(task_id: str, method_name: str, processing_time: float, mse_value: float,
+                          ssim_value: float, psnr_value: float, width: int = None, height: int = None,
+                          scale_factor: float = None, created_at: float = None, stages: dict = None) -> bool:
+    """
+    Додає метрики методу для завдання і оновлює накопичувальні суми.
+
+    PSNR = нескінченність (ідентичні зображення) зберігається як NULL і не входить у середнє.
+    stages — тривалості етапів методу {етап: секунди} (StageTimer.as_dict()).
+
+    Returns:
+        bool: False, якщо запис для (task_id, method_name) уже існує.
+    """
+    conn = _connection()
+    with conn:
+        inserted = _insert_method_metrics(conn, task_id, method_name, processing_time, mse_value, ssim_value,
+                                          psnr_value, width, height, scale_factor, created_at, stages)
+    if inserted:
+        logger.info(f"Збережено метрики {method_name} для {task_id}")
+    return inserted
+
+
+def record_many_metrics(records: list) -> int:
+    """
+    Додає метрики кількох методів і завдань однією транзакцією (пакетна обробка).
+
+    Args:
+        records (list): Словники з аргументами record_method_metrics.
+
+    Returns:
+        int: Кількість доданих записів (наявні пропускаються).
+    """
+    conn = _connection()
+    with conn:
+        inserted = sum(_insert_method_metrics(conn, **record) for record in records)
+    logger.info(f"Збережено метрики: {inserted} з {len(records)}")
+    return inserted
+
+
+def _filters(since: float = None, until: float = None, min_pixels: int = None, max_pixels: int = None,
+             scale_factor: float = None) -> tuple[str, list]:
+    conditions, params = [], []
+    for clause, value in (("created_at >= ?", since), ("created_at < ?", until), ("pixels >= ?", min_pixels),
+                          ("pixels <= ?", max_pixels), ("scale_factor = ?", scale_factor)):
+        if value is not None:
+            conditions.append(clause)
+            params.append(value)
+    return "".join(f" AND {condition}" for condition in conditions), params
+
+
+def _average_stages(conn: sqlite3.Connection, where: str, params: list) -> dict:
+    """Середня тривалість кожного етапу: {метод: {етап: секунди}}."""
+    if not where:
+        rows = conn.execute("SELECT method, stage, sum_seconds / count FROM method_stage_totals").fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT m.method, s.stage, AVG(s.seconds) FROM method_stage_timings s"
+            f" JOIN method_metrics m ON m.id = s.metrics_id WHERE 1 = 1{where} GROUP BY m.method, s.stage",
+            params,
+        ).fetchall()
+    stages = {}
+    for method, stage, seconds in rows:
+        stages.setdefault(method, {})[stage] = seconds
+    return stages
+
+
+def method_throughput(since: float = None) -> dict:
+    """
+    Час обробки на мегапіксель оригіналу за методами (модель вартості, core/routing.py).
+
+    processing_time не містить кодування артефактів (воно завершується після методу, у
+    фоні) і декодування оригіналу в підзадачі, тож їх етапи (encode.*, decode) з
+    method_stage_timings додаються до часу методу.
+
+    Returns:
+        dict: {метод: (секунд на мегапіксель, кількість записів)}; час і пікселі сумуються,
+        тож великі зображення важать більше за малі.
+    """
+    where, params = _filters(since=since)
+    rows = _connection().execute(
+        "SELECT m.method, SUM(m.processing_time + COALESCE(s.seconds, 0)), SUM(m.pixels), COUNT(*)"
+        " FROM method_metrics m LEFT JOIN (SELECT metrics_id, SUM(seconds) AS seconds FROM method_stage_timings"
+        " WHERE stage = 'decode' OR stage LIKE 'encode.%' GROUP BY metrics_id) s ON s.metrics_id = m.id"
+        f" WHERE m.pixels IS NOT NULL{where} GROUP BY m.method", params
+    ).fetchall()
+    return {method: (seconds / pixels * 1e6, count) for method, seconds, pixels, count in rows if pixels}
+
+
+def average_metrics(since: float = None, until: float = None, min_pixels: int = None, max_pixels: int = None,
+                    scale_factor: float = None) -> dict:
+    """
+    Середні час обробки, MSE, SSIM і PSNR за методами.
+
+    Args:
+        since (float): Початок проміжку (Unix-час, включно).
+        until (float): Кінець проміжку (Unix-час, не включно).
+        min_pixels (int): Мінімальна кількість пікселів оригіналу.
+        max_pixels (int): Максимальна кількість пікселів оригіналу.
+        scale_factor (float): Лише завдання з цим коефіцієнтом масштабування.
+
+    Returns:
+        dict: {метод: {avg_time, avg_mse, avg_ssim, avg_psnr, image_count,
+        mse_values, ssim_values, psnr_values, avg_stages}} — у форматі попереднього
+        calculate_avg_times; *_values — останні RECENT_VALUES_LIMIT значень, avg_stages —
+        середня тривалість етапів.
+    """
+    conn = _connection()
+    where, params = _filters(since, until, min_pixels, max_pixels, scale_factor)
+    if not where:
+        # Без фільтрів — готові накопичувальні суми
+        totals = conn.execute(
+            "SELECT method, image_count, sum_time, sum_mse, sum_ssim, sum_psnr, psnr_count FROM method_totals"
+        ).fetchall()
+    else:
+        totals = conn.execute(
+            "SELECT method, COUNT(*), SUM(processing_time), SUM(mse), SUM(ssim), TOTAL(psnr), COUNT(psnr)"
+            f" FROM method_metrics WHERE 1 = 1{where} GROUP BY method", params
+        ).fetchall()
+
+    avg_stages = _average_stages(conn, where, params)
+    avg_stats = {}
+    for method, image_count, sum_time, sum_mse, sum_ssim, sum_psnr, psnr_count in totals:
+        if not image_count:
+            continue
+        recent = conn.execute(
+            f"SELECT mse, ssim, psnr FROM method_metrics WHERE method = ?{where} ORDER BY created_at DESC LIMIT ?",
+            [method, *params, RECENT_VALUES_LIMIT],
+        ).fetchall()
+        avg_stats[method] = {
+            "avg_time": sum_time / image_count,
+            "avg_mse": sum_mse / image_count,
+            "avg_ssim": sum_ssim / image_count,
+            "avg_psnr": sum_psnr / psnr_count if psnr_count else 0,
+            "image_count": image_count,
+            "mse_values": [row[0] for row in recent],
+            "ssim_values": [row[1] for row in recent],
+            "psnr_values": [row[2] for row in recent if row[2] is not None],
+            "avg_stages": avg_stages.get(method, {}),
+        }
+    return avg_stats
@@ -0,0 +1,175 @@
+import time
+import base64
+import logging
+import numpy as np
+import cv2
+from core.metrics import ReferenceAnalysis, compute_metrics, compute_metrics_tiled, histogram_bins
+from core.encoding import submit_artifact
+from core.profiles import resolve_profiles
+from core.metrics_store import record_method_metrics
+from core.timing import StageTimer, megapixels_per_second
+
+logger = logging.getLogger(__name__)
+
+# Мінімальний розмір зменшеного зображення (щоб уникнути помилок у інтерполяції)
+MIN_REDUCED_SIZE = 8
+
+
+def image_bytes(image_base64: str) -> bytes:
+    """Байти файлу з base64 (з префіксом data URI або без)."""
+    if ',' in image_base64:
+        image_base64 = image_base64.split(',')[1]
+    return base64.b64decode(image_base64)
+
+
+def decode_image(image_base64: str) -> np.ndarray:
+    """Декодує PNG у форматі base64 (з префіксом data URI або без) у BGR-масив."""
+    return decode_image_bytes(image_bytes(image_base64))
+
+
+def decode_image_bytes(data: bytes) -> np.ndarray:
+    """Декодує байти PNG у BGR-масив."""
+    np_arr = np.frombuffer(data, np.uint8)
+    image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Не вдалося декодувати зображення")
+    return image
+
+
+def reduce_image(original_image: np.ndarray, scale_factor: float) -> tuple[np.ndarray, int, int]:
+    """
+    Зменшує зображення методом найближчого сусіда у scale_factor разів.
+
+    Returns:
+        tuple[np.ndarray, int, int]: Зменшене зображення, його ширина та висота.
+    """
+    reduction_factor = 1 / scale_factor
+    reduced_height = int(original_image.shape[0] * reduction_factor)
+    reduced_width = int(original_image.shape[1] * reduction_factor)
+
+    if reduced_height < MIN_REDUCED_SIZE or reduced_width < MIN_REDUCED_SIZE:
+        reduced_height = max(MIN_REDUCED_SIZE, reduced_height)
+        reduced_width = max(MIN_REDUCED_SIZE, reduced_width)
+        logger.warning(f"Розмір зменшеного зображення скориговано до {reduced_width}x{reduced_height}, щоб уникнути помилок у інтерполяції.")
+
+    reduced_image = cv2.resize(original_image, (reduced_width, reduced_height), interpolation=cv2.INTER_NEAREST)
+    return reduced_image, reduced_width, reduced_height
+
+
+def process_method(method_name: str, interpolation_func, reduced_image: np.ndarray,
+                   reference_image: np.ndarray, scale_factor: float, task_id: str,
+                   tile_rows: int = None, reference_analysis: ReferenceAnalysis = None,
+                   profiles: dict = None, timer: StageTimer = None, check_cancelled=None) -> dict:
+    """
+    Повний цикл обробки одного методу: інтерполяція, метрики і кодування.
+
+    Не залежить від інших методів, тому може виконуватись як окрема підзадача.
+    Якщо задано tile_rows, метрики рахуються смугами (core/metrics.compute_metrics_tiled)
+    без повнорозмірних проміжних масивів float64. Інакше метрики використовують
+    reference_analysis — спільний для всіх методів аналіз еталону (якщо не передано,
+    будується тут). Зображення кодуються профілями profiles (core/encoding.py) у пулі
+    потоків і записуються у сховище артефактів (core/artifacts.py).
+
+    Тривалості етапів (interpolate, metrics.*) додаються у timer і повертаються у stages;
+    метрики зберігає persist_method_result, коли кодування завершено. check_cancelled()
+    викликається перед метриками і перед кодуванням (core/cancellation.py) і може перервати метод.
+
+    Returns:
+        dict: Результат методу у форматі відповіді process_all_methods; upscaled_image і
+        diff_image — Future, які розгортає core.encoding.collect_artifacts.
+    """
+    timer = timer or StageTimer()
+    start_time = time.time()
+
+    # Збільшення зменшеного зображення назад до оригінального розміру
+    with timer.span("interpolate"):
+        upscaled_image = interpolation_func(reduced_image, scale_factor)
+        if upscaled_image.shape[:2] != reference_image.shape[:2]:
+            upscaled_image = cv2.resize(upscaled_image, (reference_image.shape[1], reference_image.shape[0]), interpolation=cv2.INTER_CUBIC)
+
+    logger.info(f"Діапазон значень upscaled_image ({method_name}): {upscaled_image.min()} - {upscaled_image.max()}")
+    if check_cancelled:
+        check_cancelled()
+
+    # Метрики: різниця, гістограма помилок, MSE/PSNR, градієнти, SSIM
+    if tile_rows:
+        diff_image, metrics = compute_metrics_tiled(reference_image, upscaled_image, tile_rows, timer)
+    else:
+        if reference_analysis is None:
+            with timer.span("metrics.reference"):
+                reference_analysis = ReferenceAnalysis(reference_image)
+        diff_image, metrics = compute_metrics(reference_analysis, upscaled_image, timer)
+    psnr_value, ssim_value, mse_value = metrics["psnr"], metrics["ssim"], metrics["mse"]
+    grad_diff = metrics["gradient_diff"]
+
+    # Гістограма помилок: лише інтервали та кількості, малює клієнт
+    # (PNG за потреби — GET /histogram/{task_id}/{method})
+    with timer.span("metrics.histogram"):
+        error_histogram = histogram_bins(metrics["error_counts"])
+
+    logger.info(f"{method_name}: PSNR = {psnr_value:.2f}, SSIM = {ssim_value:.4f}, MSE = {mse_value:.2f}")
+    if check_cancelled:
+        check_cancelled()
+
+    # Кодування і запис у сховище артефактів — у фоні, паралельно з наступними кроками
+    profiles = resolve_profiles(profiles)
+    upscaled_artifact = submit_artifact(task_id, f"{method_name}_upscaled", upscaled_image, profiles["upscaled"])
+    diff_artifact = submit_artifact(task_id, f"{method_name}_diff", diff_image, profiles["diff"])
+
+    end_time = time.time()
+    processing_time = end_time - start_time
+    stages = timer.as_dict()
+    output_width, output_height = upscaled_image.shape[1], upscaled_image.shape[0]
+    throughput = megapixels_per_second(output_width, output_height, processing_time)
+    interpolate_throughput = megapixels_per_second(output_width, output_height, stages["interpolate"])
+    logger.info(f"{method_name} час обробки: {processing_time:.2f} сек, етапи: "
+                + ", ".join(f"{name} {seconds:.3f}" for name, seconds in stages.items()))
+
+    return {
+        "upscaled_image": upscaled_artifact,
+        "diff_image": diff_artifact,
+        "error_histogram": error_histogram,
+        "upscaled_shape": [upscaled_image.shape[1], upscaled_image.shape[0]],
+        "psnr": float(psnr_value) if not np.isinf(psnr_value) else "infinity",
+        "ssim": float(ssim_value),
+        "ms_ssim": metrics["ms_ssim"],
+        "mse": float(mse_value),
+        "max_error": metrics["max_error"],
+        "gradient_diff": grad_diff,
+        "processing_time": processing_time,
+        "stages": stages,
+        "megapixels_per_second": throughput,
+        "interpolate_megapixels_per_second": interpolate_throughput
+    }
+
+
+def metrics_record(task_id: str, method_name: str, result: dict, width: int, height: int,
+                   scale_factor: float) -> dict:
+    """Аргументи record_method_metrics для результату методу (після collect_artifacts)."""
+    return {
+        "task_id": task_id,
+        "method_name": method_name,
+        "processing_time": result["processing_time"],
+        "mse_value": result["mse"],
+        "ssim_value": result["ssim"],
+        "psnr_value": float("inf") if result["psnr"] == "infinity" else result["psnr"],
+        "width": width,
+        "height": height,
+        "scale_factor": scale_factor,
+        "stages": result["stages"],
+    }
+
+
+def persist_method_result(task_id: str, method_name: str, result: dict, width: int, height: int,
+                          scale_factor: float) -> dict:
+    """
+    Зберігає метрики й тривалості етапів методу у сховище метрик (після collect_artifacts,
+    тож разом з часом кодування) і додає у stages час самого збереження.
+    """
+    start = time.perf_counter()
+    try:
+        record_method_metrics(**metrics_record(task_id, method_name, result, width, height, scale_factor))
+    except Exception as e:
+        logger.error(f"Помилка при збереженні метрик для {method_name}: {str(e)}")
+        raise
+    return {**result, "stages": {**result["stages"], "persist": time.perf_counter() - start}}
@@ -0,0 +1,44 @@
+"""
+Профілі кодування артефактів.
+
+Кожен вид артефакту (зменшене, збільшене, різницеве зображення) кодується своїм профілем:
+
+- png_fast — PNG, рівень стиснення 1 (найшвидший, файл на ~10-20% більший за рівень 9);
+- png_balanced — PNG, рівень 3;
+- png_max — PNG, рівень 9 (попередня поведінка, значно повільніший);
+- webp_lossless — WebP без втрат (зазвичай найменший файл, кодування повільніше за png_fast);
+- skip — не кодувати (клієнту цей артефакт не потрібен).
+
+Модуль не залежить від OpenCV: API перевіряє профілі запиту без імпорту модулів обробки.
+Кодування — core/encoding.py.
+"""
+from config import ENCODING_PROFILES as DEFAULT_PROFILES
+
+# Профіль -> (розширення, рівень стиснення PNG або якість WebP); None — артефакт не створюється
+ENCODING_PROFILES = {
+    "png_fast": (".png", 1),
+    "png_balanced": (".png", 3),
+    "png_max": (".png", 9),
+    "webp_lossless": (".webp", 101),
+    "skip": None,
+}
+
+# Види артефактів, для яких можна задати профіль
+ARTIFACT_KINDS = ("reduced", "upscaled", "diff")
+
+
+def resolve_profiles(overrides: dict = None) -> dict:
+    """
+    Профілі для всіх видів артефактів: значення з config, перевизначені overrides.
+
+    Raises:
+        ValueError: Невідомий вид артефакту або профіль.
+    """
+    profiles = dict(DEFAULT_PROFILES)
+    profiles.update(overrides or {})
+    for kind, profile in profiles.items():
+        if kind not in ARTIFACT_KINDS:
+            raise ValueError(f"Невідомий вид артефакту: {kind}")
+        if profile not in ENCODING_PROFILES:
+            raise ValueError(f"Невідомий профіль кодування: {profile}")
+    return profiles
@@ -0,0 +1,105 @@
+"""
+Push-сповіщення про стан завдань через Redis pub/sub.
+
+Воркер публікує події у канал upscaler:events:<task_id> (publish_event): прогрес — разом з
+update_state, завершення — після того, як результат збережено у бекенді Celery. В API
+працює один підписник на процес (ProgressHub): одне з'єднання з Redis з підпискою на
+шаблон upscaler:events:*, яке розсилає події у черги веб-сокетів відповідного завдання.
+Тож веб-сокети не опитують бекенд результатів, а кількість з'єднань з Redis не залежить
+від кількості клієнтів.
+"""
+import json
+import asyncio
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "upscaler:events:"
+
+# Стани, після яких подій для завдання більше не буде
+TERMINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+
+def channel_name(task_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{task_id}"
+
+
+def publish_event(client, task_id: str, event: dict) -> None:
+    """Публікує подію завдання (синхронний клієнт redis, у воркері). Помилки лише логуються."""
+    try:
+        client.publish(channel_name(task_id), json.dumps(event))
+    except Exception as e:
+        logger.warning(f"Не вдалося опублікувати подію для {task_id}: {str(e)}")
+
+
+class ProgressHub:
+    """Один підписник Redis на процес API, що розсилає події завдань черговим веб-сокетам."""
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self._queues = defaultdict(set)
+        self._task = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        """Черга подій завдання для одного веб-сокета."""
+        queue = asyncio.Queue()
+        self._queues[task_id].add(queue)
+        return queue
+
+    def subscribers(self, task_id: str) -> int:
+        """Кількість веб-сокетів завдання в цьому процесі API."""
+        return len(self._queues.get(task_id, ()))
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        queues = self._queues.get(task_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._queues[task_id]
+
+    async def _listen(self) -> None:
+        import redis.asyncio as redis
+        while True:
+            client = redis.from_url(self.redis_url)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                logger.info("Підписка на події завдань активна")
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Веб-сокети тим часом синхронізуються з бекендом результатів (див. main.py)
+                logger.error(f"Підписку на події завдань втрачено: {str(e)}; повтор через 1 сек")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+    def _dispatch(self, channel: bytes, data: bytes) -> None:
+        task_id = channel.decode()[len(CHANNEL_PREFIX):]
+        queues = self._queues.get(task_id)
+        if not queues:
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            logger.warning(f"Некоректна подія для {task_id}: {data!r}")
+            return
+        for queue in queues:
+            queue.put_nowait(event)
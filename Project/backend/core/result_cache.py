@@ -0,0 +1,108 @@
+"""
+Кеш результатів за вмістом і об'єднання однакових запитів, що вже виконуються.
+
+Ключ — SHA-256 від (версія конвеєра, SHA-256 байтів PNG, коефіцієнт масштабування, набір
+методів, профілі кодування, параметри SSIM). Результат завдання зберігається у Redis
+цілком (це лише URL артефактів і метрики), тож повторний запит обслуговується без
+воркера. Розмір кешу обмежено RESULT_CACHE_MAX_ENTRIES записами: сортована множина з
+часом останнього звернення, найдавніші записи витісняються (LRU).
+
+Поки завдання з певним ключем виконується, ключ «зайнятий» (SET NX з TTL) його task_id,
+і однакові запити отримують той самий task_id замість нового завдання.
+
+API працює з асинхронним клієнтом (AsyncResultCache), воркер — із синхронним
+(store_result, release_inflight).
+"""
+import json
+import time
+import hashlib
+import logging
+from config import PIPELINE_VERSION, RESULT_CACHE_MAX_ENTRIES, INFLIGHT_TTL_SECONDS, SSIM_WINDOW, MS_SSIM
+
+logger = logging.getLogger(__name__)
+
+_ENTRY_PREFIX = "upscaler:cache:entry:"
+_INFLIGHT_PREFIX = "upscaler:cache:inflight:"
+_LRU_KEY = "upscaler:cache:lru"
+
+
+def cache_key(image_digest: str, scale_factor, methods, profiles: dict) -> str:
+    """Ключ кешу для вмісту зображення та параметрів обробки (scale_factor — число або список)."""
+    if isinstance(scale_factor, (list, tuple)):
+        scale_factor = [float(factor) for factor in scale_factor]
+    else:
+        scale_factor = float(scale_factor)
+    params = json.dumps({
+        "version": PIPELINE_VERSION,
+        "image": image_digest,
+        "scale_factor": scale_factor,
+        "methods": sorted(methods),
+        "encoding": profiles,
+        "ssim": {"window": SSIM_WINDOW, "ms_ssim": MS_SSIM},
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+
+def store_result(client, key: str, result: dict) -> None:
+    """Зберігає успішний результат (у воркері) і витісняє найдавніші записи понад ліміт."""
+    try:
+        pipe = client.pipeline()
+        pipe.set(_ENTRY_PREFIX + key, json.dumps(result))
+        pipe.zadd(_LRU_KEY, {key: time.time()})
+        pipe.zcard(_LRU_KEY)
+        size = pipe.execute()[-1]
+        if size > RESULT_CACHE_MAX_ENTRIES:
+            evicted = [k.decode() if isinstance(k, bytes) else k
+                       for k, _ in client.zpopmin(_LRU_KEY, size - RESULT_CACHE_MAX_ENTRIES)]
+            client.delete(*[_ENTRY_PREFIX + k for k in evicted])
+            logger.info(f"Витіснено з кешу результатів: {len(evicted)}")
+    except Exception as e:
+        logger.warning(f"Не вдалося зберегти результат у кеш: {str(e)}")
+
+
+def release_inflight(client, key: str, task_id: str) -> None:
+    """Звільняє ключ, якщо його досі займає task_id (у воркері, після завершення завдання)."""
+    try:
+        inflight_key = _INFLIGHT_PREFIX + key
+        current = client.get(inflight_key)
+        if current is not None and current.decode() == task_id:
+            client.delete(inflight_key)
+    except Exception as e:
+        logger.warning(f"Не вдалося звільнити ключ {key}: {str(e)}")
+
+
+class AsyncResultCache:
+    """Операції кешу на боці API (redis.asyncio)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str):
+        """Збережений результат або None; звернення оновлює позицію запису в LRU."""
+        data = await self.client.get(_ENTRY_PREFIX + key)
+        if data is None:
+            return None
+        await self.client.zadd(_LRU_KEY, {key: time.time()})
+        return json.loads(data)
+
+    async def inflight(self, key: str):
+        """task_id завдання, що виконується з ключем key, або None."""
+        current = await self.client.get(_INFLIGHT_PREFIX + key)
+        return current.decode() if current is not None else None
+
+    async def claim(self, key: str, task_id: str):
+        """
+        Займає ключ для нового завдання.
+
+        Returns:
+            str | None: None, якщо ключ зайнято для task_id; інакше task_id завдання,
+            що вже виконується з тим самим ключем.
+        """
+        inflight_key = _INFLIGHT_PREFIX + key
+        while True:
+            if await self.client.set(inflight_key, task_id, nx=True, ex=INFLIGHT_TTL_SECONDS):
+                return None
+            current = await self.client.get(inflight_key)
+            if current is not None:
+                return current.decode()
+            # Ключ звільнився між SET і GET — пробуємо ще раз
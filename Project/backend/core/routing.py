@@ -0,0 +1,117 @@
+"""
+Оцінка вартості завдань і маршрутизація за класом навантаження.
+
+Вартість завдання — очікуваний час обробки у воркері:
+
+    мегапікселі оригіналу x кількість коефіцієнтів x сума (секунд на мегапіксель методу)
+
+Результат методу приводиться до розміру оригіналу (метрики рахуються в ньому), тож основна
+вартість — SSIM, MS-SSIM і кодування артефактів — пропорційна пікселям оригіналу і майже не
+залежить від коефіцієнта масштабування; коефіцієнт враховується кількістю коефіцієнтів
+розгортки. Секунди на мегапіксель калібруються за сховищем метрик (core/metrics_store.py,
+час методу разом із кодуванням і декодуванням); поки записів методу замало, оцінка будується з його відносної вартості в реєстрі.
+
+Завдання з оцінкою від HEAVY_JOB_SECONDS — важкі. Режими (UPSCALER_ROUTING):
+
+- off — усі завдання в черзі за замовчуванням;
+- priority — одна черга, важкі завдання з нижчим пріоритетом брокера, тож мініатюри
+  не чекають за великими зображеннями;
+- queues — черги fast і heavy для окремих воркерів, напр.:
+      celery -A celery_app worker -Q fast -c 4
+      celery -A celery_app worker -Q heavy,fast -c 1
+"""
+import time
+import logging
+import threading
+from config import (ROUTING_MODE, HEAVY_JOB_SECONDS, COST_MODEL_WINDOW_SECONDS, COST_MODEL_MIN_SAMPLES,
+                    COST_MODEL_TTL)
+from core.methods import INTERPOLATION_METHODS
+from core.metrics_store import method_throughput
+
+logger = logging.getLogger(__name__)
+
+ROUTING_MODES = ("off", "priority", "queues")
+FAST_QUEUE = "fast"
+HEAVY_QUEUE = "heavy"
+# Пріоритети брокера Redis: 0 — найвищий
+WORKLOAD_PRIORITIES = {FAST_QUEUE: 0, HEAVY_QUEUE: 9}
+
+# Оцінка без історії (1500x1000, три методи): метрики й кодування ~0.35 с на мегапіксель
+# для кожного методу, інтерполяція ~0.005 с на мегапіксель на одиницю відносної вартості
+FALLBACK_SECONDS_PER_MEGAPIXEL = 0.35
+FALLBACK_SECONDS_PER_COST_MEGAPIXEL = 0.005
+
+if ROUTING_MODE not in ROUTING_MODES:
+    raise ValueError(f"Невідомий режим маршрутизації: {ROUTING_MODE}. Доступні: {', '.join(ROUTING_MODES)}")
+
+
+class CostModel:
+    """
+    Секунди обробки на мегапіксель оригіналу для кожного методу.
+
+    Args:
+        seconds_per_megapixel (dict): {ключ методу: секунд на мегапіксель} — калібровані значення;
+            для решти методів використовується оцінка з відносної вартості.
+    """
+
+    def __init__(self, seconds_per_megapixel: dict = None):
+        self.calibrated = dict(seconds_per_megapixel or {})
+
+    def method_seconds(self, method) -> float:
+        if method.key in self.calibrated:
+            return self.calibrated[method.key]
+        return FALLBACK_SECONDS_PER_MEGAPIXEL + FALLBACK_SECONDS_PER_COST_MEGAPIXEL * method.cost
+
+    def estimate(self, width: int, height: int, methods: list, scale_factors: int = 1) -> float:
+        """Очікуваний час обробки зображення width x height усіма methods, секунди."""
+        megapixels = width * height / 1e6
+        return megapixels * scale_factors * sum(self.method_seconds(method) for method in methods)
+
+    def as_dict(self) -> dict:
+        return {key: {"seconds_per_megapixel": round(self.method_seconds(method), 4),
+                      "calibrated": key in self.calibrated}
+                for key, method in INTERPOLATION_METHODS.items()}
+
+
+def calibrate() -> CostModel:
+    """Модель за метриками методів за останні COST_MODEL_WINDOW_SECONDS."""
+    calibrated = {}
+    try:
+        throughput = method_throughput(since=time.time() - COST_MODEL_WINDOW_SECONDS)
+    except Exception as e:
+        logger.warning(f"Не вдалося прочитати метрики для моделі вартості: {e}")
+        return CostModel()
+    for method in INTERPOLATION_METHODS.values():
+        seconds, count = throughput.get(method.name, (None, 0))
+        if count >= COST_MODEL_MIN_SAMPLES:
+            calibrated[method.key] = seconds
+    return CostModel(calibrated)
+
+
+_model = None
+_model_expires = 0.0
+_model_lock = threading.Lock()
+
+
+def cost_model() -> CostModel:
+    """Калібрована модель; перечитується зі сховища метрик раз на COST_MODEL_TTL секунд."""
+    global _model, _model_expires
+    with _model_lock:
+        if _model is None or time.monotonic() >= _model_expires:
+            _model = calibrate()
+            _model_expires = time.monotonic() + COST_MODEL_TTL
+        return _model
+
+
+def classify(estimated_seconds: float) -> str:
+    """Клас навантаження: fast або heavy."""
+    return HEAVY_QUEUE if estimated_seconds >= HEAVY_JOB_SECONDS else FAST_QUEUE
+
+
+def route_options(workload: str) -> dict:
+    """Параметри send_task (черга або пріоритет) для класу навантаження в поточному режимі."""
+    if ROUTING_MODE == "queues":
+        return {"queue": workload}
+    if ROUTING_MODE == "priority":
+        return {"priority": WORKLOAD_PRIORITIES[workload]}
+    return {}
@@ -0,0 +1,106 @@
+"""
+Двійкова серіалізація завдань і результатів Celery.
+
+У форматі json зображення в аргументах завдань (image_base64, елементи пакета) — це base64
+всередині JSON, а транспорт Redis додатково кодує тіло повідомлення в base64, тож у черзі
+PNG займає ~1.8 свого розміру. Формат msgpack (TASK_SERIALIZER) кодує повідомлення і
+результати двійково; рядки й байти від PAYLOAD_COMPRESS_MIN_BYTES стискаються кодеком
+PAYLOAD_COMPRESSION і передаються як розширення msgpack (ExtType), решта повідомлення не
+стискається — дрібні завдання і результати не витрачають час на стиснення.
+
+- zstd — ентропійне кодування прибирає надлишок base64: стиснутий рядок зображення займає
+  приблизно стільки, скільки PNG; результати (метрики, гістограми) стискаються в рази;
+- lz4 — у кілька разів швидше, але base64 стискненого PNG майже не зменшує;
+- none — лише msgpack.
+
+Серіалізатор реєструється в kombu (register_serializer) і API, і воркером, а приймаються
+обидва формати (ACCEPT_CONTENT), тож після зміни TASK_SERIALIZER завдання, що вже в черзі,
+і збережені результати читаються. Кодек записано в кожному розширенні, тож декодування не
+залежить від PAYLOAD_COMPRESSION.
+"""
+import lz4.frame
+import msgpack
+import zstandard
+from kombu.serialization import register
+from config import TASK_SERIALIZER, PAYLOAD_COMPRESSION, PAYLOAD_COMPRESS_MIN_BYTES
+
+SERIALIZERS = ("json", "msgpack")
+COMPRESSIONS = ("zstd", "lz4", "none")
+
+# Ім'я і тип вмісту серіалізатора в kombu
+MSGPACK_SERIALIZER = "upscaler-msgpack"
+MSGPACK_CONTENT_TYPE = "application/x-upscaler-msgpack"
+
+# Рівень zstd: 3 — за замовчуванням бібліотеки, вже на рівнях 1-3 base64 стискається майже до
+# розміру вихідних байтів, а вищі рівні помітно повільніші
+ZSTD_LEVEL = 3
+
+# Коди розширень msgpack: стиснуті байти або рядок UTF-8
+_CODECS = {
+    "zstd": (1, 2, lambda data: zstandard.compress(data, ZSTD_LEVEL), zstandard.decompress),
+    "lz4": (3, 4, lz4.frame.compress, lz4.frame.decompress),
+}
+_DECOMPRESS = {}
+for _bytes_code, _str_code, _, _decompress in _CODECS.values():
+    _DECOMPRESS[_bytes_code] = (_decompress, False)
+    _DECOMPRESS[_str_code] = (_decompress, True)
+
+if TASK_SERIALIZER not in SERIALIZERS:
+    raise ValueError(f"Невідомий формат серіалізації: {TASK_SERIALIZER}. Доступні: {', '.join(SERIALIZERS)}")
+if PAYLOAD_COMPRESSION not in COMPRESSIONS:
+    raise ValueError(f"Невідомий кодек стиснення: {PAYLOAD_COMPRESSION}. Доступні: {', '.join(COMPRESSIONS)}")
+
+# Параметри конфігурації Celery (core/task_queue.py)
+CELERY_SERIALIZER = MSGPACK_SERIALIZER if TASK_SERIALIZER == "msgpack" else "json"
+ACCEPT_CONTENT = ["json", MSGPACK_SERIALIZER]
+
+
+class MsgpackCodec:
+    """
+    msgpack зі стисненням великих рядків і байтів.
+
+    Args:
+        compression (str): zstd, lz4 або none.
+        min_bytes (int): Рядки й байти від цього розміру стискаються.
+    """
+
+    def __init__(self, compression: str = PAYLOAD_COMPRESSION, min_bytes: int = PAYLOAD_COMPRESS_MIN_BYTES):
+        self.compression = compression
+        self.min_bytes = min_bytes
+        self._codec = _CODECS.get(compression)
+
+    def _compress(self, value):
+        """Значення з великими рядками й байтами, заміненими на стиснуті розширення msgpack."""
+        if isinstance(value, dict):
+            return {key: self._compress(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._compress(item) for item in value]
+        if isinstance(value, (str, bytes)) and len(value) >= self.min_bytes:
+            bytes_code, str_code, compress, _ = self._codec
+            if isinstance(value, str):
+                return msgpack.ExtType(str_code, compress(value.encode("utf-8")))
+            return msgpack.ExtType(bytes_code, compress(value))
+        return value
+
+    def dumps(self, value) -> bytes:
+        if self._codec:
+            value = self._compress(value)
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes):
+        return msgpack.unpackb(data, raw=False, ext_hook=_decompress_ext, strict_map_key=False)
+
+
+def _decompress_ext(code: int, data: bytes):
+    if code not in _DECOMPRESS:
+        return msgpack.ExtType(code, data)
+    decompress, is_str = _DECOMPRESS[code]
+    value = decompress(data)
+    return value.decode("utf-8") if is_str else value
+
+
+def register_serializer(codec: MsgpackCodec = None) -> None:
+    """Реєструє MSGPACK_SERIALIZER у kombu (кодек за налаштуваннями, якщо не задано)."""
+    codec = codec or MsgpackCodec()
+    register(MSGPACK_SERIALIZER, codec.dumps, codec.loads, content_type=MSGPACK_CONTENT_TYPE,
+             content_encoding="binary")
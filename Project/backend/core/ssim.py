@@ -0,0 +1,188 @@
+"""
+SSIM і багатомасштабний SSIM (MS-SSIM) на роздільних фільтрах OpenCV у float32.
+
+Результат збігається з skimage.metrics.structural_similarity(data_range=255, channel_axis=2)
+у межах ~1e-7 для рівномірного вікна і ~2e-6 для гаусового (перевірка:
+python -m benchmarks.validate_ssim), але:
+
+- усі канали фільтруються разом (cv2.boxFilter / cv2.GaussianBlur для багатоканальних
+  масивів), а не окремим викликом на канал;
+- обчислення у float32 замість float64: значення зсуваються на -128 перед фільтрацією, тож
+  дисперсії (E[x^2] - E[x]^2) рахуються з удвічі меншої величини і похибка float32 лишається
+  значно меншою за константи стабільності C1, C2;
+- локальні середні та дисперсії еталону (SSIMReference) рахуються один раз на завдання і
+  використовуються для всіх методів.
+
+Вікна: uniform — рівномірне 7x7 з вибірковою коваріацією (за замовчуванням skimage),
+gaussian — гаусове 11x11, sigma 1.5, з коваріацією генеральної сукупності
+(gaussian_weights=True, use_sample_covariance=False; як у Wang et al. 2004).
+
+MS-SSIM (Wang, Simoncelli, Bovik 2003) — добуток контрастно-структурних складових на
+MS_SSIM_SCALES масштабах і яскравісної на найгрубшому, зі стандартними вагами. Піраміда
+будується послідовно (кожен рівень — середнє 2x2 попереднього), піраміда еталону та його
+статистики на всіх рівнях рахуються один раз, а найдрібніший рівень спільний зі звичайним
+SSIM, тож MS-SSIM додає лише ~1/3 вартості SSIM. Від'ємні контрастні складові обнуляються
+(дробовий степінь від'ємного числа не визначено).
+"""
+import numpy as np
+import cv2
+
+# Константи стабільності та діапазон значень (за замовчуванням skimage)
+SSIM_K1 = 0.01
+SSIM_K2 = 0.03
+DATA_RANGE = 255
+
+SSIM_WINDOWS = ("uniform", "gaussian")
+UNIFORM_WIN_SIZE = 7
+GAUSSIAN_SIGMA = 1.5
+# Радіус int(3.5 * sigma + 0.5) = 5, як у skimage з gaussian_weights=True
+GAUSSIAN_WIN_SIZE = 11
+
+# Ваги масштабів MS-SSIM (Wang et al. 2003), від найдрібнішого до найгрубшого
+MS_SSIM_WEIGHTS = (0.0448, 0.2856, 0.3001, 0.2363, 0.1333)
+MS_SSIM_SCALES = len(MS_SSIM_WEIGHTS)
+
+# Зсув значень перед фільтрацією (середина діапазону uint8)
+_OFFSET = 128.0
+
+_C1 = (SSIM_K1 * DATA_RANGE) ** 2
+_C2 = (SSIM_K2 * DATA_RANGE) ** 2
+
+
+def window_size(window: str) -> int:
+    """Розмір вікна SSIM (ширина смуги біля країв, що не враховується, — половина)."""
+    if window not in SSIM_WINDOWS:
+        raise ValueError(f"Невідоме вікно SSIM: {window}")
+    return GAUSSIAN_WIN_SIZE if window == "gaussian" else UNIFORM_WIN_SIZE
+
+
+def window_radius(window: str) -> int:
+    return (window_size(window) - 1) // 2
+
+
+def _filter(image: np.ndarray, window: str) -> np.ndarray:
+    """Зважене середнє у вікні (межі — дзеркальне відображення, як mode='reflect' у skimage)."""
+    if window == "gaussian":
+        return cv2.GaussianBlur(image, (GAUSSIAN_WIN_SIZE, GAUSSIAN_WIN_SIZE), GAUSSIAN_SIGMA,
+                                borderType=cv2.BORDER_REFLECT)
+    return cv2.boxFilter(image, -1, (UNIFORM_WIN_SIZE, UNIFORM_WIN_SIZE), normalize=True,
+                         borderType=cv2.BORDER_REFLECT)
+
+
+def _covariance_norm(window: str) -> float:
+    if window == "gaussian":
+        return 1.0
+    window_pixels = UNIFORM_WIN_SIZE ** 2
+    return window_pixels / (window_pixels - 1)
+
+
+def _centered(image: np.ndarray, dtype) -> np.ndarray:
+    centered = image.astype(dtype)
+    centered -= _OFFSET
+    return centered
+
+
+def _downsample(image: np.ndarray) -> np.ndarray:
+    """Наступний рівень піраміди: середнє 2x2 (непарні рядок і стовпець відкидаються)."""
+    height, width = image.shape[0] // 2 * 2, image.shape[1] // 2 * 2
+    return cv2.resize(image[:height, :width], (width // 2, height // 2), interpolation=cv2.INTER_AREA)
+
+
+def pyramid_scales(height: int, width: int, window: str, scales: int = MS_SSIM_SCALES) -> int:
+    """Кількість рівнів піраміди (не більше scales), на найгрубшому з яких вміщується вікно."""
+    size = window_size(window)
+    levels = 1
+    while levels < scales and min(height, width) >> levels >= size:
+        levels += 1
+    return levels
+
+
+class _LevelStats:
+    """Зсунуте зображення одного рівня піраміди та його локальні середні й дисперсії."""
+
+    def __init__(self, centered: np.ndarray, window: str, cov_norm: float):
+        self.centered = centered
+        self.mean = _filter(centered, window)
+        self.variance = _filter(centered * centered, window)
+        self.variance -= self.mean * self.mean
+        self.variance *= cov_norm
+
+
+class SSIMReference:
+    """
+    Статистики еталонного зображення для SSIM і MS-SSIM.
+
+    Args:
+        reference (np.ndarray): Еталон uint8 (H, W) або (H, W, C).
+        window (str): uniform або gaussian.
+        scales (int): Кількість рівнів піраміди; 1 — лише звичайний SSIM.
+        dtype: Тип обчислень (float64 — для перевірки точності).
+    """
+
+    def __init__(self, reference: np.ndarray, window: str = "uniform", scales: int = 1, dtype=np.float32):
+        self.window = window
+        self.dtype = dtype
+        self.radius = window_radius(window)
+        self._cov_norm = _covariance_norm(window)
+        self.levels = []
+        level = _centered(reference, dtype)
+        for index in range(pyramid_scales(reference.shape[0], reference.shape[1], window, scales)):
+            if index:
+                level = _downsample(level)
+            self.levels.append(_LevelStats(level, window, self._cov_norm))
+
+    def _components(self, stats: _LevelStats, upscaled_centered: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Яскравісна та контрастно-структурна складові SSIM одного рівня."""
+        uy = _filter(upscaled_centered, self.window)
+        vy = _filter(upscaled_centered * upscaled_centered, self.window)
+        vy -= uy * uy
+        vy *= self._cov_norm
+        vxy = _filter(stats.centered * upscaled_centered, self.window)
+        vxy -= stats.mean * uy
+        vxy *= self._cov_norm
+
+        ux = stats.mean + _OFFSET
+        uy += _OFFSET
+        luminance = (2 * ux * uy + _C1) / (ux * ux + uy * uy + _C1)
+        contrast_structure = (2 * vxy + _C2) / (stats.variance + vy + _C2)
+        return luminance, contrast_structure
+
+    def _crop_mean(self, values: np.ndarray) -> float:
+        """Середнє без смуги шириною в піввікна біля країв (як у skimage)."""
+        pad = self.radius
+        return float(values[pad:values.shape[0] - pad, pad:values.shape[1] - pad].mean(dtype=np.float64))
+
+    def ssim_map(self, upscaled: np.ndarray) -> np.ndarray:
+        """Карта SSIM для всіх каналів."""
+        luminance, contrast_structure = self._components(self.levels[0], _centered(upscaled, self.dtype))
+        luminance *= contrast_structure
+        return luminance
+
+    def ssim(self, upscaled: np.ndarray) -> float:
+        return self._crop_mean(self.ssim_map(upscaled))
+
+    def evaluate(self, upscaled: np.ndarray) -> tuple[float, float]:
+        """
+        SSIM і MS-SSIM за один прохід піраміди (найдрібніший рівень спільний).
+
+        Returns:
+            tuple[float, float]: (ssim, ms_ssim); ms_ssim — None, якщо піраміда має один рівень.
+        """
+        level = _centered(upscaled, self.dtype)
+        weights = np.asarray(MS_SSIM_WEIGHTS[:len(self.levels)], dtype=np.float64)
+        weights /= weights.sum()
+        ssim_value = ms_ssim_value = None
+        for index, stats in enumerate(self.levels):
+            if index:
+                level = _downsample(level)
+            luminance, contrast_structure = self._components(stats, level)
+            last = index == len(self.levels) - 1
+            if index == 0 or last:
+                value = self._crop_mean(luminance * contrast_structure)
+                if index == 0:
+                    ssim_value = value
+            if not last:
+                value = self._crop_mean(contrast_structure)
+            factor = max(value, 0.0) ** weights[index]
+            ms_ssim_value = factor if ms_ssim_value is None else ms_ssim_value * factor
+        return ssim_value, (float(ms_ssim_value) if len(self.levels) > 1 else None)
@@ -0,0 +1,48 @@
+"""
+Екземпляр Celery та імена завдань.
+
+Завдання визначені в celery_app.py і реєструються на цьому ж екземплярі, тож налаштування
+спільні для API і воркера. API ставить завдання за іменами (send_task) і читає результати
+через цей модуль, не імпортуючи celery_app — а з ним NumPy, OpenCV і SciPy, потрібні
+лише воркеру.
+"""
+from celery import Celery
+from config import REDIS_URL, RESULT_EXPIRES
+from core.serialization import CELERY_SERIALIZER, ACCEPT_CONTENT, register_serializer
+
+register_serializer()
+
+celery_app = Celery(
+    'tasks',
+    broker=REDIS_URL,
+    backend=REDIS_URL
+)
+
+celery_app.conf.update(
+    task_serializer=CELERY_SERIALIZER,
+    accept_content=ACCEPT_CONTENT,
+    result_serializer=CELERY_SERIALIZER,
+    result_accept_content=ACCEPT_CONTENT,
+    # 0 — результати не видаляються
+    result_expires=RESULT_EXPIRES or None,
+    timezone='UTC',
+    enable_utc=True,
+    # Воркер бере з брокера по одному завданню на процес: інакше важкі завдання, вибрані
+    # наперед, чекали б у зайнятому воркері, а не в черзі (core/routing.py)
+    worker_prefetch_multiplier=1,
+    # Черги воркера (-Q fast,heavy) перевіряються в заданому порядку, а не по колу
+    broker_transport_options={'queue_order_strategy': 'priority'},
+)
+
+# Імена завдань (celery_app.py)
+PROCESS_ALL_METHODS = "celery_app.process_all_methods"
+PROCESS_METHOD = "celery_app.process_method_task"
+MERGE_METHOD_RESULTS = "celery_app.merge_method_results"
+MERGE_FAILED = "celery_app.merge_failed"
+PROCESS_BATCH = "celery_app.process_batch"
+WARMUP = "celery_app.warmup"
+
+
+def sweep_key(scale_factor: float) -> str:
+    """Ключ коефіцієнта в результаті розгортки: 2.0 -> "2", 2.5 -> "2.5"."""
+    return f"{float(scale_factor):g}"
@@ -0,0 +1,22 @@
+"""
+Допоміжні функції для потайлової (смугами рядків) обробки великих зображень.
+
+Зображення ділиться на горизонтальні смуги по tile_rows рядків на всю ширину. Операції,
+яким потрібні сусідні рядки (фільтри, інтерполяція), отримують смугу з «ореолом» (halo)
+додаткових рядків з обох боків, а результат для самого ореолу відкидається — тож межі
+смуг не дають швів, а пікова пам'ять залежить від розміру смуги, а не всього зображення.
+"""
+from typing import Iterator
+
+
+def iter_strips(height: int, tile_rows: int) -> Iterator[tuple[int, int]]:
+    """Повертає межі смуг [y0, y1), що покривають рядки 0..height-1."""
+    if tile_rows <= 0:
+        raise ValueError("Розмір смуги має бути позитивним")
+    for y0 in range(0, height, tile_rows):
+        yield y0, min(y0 + tile_rows, height)
+
+
+def with_halo(y0: int, y1: int, halo: int, height: int) -> tuple[int, int]:
+    """Розширює смугу [y0, y1) на halo рядків з кожного боку в межах зображення."""
+    return max(0, y0 - halo), min(height, y1 + halo)
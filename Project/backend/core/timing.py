@@ -0,0 +1,38 @@
+"""
+Вимірювання тривалості етапів обробки.
+
+StageTimer накопичує час іменованих етапів (span) — декодування, зменшення, інтерполяція,
+окремі метрики, кодування, збереження. Повторні виміри етапу з тим самим ім'ям (напр. по
+смугах у потайловому режимі) сумуються. Вкладені етапи іменуються через крапку
+(metrics.ssim), тож їх легко групувати при агрегації.
+"""
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Тривалості іменованих етапів у секундах."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        return dict(self.stages)
+
+
+def megapixels_per_second(width: int, height: int, seconds: float):
+    """Пропускна здатність у мегапікселях за секунду (None, якщо час нульовий)."""
+    if seconds <= 0:
+        return None
+    return width * height / 1e6 / seconds
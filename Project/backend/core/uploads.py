@@ -0,0 +1,195 @@
+"""
+Прийом завантажених зображень без base64 і без декодування в API.
+
+Тіло запиту (сирий PNG або файл з multipart/form-data, що розбирається потоково —
+multipart_file_chunks) потоково записується у файл в UPLOAD_ROOT; по перших 33 байтах перевіряються сигнатура PNG і заголовок IHDR (розміри,
+глибина, тип кольору), тож некоректні або завеликі зображення відхиляються ще до того,
+як тіло прочитано повністю. Заодно рахується SHA-256 вмісту (ключ кешу результатів).
+Воркер отримує лише шлях до файлу.
+"""
+import os
+import struct
+import hashlib
+import asyncio
+import logging
+import tempfile
+from typing import AsyncIterator
+from python_multipart.multipart import MultipartParser, parse_options_header
+from config import UPLOAD_ROOT, MAX_UPLOAD_BYTES, MAX_UPLOAD_PIXELS
+
+logger = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Сигнатура (8) + довжина і тип чанка (8) + дані IHDR (13) + CRC (4)
+PNG_HEADER_SIZE = 33
+
+# Допустимі пари (тип кольору, глибина) за специфікацією PNG
+_PNG_BIT_DEPTHS = {0: {1, 2, 4, 8, 16}, 2: {8, 16}, 3: {1, 2, 4, 8}, 4: {8, 16}, 6: {8, 16}}
+
+
+class UploadTooLarge(ValueError):
+    """Файл або зображення перевищує допустимий розмір."""
+
+
+def check_png_header(header: bytes) -> tuple[int, int]:
+    """
+    Перевіряє сигнатуру PNG і чанк IHDR.
+
+    Args:
+        header (bytes): Щонайменше PNG_HEADER_SIZE перших байтів файлу.
+
+    Returns:
+        tuple[int, int]: Ширина та висота зображення.
+
+    Raises:
+        ValueError: Файл не є коректним PNG.
+        UploadTooLarge: Зображення містить більше MAX_UPLOAD_PIXELS пікселів.
+    """
+    if len(header) < PNG_HEADER_SIZE or not header.startswith(PNG_SIGNATURE):
+        raise ValueError("Непідтримуваний формат зображення. Використовуйте PNG.")
+    length, chunk_type = struct.unpack(">I4s", header[8:16])
+    if length != 13 or chunk_type != b"IHDR":
+        raise ValueError("Пошкоджений PNG: відсутній заголовок IHDR")
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", header[16:26])
+    if width == 0 or height == 0 or bit_depth not in _PNG_BIT_DEPTHS.get(color_type, ()):
+        raise ValueError("Пошкоджений PNG: некоректний заголовок IHDR")
+    if width * height > MAX_UPLOAD_PIXELS:
+        raise UploadTooLarge(f"Зображення {width}x{height} перевищує {MAX_UPLOAD_PIXELS} пікселів")
+    return width, height
+
+
+async def spool_upload(chunks: AsyncIterator[bytes]) -> tuple[str, tuple[int, int], str]:
+    """
+    Записує тіло завантаження у файл, перевіряючи заголовок PNG і розмір на льоту.
+
+    Returns:
+        tuple[str, tuple[int, int], str]: Шлях до файлу, (ширина, висота) зображення
+        і SHA-256 вмісту (hex).
+
+    Raises:
+        ValueError: Файл не є коректним PNG.
+        UploadTooLarge: Перевищено MAX_UPLOAD_BYTES або MAX_UPLOAD_PIXELS.
+    """
+    os.makedirs(UPLOAD_ROOT, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".png", dir=os.path.abspath(UPLOAD_ROOT))
+    header = b""
+    digest = hashlib.sha256()
+    dimensions = None
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(f"Файл перевищує {MAX_UPLOAD_BYTES // (1024 * 1024)} МБ")
+                if dimensions is None:
+                    header += chunk[:PNG_HEADER_SIZE - len(header)]
+                    if len(header) == PNG_HEADER_SIZE:
+                        dimensions = check_png_header(header)
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        if dimensions is None:
+            dimensions = check_png_header(header)
+    except BaseException:
+        discard_upload(path)
+        raise
+    logger.info(f"Завантажено {path}: {size} байт, {dimensions[0]}x{dimensions[1]}")
+    return path, dimensions, digest.hexdigest()
+
+
+class _FilePart:
+    """Стан розбору multipart/form-data: дані файлу з поля field, отримані з останнього блоку тіла."""
+
+    def __init__(self, boundary: bytes, field: str):
+        self.field = field.encode()
+        self.found = False
+        self.complete = False
+        self.pieces = []
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._current = False
+        self.parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        # Поле з тим самим ім'ям без filename — звичайне текстове поле, а не файл
+        self._current = not self.found and options.get(b"name") == self.field and b"filename" in options
+        self.found = self.found or self._current
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._current:
+            self.pieces.append(bytes(data[start:end]))
+
+    def _on_part_end(self):
+        if self._current:
+            self._current = False
+            self.complete = True
+
+
+async def multipart_file_chunks(content_type: str, body: AsyncIterator[bytes],
+                                field: str = "file") -> AsyncIterator[bytes]:
+    """
+    Вміст файлу з поля field тіла multipart/form-data у міру надходження тіла.
+
+    На відміну від Request.form(), форма не буферизується: дані файлу одразу передаються
+    далі (spool_upload), тож завеликий або некоректний файл відхиляється до того, як тіло
+    прочитано повністю; тіло після файлу не читається.
+
+    Raises:
+        ValueError: Некоректне тіло або в ньому немає файлу в полі field.
+    """
+    _, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise ValueError("Відсутня межа (boundary) multipart/form-data")
+    part = _FilePart(boundary, field)
+    async for chunk in body:
+        part.parser.write(chunk)
+        pieces, part.pieces = part.pieces, []
+        for piece in pieces:
+            yield piece
+        if part.complete:
+            return
+    if not part.found:
+        raise ValueError(f"Очікується файл у полі {field}")
+    raise ValueError("Неповне тіло multipart/form-data")
+
+
+def read_upload(path: str) -> bytes:
+    """Читає завантажений файл (у воркері)."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def discard_upload(path: str) -> None:
+    """Видаляє завантажений файл, якщо він ще існує."""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Не вдалося видалити {path}: {str(e)}")
@@ -0,0 +1,83 @@
+"""
+Одноразове перенесення метрик із текстових файлів завдань у сховище метрик.
+
+Раніше воркер дописував times.txt, mse.txt, ssim.txt і psnr.txt у static/results/<task_id>/.
+Скрипт читає їх для кожного завдання і додає рядки в core/metrics_store.py; повторний запуск
+нічого не дублює (запис на пару завдання/метод унікальний).
+
+Використання: python import_metrics.py [каталог_результатів]
+"""
+import os
+import sys
+import logging
+from core.metrics_store import record_method_metrics
+from core.uploads import check_png_header, PNG_HEADER_SIZE
+
+logger = logging.getLogger(__name__)
+
+METRIC_FILES = {"processing_time": "times.txt", "mse": "mse.txt", "ssim": "ssim.txt", "psnr": "psnr.txt"}
+
+
+def _read_metric_file(path: str) -> dict:
+    """{метод: значення} з файлу рядків «метод: значення» (перше значення для методу)."""
+    values = {}
+    if not os.path.exists(path):
+        return values
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                method, value = line.strip().split(": ")
+                values.setdefault(method, float(value))
+            except ValueError as e:
+                logger.warning(f"Помилка у файлі {path}: {line.strip()} - {e}")
+    return values
+
+
+def _original_dimensions(task_dir_path: str):
+    """Розміри original.png із заголовка IHDR, якщо файл є (зберігається з появою сховища артефактів)."""
+    try:
+        with open(os.path.join(task_dir_path, "original.png"), "rb") as f:
+            return check_png_header(f.read(PNG_HEADER_SIZE))
+    except (OSError, ValueError):
+        return None, None
+
+
+def import_results(results_path: str) -> tuple[int, int]:
+    """
+    Імпортує метрики з усіх каталогів завдань.
+
+    Returns:
+        tuple[int, int]: Кількість доданих і пропущених (вже імпортованих або неповних) записів.
+    """
+    imported = skipped = 0
+    for task_id in sorted(os.listdir(results_path)):
+        task_dir_path = os.path.join(results_path, task_id)
+        times_file = os.path.join(task_dir_path, METRIC_FILES["processing_time"])
+        if not os.path.isdir(task_dir_path) or not os.path.exists(times_file):
+            continue
+
+        metrics = {name: _read_metric_file(os.path.join(task_dir_path, file_name))
+                   for name, file_name in METRIC_FILES.items()}
+        width, height = _original_dimensions(task_dir_path)
+        created_at = os.path.getmtime(times_file)
+        for method, processing_time in metrics["processing_time"].items():
+            if method not in metrics["mse"] or method not in metrics["ssim"]:
+                logger.warning(f"Неповні метрики {method} у {task_dir_path}, пропущено")
+                skipped += 1
+                continue
+            added = record_method_metrics(task_id, method, processing_time, metrics["mse"][method],
+                                          metrics["ssim"][method], metrics["psnr"].get(method),
+                                          width=width, height=height, created_at=created_at)
+            imported += added
+            skipped += not added
+    return imported, skipped
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    results_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("static", "results")
+    if not os.path.isdir(results_path):
+        print(f"Папка {results_path} не існує.")
+        sys.exit(1)
+    imported, skipped = import_results(results_path)
+    print(f"Імпортовано записів: {imported}, пропущено: {skipped}")
@@ -1,16 +1,36 @@
 import logging
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from pydantic import BaseModel, validator
+from typing import Dict, List, Optional, Union
 from base64 import b64decode
-from io import BytesIO
-from PIL import Image
 import fastapi
 import uvicorn
 import asyncio
-from fastapi.responses import JSONResponse
-from calculate_avg_times import calculate_avg_times
+from fastapi.responses import JSONResponse, Response
+from fastapi.staticfiles import StaticFiles
+import os
+import hashlib
+from uuid import uuid4
+import redis.asyncio as redis
+from core.metrics_store import average_metrics
+from config import (ARTIFACT_ROOT, ARTIFACT_URL_PREFIX, ARTIFACT_CACHE_MAX_AGE, REDIS_URL, PROGRESS_RESYNC_SECONDS,
+                    RESULT_CACHE_ENABLED, MAX_BATCH_ITEMS, MAX_SWEEP_FACTORS, ROUTING_MODE, HEAVY_JOB_SECONDS,
+                    ADMISSION_ENABLED, ADMISSION_DOWNGRADE, INLINE_MAX_SECONDS, CANCEL_ON_DISCONNECT,
+                    CANCEL_DISCONNECT_GRACE_SECONDS)
+from core.progress import ProgressHub, TERMINAL_STATES
+from core.result_cache import AsyncResultCache, cache_key
+from core.uploads import (spool_upload, multipart_file_chunks, discard_upload, check_png_header, UploadTooLarge,
+                          PNG_HEADER_SIZE)
+# Легкі модулі: API не імпортує NumPy, OpenCV і SciPy (їх завантажують лише воркери, celery_app.py)
+from core.task_queue import celery_app, sweep_key, PROCESS_ALL_METHODS, PROCESS_BATCH
+from core.methods import resolve_methods
+from core.profiles import resolve_profiles
+from core.routing import cost_model, classify, route_options
+from core.admission import AsyncAdmission, AdmissionRejected, admit
+from core.inline import InlinePool, INLINE_WORKLOAD
+from core.cancellation import request_cancel, time_limits, cleanup_options
 
 # Настройка логирования
 logging.basicConfig(
@@ -25,7 +45,18 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Image Upscaler Service")
     logger.info(f"FastAPI version: {fastapi.__version__}")
     logger.info(f"Uvicorn version: {getattr(uvicorn, '__version__', 'unknown')}")
+    # Один підписник на події завдань для всіх веб-сокетів процесу
+    app.state.progress_hub = ProgressHub(REDIS_URL)
+    await app.state.progress_hub.start()
+    app.state.redis = redis.from_url(REDIS_URL)
+    app.state.result_cache = AsyncResultCache(app.state.redis)
+    app.state.admission = AsyncAdmission(app.state.redis)
+    app.state.inline_pool = InlinePool()
+    app.state.inline_pool.start()
     yield
+    app.state.inline_pool.shutdown()
+    await app.state.progress_hub.stop()
+    await app.state.redis.aclose()
     logger.info("Shutting down Image Upscaler Service")
 
 app = FastAPI(lifespan=lifespan)
@@ -38,75 +69,575 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ArtifactFiles(StaticFiles):
+    """Статичні файли артефактів: незмінні, тому з довгим Cache-Control (ETag/304 — від StaticFiles)."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = f"public, max-age={ARTIFACT_CACHE_MAX_AGE}, immutable"
+        return response
+
+os.makedirs(ARTIFACT_ROOT, exist_ok=True)
+app.mount(ARTIFACT_URL_PREFIX, ArtifactFiles(directory=ARTIFACT_ROOT), name="artifacts")
+
 @app.get("/")
 async def root():
     logger.info("Root endpoint accessed")
     return {"message": "Image Upscaler Service is running"}
 
+def _png_size(image_base64: str) -> tuple[int, int]:
+    """Ширина та висота PNG у base64 (декодується лише заголовок)."""
+    prefix = -(-PNG_HEADER_SIZE // 3) * 4
+    return check_png_header(b64decode(image_base64[:prefix])[:PNG_HEADER_SIZE])
+
+def _validate_png_base64(v: str) -> str:
+    try:
+        if ',' in v:
+            v = v.split(',')[1]
+        _png_size(v)
+        return v
+    except Exception as e:
+        raise ValueError(f"Помилка при перевірці формату зображення: {str(e)}")
+
+def _image_digest(image_base64: str) -> str:
+    """SHA-256 вмісту PNG у base64 (ключ кешу результатів); викликається поза циклом подій."""
+    return hashlib.sha256(b64decode(image_base64)).hexdigest()
+
+def _plan(model, sizes: list, methods: list, scale_factors: int = 1) -> tuple[float, str]:
+    """Оцінка в секундах і клас навантаження завдання для зображень sizes ([(ширина, висота)]), core/routing.py."""
+    estimated_seconds = sum(model.estimate(width, height, methods, scale_factors) for width, height in sizes)
+    return estimated_seconds, classify(estimated_seconds)
+
+def _client_id(request: Request) -> str:
+    """Клієнт для лімітів допуску: заголовок X-Client-Id або IP."""
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+
+async def _admit(plans: list, client_id: str) -> tuple[int, Optional[float]]:
+    """
+    Контроль допуску (core/admission.py): індекс прийнятого варіанта з plans і ETA в секундах
+    (None, якщо контроль вимкнено або реєстр недоступний).
+
+    Raises:
+        HTTPException: 429 (ліміт клієнта) або 503 (перевантаження) із заголовком Retry-After.
+    """
+    if not ADMISSION_ENABLED:
+        return 0, None
+    try:
+        backlog = await app.state.admission.backlog()
+    except Exception as e:
+        logger.warning(f"Реєстр незавершених завдань недоступний: {str(e)}")
+        return 0, None
+    try:
+        return admit(backlog, plans, client_id)
+    except AdmissionRejected as e:
+        logger.warning(f"Завдання клієнта {client_id} відхилено ({e.status_code}): {str(e)}")
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def _register(task_id: str, plan: tuple, client_id: str) -> None:
+    """Записує поставлене завдання в реєстр незавершеної роботи."""
+    if not ADMISSION_ENABLED:
+        return
+    try:
+        await app.state.admission.register(task_id, *plan, client_id)
+    except Exception as e:
+        logger.warning(f"Не вдалося записати завдання {task_id} у реєстр: {str(e)}")
+
+def _accepted(task_id: str, plan: tuple, eta: Optional[float]) -> dict:
+    response = {"task_id": task_id, "workload": plan[1], "estimated_seconds": round(plan[0], 2)}
+    if eta is not None:
+        response["eta_seconds"] = round(eta, 2)
+    return response
+
+def _validate_scale_factor(v):
+    if v is not None and not v > 0:
+        raise ValueError("Коефіцієнт масштабування має бути додатним")
+    return v
+
+def _validate_scale_factors(v):
+    if not isinstance(v, list):
+        return _validate_scale_factor(v)
+    for value in v:
+        _validate_scale_factor(value)
+    # Однакові коефіцієнти мали б однаковий ключ у результаті розгортки
+    v = list(dict.fromkeys(v))
+    if not v:
+        raise ValueError("Список коефіцієнтів масштабування порожній")
+    if len(v) > MAX_SWEEP_FACTORS:
+        raise ValueError(f"Розгортка перевищує {MAX_SWEEP_FACTORS} коефіцієнтів")
+    return v
+
+def _validate_algorithm(v):
+    resolve_methods(v)
+    return v
+
+def _validate_encoding(v):
+    resolve_profiles(v)
+    return v
+
 class UpscaleRequest(BaseModel):
     image_base64: str
+    # Список коефіцієнтів — розгортка: усі коефіцієнти в одному завданні, результати в "sweep"
+    scale_factor: Union[float, List[float]]
+    algorithm: str = "all"
+    # Профілі кодування за видами артефактів, напр. {"diff": "skip", "upscaled": "webp_lossless"}
+    encoding: Optional[Dict[str, str]] = None
+    # Під навантаженням завдання можна спростити до найдешевшого методу (core/admission.py)
+    allow_downgrade: bool = True
+
+    _check_encoding = validator('encoding', allow_reuse=True)(_validate_encoding)
+    _check_algorithm = validator('algorithm', allow_reuse=True)(_validate_algorithm)
+    _check_image = validator('image_base64', allow_reuse=True)(_validate_png_base64)
+    _check_scale_factor = validator('scale_factor', allow_reuse=True)(_validate_scale_factors)
+
+class BatchItem(BaseModel):
+    image_base64: str
+    # Якщо не задано — scale_factor пакета
+    scale_factor: Optional[float] = None
+
+    _check_image = validator('image_base64', allow_reuse=True)(_validate_png_base64)
+    _check_scale_factor = validator('scale_factor', allow_reuse=True)(_validate_scale_factor)
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
     scale_factor: float
     algorithm: str = "all"
+    encoding: Optional[Dict[str, str]] = None
+
+    _check_encoding = validator('encoding', allow_reuse=True)(_validate_encoding)
+    _check_algorithm = validator('algorithm', allow_reuse=True)(_validate_algorithm)
+    _check_scale_factor = validator('scale_factor', allow_reuse=True)(_validate_scale_factor)
+
+    @validator('items')
+    def validate_items(cls, v):
+        if not v:
+            raise ValueError("Пакет не містить зображень")
+        if len(v) > MAX_BATCH_ITEMS:
+            raise ValueError(f"Пакет перевищує {MAX_BATCH_ITEMS} зображень")
+        return v
+
+async def _reuse_result(key: str, task_id: str) -> tuple[Optional[dict], Optional[str]]:
+    """
+    Відповідь без нового завдання: результат з кешу (зберігається під task_id) або task_id
+    однакового завдання, що вже виконується.
+
+    Returns:
+        tuple: (відповідь або None, key; None — кеш недоступний).
+    """
+    try:
+        cached = await app.state.result_cache.get(key)
+        if cached is not None:
+            await asyncio.to_thread(celery_app.backend.store_result, task_id, cached, 'SUCCESS')
+            logger.info(f"Результат {key[:12]} узято з кешу: {task_id}")
+            return {"task_id": task_id, "cached": True}, key
+        existing_task_id = await app.state.result_cache.inflight(key)
+        if existing_task_id:
+            logger.info(f"Запит {key[:12]} приєднано до завдання {existing_task_id}")
+            return {"task_id": existing_task_id, "coalesced": True}, key
+    except Exception as e:
+        logger.warning(f"Кеш результатів недоступний: {str(e)}")
+        return None, None
+    return None, key
+
+async def _submit_processing(image_digest: str, size: tuple, scale_factor, encoding: Optional[Dict[str, str]],
+                             client_id: str, image_base64: str = None, image_path: str = None,
+                             algorithm: str = "all", allow_downgrade: bool = True) -> dict:
+    """
+    Ставить process_all_methods у чергу з урахуванням кешу результатів (core/result_cache.py)
+    і контролю допуску (core/admission.py). algorithm — "all" або ключі методів через кому
+    (core/methods.resolve_methods); size — (ширина, висота) оригіналу для оцінки вартості
+    і маршрутизації (core/routing.py). Якщо повне завдання не вміщується в ліміт очікування
+    і allow_downgrade, воно спрощується до найдешевшого з вибраних методів. Завдання з
+    оцінкою до INLINE_MAX_SECONDS виконуються в процесі API (core/inline.py).
+
+    Returns:
+        dict: {"task_id", "workload", "estimated_seconds", "eta_seconds"} нового завдання; для
+        синхронного — workload "inline" і "status", "result" як у повідомленні веб-сокета; з
+        "downgraded" — {"from", "to"} ключі методів, якщо завдання спрощено; з "cached": True —
+        результат узято з кешу і збережено під новим task_id без воркера; з "coalesced": True —
+        task_id однакового завдання, що вже виконується.
+
+    Raises:
+        HTTPException: 429 або 503 з Retry-After — завдання не прийнято.
+    """
+    task_id = str(uuid4())
+    profiles = resolve_profiles(encoding)
+    factors = len(scale_factor) if isinstance(scale_factor, list) else 1
+    model = await asyncio.to_thread(cost_model)
+    variants = [resolve_methods(algorithm)]
+    if ADMISSION_DOWNGRADE and allow_downgrade and len(variants[0]) > 1:
+        variants.append([min(variants[0], key=model.method_seconds)])
+
+    # Кеш і однакові завдання перевіряються до допуску: вони не додають роботи воркерам
+    key = None
+    if RESULT_CACHE_ENABLED:
+        response, key = await _reuse_result(cache_key(image_digest, scale_factor, [m.key for m in variants[0]],
+                                                      profiles), task_id)
+        if response:
+            return response
+
+    plans = [_plan(model, [size], selected, factors) for selected in variants]
+    # Мале завдання виконується в процесі API (core/inline.py) і не займає черги
+    inline = plans[0][0] <= INLINE_MAX_SECONDS and app.state.inline_pool.try_acquire()
+    chosen, eta = (0, None) if inline else await _admit(plans, client_id)
+    methods = [method.key for method in variants[chosen]]
+    downgraded = None
+    if chosen:
+        downgraded = {"from": [method.key for method in variants[0]], "to": methods}
+        logger.info(f"Завдання {task_id} спрощено до {', '.join(methods)}")
+        if key:
+            response, key = await _reuse_result(cache_key(image_digest, scale_factor, methods, profiles), task_id)
+            if response:
+                return {**response, "downgraded": downgraded}
+
+    if key:
+        try:
+            existing_task_id = await app.state.result_cache.claim(key, task_id)
+            if existing_task_id:
+                logger.info(f"Запит {key[:12]} приєднано до завдання {existing_task_id}")
+                if inline:
+                    app.state.inline_pool.release()
+                return {"task_id": existing_task_id, "coalesced": True}
+        except Exception as e:
+            logger.warning(f"Кеш результатів недоступний: {str(e)}")
+            key = None
 
-    @validator('image_base64')
-    def validate_image_format(cls, v):
+    plan = plans[chosen]
+    kwargs = {"encoding": encoding, "image_path": image_path, "cache_key": key, "methods": methods}
+    if inline:
         try:
-            if ',' in v:
-                v = v.split(',')[1]
-            image_data = b64decode(v)
-            image = Image.open(BytesIO(image_data))
-            format = image.format.lower()
-            if format != 'png':
-                raise ValueError("Непідтримуваний формат зображення. Використовуйте PNG.")
-            return v
+            result = await app.state.inline_pool.run(task_id, (image_base64, scale_factor),
+                                                     {**kwargs, "parallel": False})
+            logger.info(f"Завдання {task_id} виконано синхронно")
+            return {"task_id": task_id, "workload": INLINE_WORKLOAD, "estimated_seconds": round(plan[0], 2),
+                    "status": "SUCCESS", "result": result}
         except Exception as e:
-            raise ValueError(f"Помилка при перевірці формату зображення: {str(e)}")
+            logger.warning(f"Синхронна обробка {task_id} не вдалася, завдання передано воркерам: {str(e)}")
+    # Публікація в брокер — блокуючий запит до Redis, тож виконується поза циклом подій
+    await asyncio.to_thread(celery_app.send_task, PROCESS_ALL_METHODS, (image_base64, scale_factor), kwargs,
+                            task_id=task_id, **route_options(plan[1]), **time_limits(plan[0]),
+                            **cleanup_options(key, [image_path]))
+    await _register(task_id, plan, client_id)
+    response = _accepted(task_id, plan, eta)
+    if downgraded:
+        response["downgraded"] = downgraded
+    return response
 
 @app.post("/upscale_all_methods/", response_model=dict)
-async def upscale_all_methods(request: UpscaleRequest):
-    logger.info(f"Received upscale_all_methods request: scale_factor={request.scale_factor}")
-    from celery_app import process_all_methods
-    task = process_all_methods.delay(request.image_base64, request.scale_factor)
-    return {"task_id": task.id}
+async def upscale_all_methods(request: UpscaleRequest, http_request: Request):
+    logger.info(f"Received upscale_all_methods request: scale_factor={request.scale_factor}, "
+                f"algorithm={request.algorithm}")
+    # Декодування і хешування всього зображення — поза циклом подій
+    try:
+        image_digest = await asyncio.to_thread(_image_digest, request.image_base64)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Некоректний base64: {str(e)}")
+    return await _submit_processing(image_digest, _png_size(request.image_base64), request.scale_factor,
+                                    request.encoding, _client_id(http_request), image_base64=request.image_base64,
+                                    algorithm=request.algorithm, allow_downgrade=request.allow_downgrade)
+
+# Розмір блоку при потоковому читанні завантаження
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+async def _multipart_chunks(upload):
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+@app.post("/upload/", response_model=dict)
+async def upload_image(request: Request, scale_factor: Optional[float] = Query(None, gt=0),
+                       scale_factors: Optional[List[float]] = Query(None), algorithm: str = "all",
+                       allow_downgrade: bool = True):
+    """
+    Приймає PNG без base64: сире тіло (Content-Type: image/png) або поле file у
+    multipart/form-data. Тіло пишеться у файл, воркер отримує шлях до нього.
+    Кілька scale_factors (?scale_factors=2&scale_factors=3) — розгортка за коефіцієнтами.
+    """
+    try:
+        _validate_algorithm(algorithm)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if scale_factors:
+        try:
+            scale_factor = _validate_scale_factors(scale_factors)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif scale_factor is None:
+        raise HTTPException(status_code=400, detail="Потрібен scale_factor або scale_factors")
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        chunks = multipart_file_chunks(content_type, request.stream())
+    else:
+        chunks = request.stream()
+
+    try:
+        image_path, (width, height), image_digest = await spool_upload(chunks)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Received upload request: {width}x{height}, scale_factor={scale_factor}")
+    try:
+        response = await _submit_processing(image_digest, (width, height), scale_factor, None, _client_id(request),
+                                            image_path=image_path, algorithm=algorithm,
+                                            allow_downgrade=allow_downgrade)
+    except HTTPException:
+        discard_upload(image_path)
+        raise
+    if response.get("cached") or response.get("coalesced"):
+        discard_upload(image_path)
+    return response
+
+async def _submit_batch(items: list, sizes: list, client_id: str, encoding: Optional[Dict[str, str]] = None,
+                        algorithm: str = "all") -> dict:
+    """
+    Ставить process_batch у чергу; прогрес і результати елементів — у /ws/task/{batch_id}.
+    sizes — (ширина, висота) елементів; клас навантаження і допуск пакета — за сумарною
+    вартістю (пакет не спрощується).
+
+    Raises:
+        HTTPException: 429 або 503 з Retry-After — пакет не прийнято.
+    """
+    batch_id = str(uuid4())
+    selected = resolve_methods(algorithm)
+    methods = [method.key for method in selected]
+    plan = _plan(await asyncio.to_thread(cost_model), sizes, selected)
+    _, eta = await _admit([plan], client_id)
+    await asyncio.to_thread(celery_app.send_task, PROCESS_BATCH, (items,), {"encoding": encoding, "methods": methods},
+                            task_id=batch_id, **route_options(plan[1]), **time_limits(plan[0]),
+                            **cleanup_options(uploads=[item.get("image_path") for item in items]))
+    await _register(batch_id, plan, client_id)
+    logger.info(f"Пакет {batch_id}: {len(items)} зображень, {plan[1]}, ~{plan[0]:.1f} с")
+    response = _accepted(batch_id, plan, eta)
+    del response["task_id"]
+    return {"batch_id": batch_id, "items": len(items), **response}
+
+@app.post("/upscale_batch/", response_model=dict)
+async def upscale_batch(request: BatchRequest, http_request: Request):
+    """Пакет зображень у base64 з необов'язковими коефіцієнтами масштабування для кожного."""
+    items = [{"image_base64": item.image_base64, "scale_factor": item.scale_factor or request.scale_factor}
+             for item in request.items]
+    sizes = [_png_size(item.image_base64) for item in request.items]
+    return await _submit_batch(items, sizes, _client_id(http_request), request.encoding, request.algorithm)
+
+@app.post("/upload_batch/", response_model=dict)
+async def upload_batch(request: Request, scale_factor: float = Query(gt=0), scale_factors: Optional[str] = None,
+                       algorithm: str = "all"):
+    """
+    Пакет PNG-файлів у полі files (multipart/form-data), без base64. scale_factors —
+    необов'язкові коефіцієнти для кожного файлу через кому (інакше — scale_factor).
+    """
+    try:
+        _validate_algorithm(algorithm)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    form = await request.form()
+    uploads = [upload for upload in form.getlist("files") if not isinstance(upload, str)]
+    if not uploads:
+        raise HTTPException(status_code=400, detail="Очікуються файли у полі files")
+    if len(uploads) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Пакет перевищує {MAX_BATCH_ITEMS} зображень")
+    factors = [scale_factor] * len(uploads)
+    if scale_factors:
+        try:
+            factors = [_validate_scale_factor(float(value)) for value in scale_factors.split(",")]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некоректний scale_factors")
+        if len(factors) != len(uploads):
+            raise HTTPException(status_code=400, detail="Кількість scale_factors не збігається з кількістю файлів")
+
+    items = []
+    sizes = []
+    try:
+        for upload, factor in zip(uploads, factors):
+            image_path, size, _ = await spool_upload(_multipart_chunks(upload))
+            items.append({"image_path": image_path, "scale_factor": factor})
+            sizes.append(size)
+    except ValueError as e:
+        for item in items:
+            discard_upload(item["image_path"])
+        status_code = 413 if isinstance(e, UploadTooLarge) else 400
+        raise HTTPException(status_code=status_code, detail=f"{upload.filename}: {str(e)}")
+    try:
+        return await _submit_batch(items, sizes, _client_id(request), algorithm=algorithm)
+    except HTTPException:
+        for item in items:
+            discard_upload(item["image_path"])
+        raise
+
+def _task_state_message(task_id: str) -> dict:
+    """Поточний стан завдання з бекенду результатів у форматі повідомлення веб-сокета."""
+    task = celery_app.AsyncResult(task_id)
+    state = task.state
+    if state == 'SUCCESS':
+        logger.info(f"Task {task_id} is SUCCESS")
+        return {"status": "SUCCESS", "result": task.result}
+    elif state == 'FAILURE':
+        logger.info(f"Task {task_id} is FAILURE: {str(task.result)}")
+        return {"status": "FAILURE", "error": str(task.result)}
+    elif state == 'PROGRESS':
+        info = task.info if isinstance(task.info, dict) else {}
+        message = {"status": "PROGRESS", "progress": info.get('progress', 0), "method": info.get('method')}
+        # Пакетна обробка: поточний елемент і, якщо він завершився, його результат
+        message.update({key: info[key] for key in ("item", "item_status", "item_result", "scale_factor")
+                        if key in info})
+        return message
+    return {"status": state}
+
+async def _cancel_task(task_id: str) -> None:
+    """
+    Скасовує завдання (core/cancellation.py): позначка для розпочатого завдання, відкликання
+    в Celery для ще не розпочатого і видалення з реєстру незавершеної роботи.
+    """
+    await request_cancel(app.state.redis, task_id)
+    await asyncio.to_thread(celery_app.control.revoke, task_id)
+    try:
+        await app.state.admission.release(task_id)
+    except Exception as e:
+        logger.warning(f"Не вдалося звільнити запис завдання {task_id}: {str(e)}")
+    logger.info(f"Завдання {task_id} скасовано")
+
+async def _queued(task_id: str) -> bool:
+    """
+    Чи стоїть у черзі завдання без стану в бекенді (PENDING): за реєстром незавершеної
+    роботи. Без реєстру (контроль допуску вимкнено або Redis недоступний) невідоме
+    завдання не відрізнити від поставленого, тож вважається поставленим.
+    """
+    if not ADMISSION_ENABLED:
+        return True
+    try:
+        return await app.state.admission.registered(task_id)
+    except Exception as e:
+        logger.warning(f"Реєстр незавершених завдань недоступний: {str(e)}")
+        return True
+
+@app.delete("/task/{task_id}", status_code=202)
+async def cancel_task(task_id: str):
+    """
+    Скасовує завдання; розпочате зупиняється між етапами і методами з {"status": "cancelled"}.
+    404 — завдання невідоме або його запис уже прострочено, 409 — завдання завершено.
+    """
+    state = await asyncio.to_thread(lambda: celery_app.AsyncResult(task_id).state)
+    if state in TERMINAL_STATES:
+        raise HTTPException(status_code=409, detail=f"Завдання вже завершено ({state})")
+    if state == "PENDING" and not await _queued(task_id):
+        raise HTTPException(status_code=404, detail="Завдання не знайдено")
+    await _cancel_task(task_id)
+    return {"task_id": task_id, "status": "cancelling"}
+
+# Відкладені перевірки покинутих завдань (посилання, щоб asyncio не зібрав їх до завершення)
+_abandoned_checks = set()
+
+def _watch_abandoned(task_id: str) -> None:
+    """Скасовує завдання, якщо за CANCEL_DISCONNECT_GRACE_SECONDS ніхто не підключився знову."""
+    async def check():
+        await asyncio.sleep(CANCEL_DISCONNECT_GRACE_SECONDS)
+        if app.state.progress_hub.subscribers(task_id):
+            return
+        state = await asyncio.to_thread(lambda: celery_app.AsyncResult(task_id).state)
+        if state not in TERMINAL_STATES:
+            logger.info(f"Останній веб-сокет завдання {task_id} відключився")
+            await _cancel_task(task_id)
+
+    check_task = asyncio.create_task(check())
+    _abandoned_checks.add(check_task)
+    check_task.add_done_callback(_abandoned_checks.discard)
 
 @app.websocket("/ws/task/{task_id}")
 async def websocket_task_status(websocket: WebSocket, task_id: str):
+    """
+    Надсилає стан завдання: спершу поточний з бекенду результатів, далі — події з
+    ProgressHub у міру надходження. Бекенд результатів читається лише на старті, після
+    події завершення (за самим результатом) і якщо подій немає PROGRESS_RESYNC_SECONDS.
+    """
     await websocket.accept()
+    hub = websocket.app.state.progress_hub
+    message = {}
+    # Підписка до читання поточного стану, щоб не пропустити подій між ними
+    queue = hub.subscribe(task_id)
     try:
-        while True:
-            from celery_app import celery_app
-            task = celery_app.AsyncResult(task_id)
-            if task.state == 'SUCCESS':
-                logger.info(f"Task {task_id} is SUCCESS")
-                await websocket.send_json({"status": "SUCCESS", "result": task.result})
-                break
-            elif task.state == 'FAILURE':
-                logger.info(f"Task {task_id} is FAILURE: {str(task.result)}")
-                await websocket.send_json({"status": "FAILURE", "error": str(task.result)})
-                break
-            elif task.state == 'PROGRESS':
-                progress = task.info.get('progress', 0) if isinstance(task.info, dict) else 0
-                await websocket.send_json({"status": "PROGRESS", "progress": progress})
-            elif task.state == 'PENDING':
-                await websocket.send_json({"status": "PENDING"})
+        message = await asyncio.to_thread(_task_state_message, task_id)
+        await websocket.send_json(message)
+        while message["status"] not in TERMINAL_STATES:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=PROGRESS_RESYNC_SECONDS)
+            except asyncio.TimeoutError:
+                event = None
+            if event is None or event["status"] in TERMINAL_STATES:
+                message = await asyncio.to_thread(_task_state_message, task_id)
             else:
-                await websocket.send_json({"status": task.state})
-            await asyncio.sleep(0.5)
+                message = event
+            await websocket.send_json(message)
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for task {task_id}")
     except Exception as e:
         logger.error(f"WebSocket error for task {task_id}: {str(e)}")
     finally:
+        hub.unsubscribe(task_id, queue)
+        if CANCEL_ON_DISCONNECT and message.get("status") not in TERMINAL_STATES and not hub.subscribers(task_id):
+            _watch_abandoned(task_id)
         try:
             await websocket.close()
         except RuntimeError as e:
             logger.warning(f"Error closing WebSocket for task {task_id}: {str(e)}")
 
+@app.get("/histogram/{task_id}/{method_name}")
+def get_error_histogram(task_id: str, method_name: str, scale_factor: Optional[float] = None):
+    """
+    PNG гістограми помилок методу; малюється на вимогу з інтервалів у результаті завдання.
+    Для розгортки за коефіцієнтами scale_factor вибирає коефіцієнт.
+    """
+    task = celery_app.AsyncResult(task_id)
+    if task.state != 'SUCCESS' or not isinstance(task.result, dict):
+        return JSONResponse(content={"status": "error", "error": "Результат завдання недоступний"}, status_code=404)
+    section = task.result
+    if scale_factor is not None and "sweep" in task.result:
+        section = task.result["sweep"].get(sweep_key(scale_factor), {})
+    method_result = section.get("results", {}).get(method_name)
+    if not isinstance(method_result, dict) or "error_histogram" not in method_result:
+        return JSONResponse(content={"status": "error", "error": f"Немає гістограми для методу {method_name}"}, status_code=404)
+
+    # matplotlib завантажується лише під час першого запиту гістограми
+    from utils.plotting import render_histogram_png
+    histogram = method_result["error_histogram"]
+    png = render_histogram_png(method_name, histogram["edges"], histogram["counts"])
+    return Response(content=png, media_type="image/png", headers={"Cache-Control": "public, max-age=86400"})
+
 @app.get("/average_times/")
-async def get_average_times():
+async def get_average_times(since: Optional[float] = None, until: Optional[float] = None,
+                            min_pixels: Optional[int] = None, max_pixels: Optional[int] = None,
+                            scale_factor: Optional[float] = None):
+    """
+    Середні метрики за методами зі сховища метрик. Фільтри: since/until — Unix-час,
+    min_pixels/max_pixels — розмір оригіналу в пікселях, scale_factor — коефіцієнт масштабування.
+    """
     try:
-        avg_times = calculate_avg_times()
+        avg_times = await asyncio.to_thread(average_metrics, since, until, min_pixels, max_pixels, scale_factor)
         return JSONResponse(content={"status": "success", "average_times": avg_times})
     except Exception as e:
         logger.error(f"Помилка при підрахунку середнього часу: {str(e)}")
-        return JSONResponse(content={"status": "error", "error": str(e)}, status_code=500)
\ No newline at end of file
+        return JSONResponse(content={"status": "error", "error": str(e)}, status_code=500)
+
+
+@app.get("/cost_model/")
+async def get_cost_model():
+    """Модель вартості маршрутизації: режим, поріг важких завдань і секунди на мегапіксель методів."""
+    model = await asyncio.to_thread(cost_model)
+    return {"mode": ROUTING_MODE, "heavy_job_seconds": HEAVY_JOB_SECONDS, "methods": model.as_dict()}
+
+
+# Через скільки секунд повторити запит /queue/, якщо реєстр незавершених завдань недоступний
+QUEUE_RETRY_AFTER_SECONDS = 5
+
+@app.get("/queue/")
+async def get_queue():
+    """
+    Незавершені завдання (core/admission.py): кількість, сумарні оцінки і очікування за класами навантаження.
+    503 з Retry-After — реєстр (Redis) недоступний.
+    """
+    try:
+        backlog = await app.state.admission.backlog()
+    except Exception as e:
+        logger.warning(f"Реєстр незавершених завдань недоступний: {str(e)}")
+        raise HTTPException(status_code=503, detail="Реєстр незавершених завдань недоступний",
+                            headers={"Retry-After": str(QUEUE_RETRY_AFTER_SECONDS)})
+    return backlog.as_dict()
@@ -0,0 +1,45 @@
+"""Сепарабельний біквадратичний рушій (core/biquadratic.py) проти RectBivariateSpline і потайловий режим."""
+import numpy as np
+import pytest
+from core.biquadratic import resample_biquadratic, resample_biquadratic_spline, TILE_HALO
+from core.interpolation import biquadratic_interpolation, biquadratic_interpolation_tiled
+
+# Допустиме відхилення від сплайнового варіанту (рівні яскравості, див. core/biquadratic.py)
+TOLERANCE = 1
+
+
+def random_image(height: int, width: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("height, width, scale", [
+    (3, 3, 2.0),
+    (3, 3, 1.7),
+    (3, 5, 3.0),
+    (7, 11, 1.7),
+    (16, 9, 2.5),
+    (40, 31, 0.6),
+    (64, 48, 4.0),
+])
+def test_matches_rect_bivariate_spline(height, width, scale):
+    image = random_image(height, width)
+    target_height, target_width = int(height * scale), int(width * scale)
+    expected = resample_biquadratic_spline(image, target_height, target_width)
+    actual = resample_biquadratic(image, target_height, target_width)
+    assert actual.shape == expected.shape == (target_height, target_width, 3)
+    assert actual.dtype == np.uint8
+    diff = np.abs(actual.astype(np.int16) - expected.astype(np.int16))
+    assert diff.max() <= TOLERANCE
+
+
+@pytest.mark.parametrize("height, width, scale, tile_rows", [
+    (3, 3, 1.7, 1),
+    (25, 17, 2.0, 7),
+    (60, 40, 1.7, 16),
+    # Смуги, вужчі за ореол, і висота, не кратна смузі
+    (4 * TILE_HALO + 3, 20, 3.0, TILE_HALO // 2),
+])
+def test_tiled_equals_full(height, width, scale, tile_rows):
+    image = random_image(height, width, seed=1)
+    np.testing.assert_array_equal(biquadratic_interpolation_tiled(image, scale, tile_rows),
+                                  biquadratic_interpolation(image, scale))
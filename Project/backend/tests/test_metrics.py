@@ -0,0 +1,58 @@
+"""Потайлові метрики (core/metrics.py) проти повнорозмірних і рушій SSIM (core/ssim.py) проти skimage."""
+import numpy as np
+import pytest
+from skimage.metrics import structural_similarity
+from core.metrics import ReferenceAnalysis, compute_metrics, compute_metrics_tiled
+from core.ssim import SSIMReference, DATA_RANGE
+
+# Допустиме абсолютне відхилення SSIM (обчислення у float32) і середньої різниці градієнтів
+SSIM_TOLERANCE = 1e-5
+GRADIENT_TOLERANCE = 1e-9
+
+
+def random_image(height: int, width: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def degraded(image: np.ndarray, seed: int = 1) -> np.ndarray:
+    """Зображення, схоже на результат методу: еталон з невеликим шумом."""
+    noise = np.random.default_rng(seed).integers(-12, 13, image.shape, dtype=np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("height, width, tile_rows", [
+    (20, 17, 1),
+    (33, 40, 7),
+    (64, 48, 16),
+    (50, 30, 50),
+])
+def test_tiled_equals_full(height, width, tile_rows):
+    reference = random_image(height, width)
+    upscaled = degraded(reference)
+    full_diff, full = compute_metrics(ReferenceAnalysis(reference, ms_ssim=False), upscaled)
+    tiled_diff, tiled = compute_metrics_tiled(reference, upscaled, tile_rows)
+
+    np.testing.assert_array_equal(tiled_diff, full_diff)
+    np.testing.assert_array_equal(tiled["error_counts"], full["error_counts"])
+    assert tiled["mse"] == full["mse"]
+    assert tiled["psnr"] == full["psnr"]
+    assert tiled["max_error"] == full["max_error"]
+    assert tiled["gradient_diff"] == pytest.approx(full["gradient_diff"], rel=0, abs=GRADIENT_TOLERANCE)
+    assert tiled["ssim"] == pytest.approx(full["ssim"], rel=0, abs=SSIM_TOLERANCE)
+    assert tiled["ms_ssim"] is None
+
+
+@pytest.mark.parametrize("window", ["uniform", "gaussian"])
+@pytest.mark.parametrize("height, width", [(24, 24), (37, 53), (96, 80)])
+def test_ssim_matches_skimage(window, height, width):
+    reference = random_image(height, width)
+    upscaled = degraded(reference)
+    gaussian = window == "gaussian"
+    expected = structural_similarity(reference, upscaled, data_range=DATA_RANGE, channel_axis=2,
+                                     gaussian_weights=gaussian, use_sample_covariance=not gaussian)
+    assert SSIMReference(reference, window).ssim(upscaled) == pytest.approx(expected, rel=0, abs=SSIM_TOLERANCE)
+
+
+def test_ssim_identical_images():
+    reference = random_image(32, 32)
+    assert SSIMReference(reference).ssim(reference) == pytest.approx(1.0, rel=0, abs=SSIM_TOLERANCE)
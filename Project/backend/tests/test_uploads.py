@@ -0,0 +1,108 @@
+"""Потоковий прийом multipart/form-data (core/uploads.py) і POST /upload/ без буферизації тіла."""
+import os
+import asyncio
+import importlib
+import struct
+import zlib
+import pytest
+import core.uploads
+from core.uploads import multipart_file_chunks
+
+BOUNDARY = "upscaler-test-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+# Розмір блоку тіла, яким сервер передає запит застосунку
+BODY_CHUNK = 64 * 1024
+
+
+def png_bytes(width: int = 4, height: int = 3, padding: int = 0) -> bytes:
+    """Мінімальний PNG (RGB) з коректним IHDR; padding — зайві байти після IEND."""
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    rows = b"".join(b"\x00" + b"\x80" * (width * 3) for _ in range(height))
+    image = (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+             + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+    return image + b"\x00" * padding
+
+
+def multipart_body(data: bytes, field: str = "file") -> bytes:
+    return (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nпідпис\r\n"
+            f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"image.png\"\r\n"
+            f"Content-Type: image/png\r\n\r\n").encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def iterate(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.parametrize("size", [1, 7, BODY_CHUNK])
+def test_multipart_file_chunks(size):
+    data = png_bytes(padding=5000)
+    assert asyncio.run(collect(multipart_file_chunks(CONTENT_TYPE, iterate(multipart_body(data), size)))) == data
+
+
+@pytest.mark.parametrize("body", [
+    multipart_body(png_bytes(), field="other"),
+    multipart_body(png_bytes())[:-40],
+])
+def test_multipart_without_complete_file(body):
+    with pytest.raises(ValueError):
+        asyncio.run(collect(multipart_file_chunks(CONTENT_TYPE, iterate(body, BODY_CHUNK))))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # main.py пише журнал у logs/app.log і створює каталог артефактів відносно робочого каталогу
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("logs")
+    monkeypatch.setattr(core.uploads, "UPLOAD_ROOT", str(tmp_path / "uploads"))
+    monkeypatch.setattr(core.uploads, "MAX_UPLOAD_BYTES", 256 * 1024)
+    return importlib.import_module("main").app
+
+
+def post_upload(app, body: bytes) -> tuple[int, int]:
+    """Надсилає тіло застосунку блоками BODY_CHUNK; повертає код відповіді і кількість прочитаних блоків."""
+    chunks = [body[start:start + BODY_CHUNK] for start in range(0, len(body), BODY_CHUNK)]
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/upload/", "raw_path": b"/upload/", "root_path": "",
+             "query_string": b"scale_factor=2", "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+             "headers": [(b"content-type", CONTENT_TYPE.encode()), (b"content-length", str(len(body)).encode())]}
+    received = 0
+    status = None
+
+    async def receive():
+        nonlocal received
+        if received == len(chunks):
+            return {"type": "http.disconnect"}
+        received += 1
+        return {"type": "http.request", "body": chunks[received - 1], "more_body": received < len(chunks)}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    asyncio.run(app(scope, receive, send))
+    return status, received
+
+
+def test_oversized_multipart_rejected_before_body_is_read(app, tmp_path):
+    body = multipart_body(png_bytes(padding=4 * 1024 * 1024))
+    status, received = post_upload(app, body)
+    total = -(-len(body) // BODY_CHUNK)
+    assert status == 413
+    # Прочитано лише стільки блоків, скільки потрібно, щоб перевищити MAX_UPLOAD_BYTES
+    assert received <= core.uploads.MAX_UPLOAD_BYTES // BODY_CHUNK + 2 < total
+    assert not os.listdir(tmp_path / "uploads")
+
+
+def test_invalid_multipart_file_rejected_before_body_is_read(app):
+    body = multipart_body(b"GIF89a" + b"\x00" * (4 * 1024 * 1024))
+    status, received = post_upload(app, body)
+    assert status == 400
+    assert received == 1
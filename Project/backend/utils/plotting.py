@@ -0,0 +1,35 @@
+"""
+Серверне малювання гістограми помилок у PNG.
+
+Використовується лише ендпоінтом GET /histogram/{task_id}/{method} і імпортується ліниво,
+тож matplotlib не завантажується ні воркером, ні API, доки PNG не запитано. Ендпоінт
+виконується в пулі потоків FastAPI, тож фігура будується через об'єктний API (Figure і
+FigureCanvasAgg), а не через глобальний стан pyplot, який не є потокобезпечним.
+"""
+from io import BytesIO
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+def render_histogram_png(method_name: str, edges: list, counts: list) -> bytes:
+    """
+    Малює гістограму помилок за готовими інтервалами.
+
+    Args:
+        method_name (str): Назва методу (для заголовка).
+        edges (list): Межі інтервалів (len(counts) + 1).
+        counts (list): Кількість значень в інтервалах.
+
+    Returns:
+        bytes: Зображення PNG.
+    """
+    fig = Figure()
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.hist(edges[:-1], bins=edges, weights=counts, color='red', alpha=0.7)
+    ax.set_title(f'Гістограма помилок - {method_name}')
+    ax.set_xlabel('Помилка')
+    ax.set_ylabel('Частота')
+    buf = BytesIO()
+    canvas.print_png(buf)
+    return buf.getvalue()
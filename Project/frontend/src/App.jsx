@@ -8,18 +8,21 @@ import ImageModal from './components/ImageModal';
 import Loader from './components/Loader';
 import ErrorMessage from './components/ErrorMessage';
 import useTaskPolling from './hooks/useTaskPolling';
+import { API_URL } from './config';
 
 // Підтримуємо лише PNG
 const SUPPORTED_IMAGE_TYPES = ['image/png'];
-const BACKEND_URL = 'http://127.0.0.1:8000/upscale_all_methods/';
-const AVERAGE_TIMES_URL = 'http://127.0.0.1:8000/average_times/';
+const UPLOAD_URL = `${API_URL}/upload/`;
+const AVERAGE_TIMES_URL = `${API_URL}/average_times/`;
 const MAX_FILE_SIZE = 5 * 1024 * 1024;
 
-async function startUpscaleTask(base64Image, scaleFactor) {
-    const response = await fetch(BACKEND_URL, {
+// Файл передається як є (без base64): сервер пише тіло у файл і перевіряє лише заголовок PNG
+async function startUpscaleTask(file, scaleFactor) {
+    const params = new URLSearchParams({ scale_factor: scaleFactor, algorithm: 'all' });
+    const response = await fetch(`${UPLOAD_URL}?${params}`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
-        body: JSON.stringify({ image_base64: base64Image, scale_factor: scaleFactor, algorithm: "all" }),
+        headers: { 'Content-Type': 'image/png', 'Accept': 'application/json' },
+        body: file,
     });
     if (!response.ok) {
         let errorData = { detail: `Помилка сервера: ${response.status}` };
@@ -56,7 +59,7 @@ function App() {
     const [selectedFile, setSelectedFile] = useState(null);
     const [originalImageBase64, setOriginalImageBase64] = useState(null);
     const [originalDimensions, setOriginalDimensions] = useState(null);
-    const [reducedImageBase64, setReducedImageBase64] = useState(null);
+    const [reducedImageSrc, setReducedImageSrc] = useState(null);
     const [reducedDimensions, setReducedDimensions] = useState(null);
     const [scaleFactor, setScaleFactor] = useState(2.0);
     const [taskId, setTaskId] = useState(null);
@@ -93,8 +96,8 @@ function App() {
     }, []);
 
     useEffect(() => {
-        if (result?.reduced_image_base64) {
-            setReducedImageBase64(result.reduced_image_base64);
+        if (result?.reduced_image?.url) {
+            setReducedImageSrc(`${API_URL}${result.reduced_image.url}`);
             setReducedDimensions(result.reduced_dimensions);
         }
     }, [result]);
@@ -106,7 +109,7 @@ function App() {
         setSelectedFile(null);
         setOriginalImageBase64(null);
         setOriginalDimensions(null);
-        setReducedImageBase64(null);
+        setReducedImageSrc(null);
         setReducedDimensions(null);
         setIsFileLoading(true);
         if (!file) {
@@ -155,30 +158,39 @@ function App() {
     }, [clearError, setError]);
 
     const handleUpscale = useCallback(async () => {
-        if (!originalImageBase64 || isProcessing || isFileLoading) return;
+        if (!selectedFile || !originalImageBase64 || isProcessing || isFileLoading) return;
         console.log("Starting upscale process...");
         clearError();
         try {
-            const newTaskId = await startUpscaleTask(originalImageBase64, scaleFactor);
+            const newTaskId = await startUpscaleTask(selectedFile, scaleFactor);
             setTaskId(newTaskId);
         } catch (apiError) {
             console.error("Upscale initiation error:", apiError);
             setError({ message: 'Помилка при запуску завдання.', details: apiError.message });
         }
-    }, [originalImageBase64, scaleFactor, isProcessing, isFileLoading, clearError, setError]);
+    }, [selectedFile, originalImageBase64, scaleFactor, isProcessing, isFileLoading, clearError, setError]);
 
-    const handleDownload = useCallback((method, base64) => {
-        if (!base64 || !selectedFile) return;
-        const link = document.createElement('a');
-        link.href = base64;
-        const mimeMatch = base64.match(/data:image\/(\w+);/);
-        const extension = mimeMatch ? mimeMatch[1] : 'png';
-        const originalFileName = selectedFile.name.split('.').slice(0, -1).join('.') || 'image';
-        link.download = `${originalFileName}_upscaled_${method}_x${scaleFactor}.${extension}`;
-        document.body.appendChild(link);
-        link.click();
-        document.body.removeChild(link);
-    }, [selectedFile, scaleFactor]);
+    const handleDownload = useCallback(async (method, src) => {
+        if (!src || !selectedFile) return;
+        // Артефакти віддаються з іншого origin, тож атрибут download працює лише для blob-URL
+        try {
+            const response = await fetch(src);
+            if (!response.ok) throw new Error(`Помилка сервера: ${response.status}`);
+            const blob = await response.blob();
+            const extension = blob.type.split('/')[1] || 'png';
+            const originalFileName = selectedFile.name.split('.').slice(0, -1).join('.') || 'image';
+            const link = document.createElement('a');
+            link.href = URL.createObjectURL(blob);
+            link.download = `${originalFileName}_upscaled_${method}_x${scaleFactor}.${extension}`;
+            document.body.appendChild(link);
+            link.click();
+            document.body.removeChild(link);
+            URL.revokeObjectURL(link.href);
+        } catch (downloadError) {
+            console.error("Download error:", downloadError);
+            setError({ message: 'Не вдалося завантажити зображення.', details: downloadError.message });
+        }
+    }, [selectedFile, scaleFactor, setError]);
 
     const chartData = { 
         psnr: { labels: [], values: [] }, 
@@ -290,16 +302,16 @@ function App() {
                         />
                     )}
                     <ErrorMessage message={error.message} details={error.details} onClose={clearError} />
-                    {reducedImageBase64 && (
+                    {reducedImageSrc && (
                         <section className="text-center">
                             <h3 className="text-xl font-semibold text-gray-200 mb-4">Зменшене зображення (Метод найближчого сусіда)</h3>
                             <div className="w-full max-w-xl mx-auto h-64 sm:h-80 md:h-96 bg-gray-700/50 rounded-xl flex items-center justify-center border border-gray-600 overflow-hidden shadow-lg">
                                 <img
                                     id="reduced-image-preview"
-                                    src={reducedImageBase64}
+                                    src={reducedImageSrc}
                                     alt="Зменшене зображення"
                                     className="max-h-full max-w-full object-contain cursor-pointer transition-transform hover:scale-105"
-                                    onClick={() => setModalImage({ src: reducedImageBase64, alt: 'Зменшене зображення' })}
+                                    onClick={() => setModalImage({ src: reducedImageSrc, alt: 'Зменшене зображення' })}
                                 />
                             </div>
                             {reducedDimensions && (
@@ -385,6 +397,7 @@ function App() {
                                         method={method}
                                         methodDisplay={method}
                                         data={data}
+                                        taskId={taskId}
                                         onImageClick={(src, alt) => {
                                             console.log('Setting modal image:', src, alt);
                                             setModalImage({ src, alt });
@@ -4,7 +4,7 @@ import { Chart as ChartJS, CategoryScale, LinearScale, BarElement, Title, Toolti
 
 ChartJS.register(CategoryScale, LinearScale, BarElement, Title, Tooltip, Legend);
 
-function MetricChart({ title, data, label, backgroundColor, borderColor }) {
+function MetricChart({ title, data, label, backgroundColor, borderColor, compact = false }) {
     const chartData = {
         labels: data.labels,
         datasets: [
@@ -30,7 +30,7 @@ function MetricChart({ title, data, label, backgroundColor, borderColor }) {
                 suggestedMax: label === 'SSIM' ? 1 : undefined
             },
             x: {
-                ticks: { color: '#9ca3af' },
+                ticks: { color: '#9ca3af', maxTicksLimit: compact ? 6 : undefined },
                 grid: { display: false }
             }
         },
@@ -52,6 +52,14 @@ function MetricChart({ title, data, label, backgroundColor, borderColor }) {
         animation: { duration: 500, easing: 'easeOutQuart' }
     };
 
+    if (compact) {
+        return (
+            <div className="w-full h-full p-2">
+                <Bar options={options} data={chartData} />
+            </div>
+        );
+    }
+
     return (
         <div className="flex flex-col">
             <h4 className="text-xl font-semibold text-gray-100 mb-4 text-center">{title}</h4>
@@ -1,10 +1,23 @@
 import React, { useState } from 'react';
 import { Download, Eye, Image as ImageIcon, BarChartHorizontal } from 'lucide-react';
+import MetricChart from './MetricChart';
+import { API_URL } from '../config';
 
-function ResultCard({ method, data, onImageClick, onDownloadClick }) {
+const HISTOGRAM_URL = `${API_URL}/histogram/`;
+
+// Інтервали гістограми помилок з результату -> дані для MetricChart
+function histogramChartData(histogram) {
+    const { edges, counts } = histogram;
+    return {
+        labels: counts.map((_, i) => `${edges[i].toFixed(1)}–${edges[i + 1].toFixed(1)}`),
+        values: counts
+    };
+}
+
+function ResultCard({ method, data, taskId, onImageClick, onDownloadClick }) {
     const [viewMode, setViewMode] = useState('upscaled');
 
-    if (!data || !data.upscaled_image_base64 || !data.diff_image_base64 || !data.hist_base64 || !data.upscaled_shape) {
+    if (!data || !data.error_histogram || !data.upscaled_shape) {
         return (
             <div className="text-center result-card border border-red-500 p-4 rounded-lg bg-gray-700/80 backdrop-blur-sm shadow-lg">
                 <h4 className="text-md font-semibold text-red-400 mb-2">{method.charAt(0).toUpperCase() + method.slice(1)}</h4>
@@ -20,34 +33,47 @@ function ResultCard({ method, data, onImageClick, onDownloadClick }) {
     const shape = data.upscaled_shape;
     const processingTime = data.processing_time ? `${data.processing_time.toFixed(2)} сек` : 'Н/Д';
 
+    // Артефакт відсутній, якщо для нього вибрано профіль кодування skip
+    const upscaledSrc = data.upscaled_image ? `${API_URL}${data.upscaled_image.url}` : null;
+    const diffSrc = data.diff_image ? `${API_URL}${data.diff_image.url}` : null;
+
     const handleDownload = (e, imageSrc) => {
         e.stopPropagation();
-        onDownloadClick(method, imageSrc || data.upscaled_image_base64);
+        onDownloadClick(method, imageSrc || upscaledSrc);
     };
 
+    const histogramPngUrl = taskId ? `${HISTOGRAM_URL}${taskId}/${encodeURIComponent(method)}` : null;
+
+    const histogramChart = (
+        <MetricChart
+            compact
+            label="Частота"
+            data={histogramChartData(data.error_histogram)}
+            backgroundColor='rgba(239, 68, 68, 0.7)'
+            borderColor='rgba(239, 68, 68, 1)'
+        />
+    );
+
     const getImageSrc = () => {
         switch (viewMode) {
-            case 'diff': return data.diff_image_base64;
-            case 'hist': return data.hist_base64;
+            case 'diff': return diffSrc;
             case 'upscaled':
-            default: return data.upscaled_image_base64;
+            default: return upscaledSrc;
         }
     };
 
     const getImageAlt = () => {
         switch (viewMode) {
             case 'diff': return `Різниця (${method})`;
-            case 'hist': return `Гістограма помилок (${method})`;
             case 'upscaled':
             default: return `Збільшене (${method})`;
         }
     };
 
     const images = [
-        { src: data.upscaled_image_base64, alt: `Збільшене (${method})`, label: 'Рез.' },
-        { src: data.diff_image_base64, alt: `Різниця (${method})`, label: 'Різн.' },
-        { src: data.hist_base64, alt: `Гістограма помилок (${method})`, label: 'Гіст.' },
-    ];
+        { src: upscaledSrc, alt: `Збільшене (${method})`, label: 'Рез.' },
+        { src: diffSrc, alt: `Різниця (${method})`, label: 'Різн.' },
+    ].filter(image => image.src);
 
     return (
         <div className="text-center result-card bg-gray-700/80 backdrop-blur-sm rounded-xl p-4 shadow-lg border border-gray-600 flex flex-col h-full transition-shadow hover:shadow-indigo-500/20">
@@ -81,6 +107,32 @@ function ResultCard({ method, data, onImageClick, onDownloadClick }) {
                             <p className="text-xs text-gray-400 mt-1">{image.label}</p>
                         </div>
                     ))}
+                    <div>
+                        <div className="w-full h-48 bg-gray-600 rounded-lg border border-gray-500 overflow-hidden">
+                            {histogramChart}
+                        </div>
+                        <p className="text-xs text-gray-400 mt-1">Гіст.</p>
+                    </div>
+                </div>
+            ) : viewMode === 'hist' ? (
+                <div className="flex-grow w-full h-64 md:h-72 bg-gray-600 rounded-lg border border-gray-500 overflow-hidden relative group mb-3">
+                    {histogramChart}
+                    {histogramPngUrl && (
+                        <a
+                            href={histogramPngUrl}
+                            target="_blank"
+                            rel="noopener noreferrer"
+                            className="download-button absolute top-2 right-2 bg-indigo-600 hover:bg-indigo-700 text-white p-2 rounded-full shadow-lg opacity-0 group-hover:opacity-100 transition-opacity duration-300 z-10"
+                            title="Завантажити гістограму (PNG)"
+                            aria-label={`Завантажити гістограму помилок ${method}`}
+                        >
+                            <Download size={18} />
+                        </a>
+                    )}
+                </div>
+            ) : !getImageSrc() ? (
+                <div className="flex-grow w-full h-64 md:h-72 bg-gray-600 rounded-lg flex items-center justify-center border border-gray-500 mb-3">
+                    <p className="text-gray-400 text-sm">Зображення не збережено</p>
                 </div>
             ) : (
                 <div
@@ -0,0 +1,3 @@
+// Адреса бекенду (FastAPI): хост і порт змінюються лише тут
+export const API_URL = 'http://127.0.0.1:8000';
+export const WEBSOCKET_URL = `${API_URL.replace(/^http/, 'ws')}/ws/task/`;
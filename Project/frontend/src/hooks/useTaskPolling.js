@@ -1,6 +1,5 @@
 import { useState, useEffect, useRef, useCallback } from 'react';
-
-const WEBSOCKET_URL = 'ws://127.0.0.1:8000/ws/task/';
+import { WEBSOCKET_URL } from '../config';
 
 function useTaskPolling(taskId) {
     const [status, setStatus] = useState('');